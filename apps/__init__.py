@@ -1,24 +1,37 @@
 # apps/__init__.py
 import os
 from flask import Flask
-from werkzeug.security import generate_password_hash
-from .extensions import db, migrate, login_manager, csrf
+from .extensions import db, migrate, login_manager, csrf, iris_batcher, model_registry, prediction_cache, api_key_index, rate_limiter, usage_writer, catalog, user_cache, purge_jobs, sqlite_profile, read_router, request_metrics
 from .config import Config
 # 전역 변수/인스턴스 초기화 (extensions.py에서 정의)
 def create_app():     #  factory 함수
     app = Flask(__name__)
     app.config.from_object(Config) # config.py에서 설정 로드
     # 확장 기능 초기화 연계
+    sqlite_profile.init_app(app)          # SQLite PRAGMA (연결 생성 전에 설정)
     db.init_app(app)                      # flask 앱에 db연결
+    read_router.init_app(app)             # 조회 화면용 읽기 전용 엔진 URI
     migrate.init_app(app,db)              # 없으면, flask db 명령어를 사용불가
     login_manager.init_app(app)  # flask 앱에 로그인 관리 연결
     csrf.init_app(app)                    # flask 앱에 CSRF 보호 연결 
+    iris_batcher.init_app(app, 'IRIS_BATCH')  # 붓꽃 예측 배치 크기/대기시간 설정
+    model_registry.init_app(app)          # 모델 파일 위치, LRU 개수/메모리 한도 설정
+    prediction_cache.init_app(app)        # 예측 결과 캐시 크기/TTL/반올림 자릿수 설정
+    api_key_index.init_app(app)           # API 키 인덱스 무효화 신호 파일 위치
+    rate_limiter.init_app(app)            # 사용량 제한 백엔드 선택 (memory / sqlite)
+    usage_writer.init_app(app)            # UsageLog 일괄 기록 크기/주기 설정
+    catalog.init_app(app, db.session)     # Service/Subscription commit 시 카탈로그 캐시 무효화
+    user_cache.init_app(app, db.session)  # User 권한/상태 변경 commit 시 사용자 캐시 무효화
+    purge_jobs.init_app(app)              # 대량 삭제 기준/청크 크기
+    request_metrics.init_app(app)         # 요청별 SQL/시간 계측 (샘플링 비율)
+    from .stats import admin_stats
+    admin_stats.init_app(app)             # 관리자 대시보드 통계 캐시 TTL
     # Flask-Login: 사용자 로더 설정 (auth 블루프린트에서 import하여 사용)
     # create_app() 정의 또는 auth/__init__.py 정의하여 login_manager.user_loader 데코레이터와 함께 사용
     from .dbmodels import User  # User 모델 임포트
     @login_manager.user_loader
     def load_user(user_id):   # Flask-Login이 user_id를 기반으로 사용자 객체를 로드
-        return User.query.get(int(user_id))
+        return user_cache.load(int(user_id))   # 짧은 TTL 캐시 (요청마다 users 조회 없음)
     # Flask-Login: Unauthorized Error 핸들링, login_view와 같은 기능이나, next 값 자동전달
     @login_manager.unauthorized_handler
     def unauthorized():
@@ -35,26 +48,17 @@ def create_app():     #  factory 함수
     app.register_blueprint(auth, url_prefix='/auth')
     app.register_blueprint(adminx, url_prefix='/adminx')
     app.register_blueprint(mypagex, url_prefix='/mypagex')
+    # CLI 명령어 등록 (flask usage ..., flask search ...)
+    from .commands import (check_query_plans_command, create_admin_command, export_predictions_command, init_db_command,
+                           model_cli, search_cli, usage_cli)
+    app.cli.add_command(usage_cli)
+    app.cli.add_command(search_cli)
+    app.cli.add_command(model_cli)
+    app.cli.add_command(init_db_command)
+    app.cli.add_command(create_admin_command)
+    app.cli.add_command(check_query_plans_command)
+    app.cli.add_command(export_predictions_command)
 
-    # db 테이블 생성 및 관리자 초기계정 생성
-    with app.app_context():
-        #db.drop_all()         # 운영시에는 커멘트 처리 필요
-        db.create_all()       # 테이블 생성
-        # 최초 관리자 계정 생성
-        admin_username = app.config.get('ADMIN_USERNAME')
-        admin_email = app.config.get('ADMIN_EMAIL')
-        admin_password = app.config.get('ADMIN_PASSWORD')
-
-        if admin_username and admin_password:
-            admin_user = User.query.filter_by(username=admin_username).first()
-            if not admin_user:
-                hashed_password = generate_password_hash(admin_password)
-                new_admin = User(username=admin_username, email=admin_email, password_hash=hashed_password, is_admin=True)
-                db.session.add(new_admin)
-                db.session.commit()
-                print(f"관리자 계정 '{admin_username}', '{admin_password}' 이(가) 생성되었습니다.")
-            else:
-                print(f"관리자 계정 '{admin_username}'이(가) 이미 존재합니다.")
-        else:
-            print("ADMIN_USERNAME 또는 ADMIN_PASSWORD 환경 변수가 설정되지 않았습니다.")
-        return app
+    # 테이블 생성/관리자 계정은 워커 시작 시 하지 않음: flask init-db, flask create-admin 또는
+    # gunicorn.conf.py(on_starting)에서 fork 전에 한 번만 실행 (apps/bootstrap.py)
+    return app
@@ -1,36 +1,35 @@
 # apps/adminx/views.py
+import hmac
 from datetime import datetime
-from flask import flash, redirect, render_template, request, url_for
+from flask import Response, current_app, flash, jsonify, redirect, render_template, request, url_for
 from flask_login import current_user
-from sqlalchemy import func, or_
+from sqlalchemy import func, or_, update
+from sqlalchemy.orm import joinedload
 from . import adminx
 from apps.dbmodels import User, Service, Subscription # Import your models here
+from apps.dbrouting import read_only_db
 from apps.decorators import admin_required
-from apps.extensions import db
+from apps.pagination import keyset_page
+from apps.search import search_services
+from apps.stats import admin_stats
+from apps.extensions import api_key_index, catalog, db, model_registry, prediction_cache, purge_jobs, request_metrics, usage_writer
 from werkzeug.security import generate_password_hash # 비밀번호 해싱을 위해 사용
 @adminx.route('/dashboard')
 @admin_required
+@read_only_db
 def dashboard():
-    total_users = User.query.count()
-    total_services = Service.query.count()  # Service.query.filter_by(is_active=True).count()
-    active_services = Service.query.filter_by(is_active=True).count()
-    pending_subscriptions = Subscription.query.filter_by(status='pending').count()
-    # 최근 7일간 서비스 사용량 (로그인 제외)
-    #seven_days_ago = datetime.now() - datetime.timedelta(days=7)
-    recent_service_usage = 0
-    #recent_service_usage = db.session.query(func.sum(UsageLog.usage_count))\
-    #                            .filter(UsageLog.timestamp >= seven_days_ago)\
-    #                            .filter(UsageLog.usage_type.notin_([UsageLog.UsageType.LOGIN]))\
-    #                            .scalar() or 0
+    # 사용자/서비스/구독/최근 7일 사용량을 한 번의 쿼리로 계산, ADMIN_STATS_TTL초 동안 캐시
+    stats = admin_stats.snapshot()
     return render_template('adminx/dashboard.html',
                            title='관리자 대시보드',
-                           total_users=total_users,
-                           total_services=total_services,
-                           active_services=active_services,
-                           pending_subscriptions=pending_subscriptions,
-                           recent_service_usage=recent_service_usage)
+                           total_users=stats['total_users'],
+                           total_services=stats['total_services'],
+                           active_services=stats['active_services'],
+                           pending_subscriptions=stats['pending_subscriptions'],
+                           recent_service_usage=stats['recent_service_usage'])
 @adminx.route('/manage_users', methods=['GET', 'POST'])
 @admin_required
+@read_only_db
 def manage_users():
     PER_PAGE = 10
     page = request.args.get('page', 1, type=int)
@@ -96,6 +95,7 @@ def toggle_user_active(user_id):
         return redirect(url_for('adminx.manage_users'))
     user.is_active = not user.is_active
     db.session.commit()
+    api_key_index.invalidate()   # 비활성 사용자의 API 키도 즉시 차단
     flash(f'{user.username} 계정 상태가 {"활성" if user.is_active else "비활성"}으로 변경되었습니다.', 'success')
     return redirect(url_for('adminx.manage_users'))
 @adminx.route('/manage_users/<int:user_id>/toggle_admin', methods=['POST'])
@@ -135,10 +135,14 @@ def delete_user(user_id):
     if user.id == current_user.id:
         flash('자신의 계정은 삭제할 수 없습니다.', 'warning')
         return redirect(url_for('adminx.manage_users'))
+    username = user.username
     try:
-        db.session.delete(user)
-        db.session.commit()
-        flash(f'{user.username} 계정이 성공적으로 삭제되었습니다.', 'success')
+        # 자식 행을 로딩하지 않고 테이블별 DELETE (행이 많으면 백그라운드 청크 삭제)
+        job = purge_jobs.run('user', user.id)
+        if job['status'] == 'running':
+            flash(f"{username} 계정을 비활성화했습니다. 데이터 {job['total']}건을 백그라운드에서 삭제 중입니다 (작업 ID: {job['id']}).", 'info')
+        else:
+            flash(f'{username} 계정이 성공적으로 삭제되었습니다.', 'success')
     except Exception as e:
         db.session.rollback()
         flash(f'사용자 삭제 중 오류가 발생했습니다: {e}', 'danger')
@@ -182,6 +186,7 @@ def create_user():
     return render_template('adminx/create_user.html', title='사용자 생성')
 @adminx.route('/services', methods=['GET', 'POST'])
 @admin_required
+@read_only_db
 def services():
     PER_PAGE = 10
     page = request.args.get('page', 1, type=int)
@@ -194,13 +199,7 @@ def services():
     services_query = Service.query
     # 검색 기능 (서비스 이름, 설명, 키워드로 검색)
     if search_query:
-        services_query = services_query.filter(
-            or_(
-                Service.servicename.ilike(f'%{search_query}%'),
-                Service.description.ilike(f'%{search_query}%'),
-                Service.keywords.ilike(f'%{search_query}%')
-            )
-        )
+        services_query = search_services(services_query, search_query)
     # 활성 상태 필터링
     if is_active_query:
         if is_active_query == 'true':
@@ -240,6 +239,8 @@ def services():
         is_auto_query=is_auto_query,
         created_at_query=created_at_query,
         # --------------------------------------------------
+        model_versions={s.service_endpoint: model_registry.current_version(s.service_endpoint)
+                        for s in services if model_registry.serves(s.service_endpoint)},
     )
 @adminx.route('/services/<int:service_id>/toggle_active', methods=['POST'])
 @admin_required
@@ -257,6 +258,19 @@ def toggle_service_auto(service_id):
     db.session.commit()
     flash(f'{service.servicename} 자동 승인 상태가 {"자동" if service.is_auto else "수동"}으로 변경되었습니다.', 'success')
     return redirect(url_for('adminx.services', **request.args)) # Pass current search args
+# 서비스 모델 버전 변경: 모든 워커에 적용되고 이전 버전의 예측 캐시는 비워진다
+@adminx.route('/services/<int:service_id>/model_version', methods=['POST'])
+@admin_required
+def set_service_model_version(service_id):
+    service = Service.query.get_or_404(service_id)
+    version = request.form.get('model_version', '').strip()
+    try:
+        old_version = model_registry.switch_version(service.service_endpoint, version)
+    except (ValueError, LookupError) as e:
+        flash(f'모델 버전을 변경하지 못했습니다: {e}', 'danger')
+    else:
+        flash(f'{service.servicename} 모델 버전이 {old_version}에서 {version}(으)로 변경되었습니다.', 'success')
+    return redirect(url_for('adminx.services', **request.args)) # Pass current search args
 @adminx.route('/services/<int:service_id>/edit', methods=['GET', 'POST'])
 @admin_required
 def edit_service(service_id):
@@ -279,10 +293,13 @@ def edit_service(service_id):
 @admin_required
 def delete_service(service_id):
     service = Service.query.get_or_404(service_id)
+    servicename = service.servicename
     try:
-        db.session.delete(service)
-        db.session.commit()
-        flash(f'{service.servicename} 서비스가 성공적으로 삭제되었습니다.', 'success')
+        job = purge_jobs.run('service', service.id)
+        if job['status'] == 'running':
+            flash(f"{servicename} 서비스를 비활성화했습니다. 데이터 {job['total']}건을 백그라운드에서 삭제 중입니다 (작업 ID: {job['id']}).", 'info')
+        else:
+            flash(f'{servicename} 서비스가 성공적으로 삭제되었습니다.', 'success')
     except Exception as e:
         db.session.rollback()
         flash(f'사용자 삭제 중 오류가 발생했습니다: {e}', 'danger')
@@ -328,18 +345,28 @@ def create_service():
             flash(f'사용자 생성 중 오류가 발생했습니다: {e}', 'danger')
     return render_template('adminx/create_service.html', title='서비스 생성')
 # 구독용 추가된 내용  ## 승인 내용을 자동승인/수동승인으로 변경시 수정
+SUBSCRIPTION_STATUSES = ('pending', 'approved', 'rejected')
+SUBSCRIPTIONS_PER_PAGE = 50
 @adminx.route('/subscriptions')
 @admin_required
+@read_only_db
 def subscriptions():
-    pending_subscriptions = Subscription.query.filter_by(status='pending').order_by(Subscription.request_date.asc()).all()
-    approved_subscriptions = Subscription.query.filter_by(status='approved').order_by(Subscription.request_date.desc()).all()
-    rejected_subscriptions = Subscription.query.filter_by(status='rejected').order_by(Subscription.request_date.desc()).all()
-    
+    # 상태별 탭 + 키셋 페이지네이션, 사용자/서비스는 JOIN으로 함께 로딩 (행마다 지연 로딩하지 않음)
+    status = request.args.get('status', 'pending')
+    if status not in SUBSCRIPTION_STATUSES:
+        status = 'pending'
+    counts = dict(db.session.query(Subscription.status, func.count(Subscription.id)).group_by(Subscription.status))
+    query = Subscription.query.options(joinedload(Subscription.user), joinedload(Subscription.service))\
+                              .filter(Subscription.status == status)
+    # 대기 중인 요청은 오래된 순, 처리된 구독은 최신 순
+    page = keyset_page(query, Subscription.request_date, Subscription.id, cursor=request.args.get('cursor'),
+                       per_page=SUBSCRIPTIONS_PER_PAGE, descending=(status != 'pending'))
     return render_template('adminx/subscriptions.html',
                            title='구독 승인 관리',
-                           pending_subscriptions=pending_subscriptions,
-                           approved_subscriptions=approved_subscriptions,
-                           rejected_subscriptions=rejected_subscriptions)
+                           status=status,
+                           counts={s: counts.get(s, 0) for s in SUBSCRIPTION_STATUSES},
+                           subscriptions=page.items,
+                           next_cursor=page.next_cursor)
 @adminx.route('/subscription/<int:sub_id>/<action>', methods=['POST'])
 @admin_required
 def manage_subscription(sub_id, action):
@@ -357,4 +384,72 @@ def manage_subscription(sub_id, action):
         flash('잘못된 요청입니다.', 'danger')
     
     db.session.commit()
-    return redirect(url_for('adminx.subscriptions'))
+    admin_stats.invalidate()
+    return redirect(url_for('adminx.subscriptions', status=request.args.get('status', 'pending')))
+@adminx.route('/subscriptions/bulk', methods=['POST'])
+@admin_required
+def bulk_manage_subscriptions():
+    # 선택한 구독(또는 대기 중인 전체 요청)을 UPDATE 한 번으로 승인/거부
+    action = request.form.get('action')
+    status = request.form.get('status', 'pending')
+    new_status = {'approve': 'approved', 'reject': 'rejected'}.get(action)
+    if new_status is None:
+        flash('잘못된 요청입니다.', 'danger')
+        return redirect(url_for('adminx.subscriptions', status=status))
+    stmt = update(Subscription).where(Subscription.status != new_status)
+    if request.form.get('all_pending'):
+        stmt = stmt.where(Subscription.status == 'pending')
+    else:
+        sub_ids = [int(i) for i in request.form.getlist('sub_ids') if i.isdigit()]
+        if not sub_ids:
+            flash('선택한 구독이 없습니다.', 'warning')
+            return redirect(url_for('adminx.subscriptions', status=status))
+        stmt = stmt.where(Subscription.id.in_(sub_ids))
+    result = db.session.execute(stmt.values(status=new_status, approval_date=datetime.now()),
+                                execution_options={'synchronize_session': False})
+    db.session.commit()
+    # Core UPDATE는 세션 이벤트로 감지되지 않으므로 캐시를 직접 무효화
+    catalog.invalidate_subscriptions()
+    admin_stats.invalidate()
+    label = '승인' if new_status == 'approved' else '거부'
+    flash(f'{result.rowcount}건의 구독이 {label}되었습니다.', 'success' if new_status == 'approved' else 'info')
+    return redirect(url_for('adminx.subscriptions', status=status))
+# 예측 결과 캐시 / 모델 레지스트리 적중률 확인
+@adminx.route('/cache_stats')
+@admin_required
+def cache_stats():
+    return jsonify({"prediction_cache": prediction_cache.stats(), "model_registry": model_registry.stats(),
+                    "usage_writer": usage_writer.stats()})
+# 엔드포인트별 요청 계측 (이 워커 프로세스 기준)
+@adminx.route('/metrics')
+@admin_required
+def metrics():
+    return render_template('adminx/metrics.html', title='요청 계측', rows=request_metrics.snapshot(),
+                           sample_rate=request_metrics.sample_rate,
+                           since=datetime.fromtimestamp(request_metrics.started))
+@adminx.route('/metrics/reset', methods=['POST'])
+@admin_required
+def reset_metrics():
+    request_metrics.reset()
+    flash('요청 계측 값을 초기화했습니다.', 'info')
+    return redirect(url_for('adminx.metrics'))
+@adminx.route('/metrics/prometheus')
+def prometheus_metrics():
+    # Prometheus 수집기: Authorization: Bearer <METRICS_TOKEN>, 또는 관리자 로그인
+    token = current_app.config.get('METRICS_TOKEN')
+    if not (token and hmac.compare_digest(request.headers.get('Authorization', ''), f'Bearer {token}')):
+        if not current_user.is_authenticated or not current_user.is_admin:
+            return Response('forbidden\n', status=403, mimetype='text/plain')
+    return Response(request_metrics.prometheus(), mimetype='text/plain; version=0.0.4')
+# 백그라운드 삭제 작업 진행 상황 (이 워커 프로세스에서 시작한 작업)
+@adminx.route('/purge_jobs')
+@admin_required
+def purge_job_list():
+    return jsonify(purge_jobs.jobs())
+@adminx.route('/purge_jobs/<job_id>')
+@admin_required
+def purge_job_status(job_id):
+    job = purge_jobs.get(job_id)
+    if job is None:
+        return jsonify({"error": "not found"}), 404
+    return jsonify(job)
@@ -0,0 +1,47 @@
+# apps/apikeys.py
+# X-API-Key 인증용 프로세스 내 API 키 인덱스 (요청 경로에서 DB 조회 없음)
+import hashlib
+import os
+import threading
+from collections import namedtuple
+from apps.caches import SharedStamp
+
+APIKeyEntry = namedtuple('APIKeyEntry', [
+    'key_id', 'user_id', 'daily_limit', 'monthly_limit', 'user_daily_limit', 'user_monthly_limit',
+])
+
+def hash_key(key_string):
+    return hashlib.sha256(key_string.encode('utf-8')).hexdigest()
+
+class APIKeyIndex:
+    """
+    활성 API 키의 해시 -> APIKeyEntry 인덱스.
+    키 생성/활성화 토글/삭제 시 invalidate()를 호출하면 모든 워커가 다음 요청에서 인덱스를 다시 읽는다.
+    """
+    def __init__(self):
+        self._index = None
+        self._stamp = None
+        self._lock = threading.Lock()
+    def init_app(self, app):
+        self._stamp = SharedStamp(os.path.join(app.config['INSTANCE_DIR'], 'api_keys.stamp'))
+    def _load(self):
+        from apps.dbmodels import APIKey, User
+        from apps.extensions import db
+        rows = db.session.query(
+            APIKey.key_string, APIKey.id, APIKey.user_id, APIKey.daily_limit, APIKey.monthly_limit,
+            User.daily_limit, User.monthly_limit,
+        ).join(User, APIKey.user_id == User.id).filter(APIKey.is_active == True, User.is_active == True)
+        return {hash_key(key_string): APIKeyEntry(*values) for key_string, *values in rows}
+    def lookup(self, key_string):
+        """API 키 문자열로 APIKeyEntry 조회 (없거나 비활성이면 None)"""
+        if not key_string:
+            return None
+        index = self._index
+        if index is None or (self._stamp is not None and self._stamp.changed()):
+            with self._lock:
+                index = self._index = self._load()
+        return index.get(hash_key(key_string))
+    def invalidate(self):
+        self._index = None
+        if self._stamp is not None:
+            self._stamp.bump()
@@ -0,0 +1,40 @@
+# apps/bootstrap.py
+# 배포/최초 실행 시 한 번만 필요한 작업: 테이블 생성, 검색 인덱스, 최초 관리자 계정
+# create_app()에서 분리하여 워커마다 반복하지 않는다 (flask init-db / create-admin, gunicorn on_starting)
+from werkzeug.security import generate_password_hash
+
+def init_db():
+    """테이블과 서비스 검색 인덱스 생성 (이미 있으면 유지). 앱 컨텍스트 안에서 호출"""
+    from apps.extensions import db
+    from apps.search import create_search_index
+    #db.drop_all()         # 운영시에는 커멘트 처리 필요
+    db.create_all()       # 테이블 생성
+    create_search_index()  # 서비스 검색용 FTS5 인덱스 (SQLite에서만, 이미 있으면 유지)
+
+def create_admin(username, email, password):
+    """관리자 계정 생성. 생성했으면 True, 이미 있으면 False"""
+    from apps.dbmodels import User
+    from apps.extensions import db
+    if User.query.filter_by(username=username).first():
+        return False
+    db.session.add(User(username=username, email=email, password_hash=generate_password_hash(password), is_admin=True))
+    db.session.commit()
+    return True
+
+def bootstrap(app):
+    """init_db + 환경 변수(ADMIN_*)로 최초 관리자 계정 생성"""
+    with app.app_context():
+        init_db()
+        # 최초 관리자 계정 생성
+        admin_username = app.config.get('ADMIN_USERNAME')
+        admin_email = app.config.get('ADMIN_EMAIL')
+        admin_password = app.config.get('ADMIN_PASSWORD')
+        if admin_username and admin_password:
+            if create_admin(admin_username, admin_email, admin_password):
+                print(f"관리자 계정 '{admin_username}' 이(가) 생성되었습니다.")
+            else:
+                print(f"관리자 계정 '{admin_username}'이(가) 이미 존재합니다.")
+        else:
+            print("ADMIN_USERNAME 또는 ADMIN_PASSWORD 환경 변수가 설정되지 않았습니다.")
+        from apps.extensions import db
+        db.engine.dispose()   # fork 이전 master의 연결을 워커와 공유하지 않도록 정리
@@ -0,0 +1,120 @@
+# apps/caches.py
+# 프로세스 내 캐시: 워커 간 무효화 신호, TTL + LRU 캐시, 서비스별 예측 결과 캐시
+import os
+import threading
+import time
+from collections import OrderedDict
+
+_MISSING = object()
+
+class SharedStamp:
+    """
+    gunicorn 워커 간 캐시 무효화 신호: 파일의 수정 시각(mtime)을 비교한다.
+    bump()하면 다른 워커의 changed()가 True가 되며, 확인 비용은 os.stat 한 번이다.
+    """
+    def __init__(self, path):
+        self.path = path
+        self._seen = self._read()
+    def _read(self):
+        try:
+            return os.stat(self.path).st_mtime_ns
+        except OSError:
+            return None
+    def bump(self):
+        with open(self.path, 'w') as f:
+            f.write(str(time.time_ns()))
+        self._seen = None   # 현재 워커도 다음 확인 시 다시 로딩
+    def changed(self):
+        current = self._read()
+        if current != self._seen:
+            self._seen = current
+            return True
+        return False
+
+class TTLCache:
+    """
+    최대 maxsize개, 항목별 ttl초 동안 유지되는 LRU 캐시 (스레드 안전).
+    clear()마다 generation이 증가한다: 조회 전에 읽어 둔 generation을 set()에 넘기면
+    조회 도중 무효화된 경우 오래된 값을 다시 넣지 않는다.
+    """
+    def __init__(self, maxsize=1024, ttl=300):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data = OrderedDict()   # key -> (만료 시각, 값)
+        self._lock = threading.Lock()
+        self.hits = self.misses = 0
+        self.generation = 0
+    def get(self, key, default=None):
+        with self._lock:
+            item = self._data.get(key, _MISSING)
+            if item is not _MISSING:
+                if item[0] > time.monotonic():
+                    self._data.move_to_end(key)
+                    self.hits += 1
+                    return item[1]
+                del self._data[key]   # 만료된 항목
+            self.misses += 1
+            return default
+    def set(self, key, value, generation=None):
+        """저장 여부 (generation이 현재 값과 다르면 저장하지 않음)"""
+        with self._lock:
+            if generation is not None and generation != self.generation:
+                return False
+            self._data[key] = (time.monotonic() + self.ttl, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+            return True
+    def pop(self, key, default=None):
+        with self._lock:
+            item = self._data.pop(key, _MISSING)
+            return default if item is _MISSING else item[1]
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+            self.generation += 1
+    def __len__(self):
+        return len(self._data)
+    def stats(self):
+        return {"size": len(self._data), "maxsize": self.maxsize, "hits": self.hits, "misses": self.misses}
+
+class PredictionCache:
+    """
+    서비스(endpoint)별 예측 결과 캐시.
+    키는 (model_version, 반올림한 특징 값 튜플)이며 모델 버전이 바뀌면 해당 서비스 캐시를 비운다.
+    """
+    def __init__(self, maxsize=10000, ttl=300, rounding=4):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.rounding = rounding
+        self._caches = {}   # endpoint -> TTLCache
+        self._lock = threading.Lock()
+    def init_app(self, app):
+        self.maxsize = app.config.get('PREDICTION_CACHE_SIZE', self.maxsize)
+        self.ttl = app.config.get('PREDICTION_CACHE_TTL', self.ttl)
+        self.rounding = app.config.get('PREDICTION_CACHE_ROUNDING', self.rounding)
+    def _cache(self, endpoint):
+        cache = self._caches.get(endpoint)
+        if cache is None:
+            with self._lock:
+                cache = self._caches.setdefault(endpoint, TTLCache(self.maxsize, self.ttl))
+        return cache
+    def make_key(self, version, features):
+        return (version,) + tuple(round(float(value), self.rounding) for value in features)
+    def get(self, endpoint, version, features):
+        if not self.maxsize:
+            return None
+        return self._cache(endpoint).get(self.make_key(version, features))
+    def set(self, endpoint, version, features, result):
+        if self.maxsize:
+            self._cache(endpoint).set(self.make_key(version, features), result)
+    def invalidate(self, endpoint=None, *args):
+        """endpoint 캐시 비우기 (endpoint가 없으면 전체). ModelRegistry 버전 변경 리스너로도 사용"""
+        with self._lock:
+            caches = list(self._caches.values()) if endpoint is None else [self._caches.get(endpoint)]
+        for cache in caches:
+            if cache is not None:
+                cache.clear()
+    def stats(self):
+        with self._lock:
+            return {endpoint: cache.stats() for endpoint, cache in self._caches.items()}
@@ -0,0 +1,127 @@
+# apps/catalog.py
+# 서비스 카탈로그 스냅샷 + 사용자별 구독 상태 맵 (프로세스 내 캐시, commit 시점에 무효화)
+import os
+import threading
+from types import SimpleNamespace
+from sqlalchemy import event
+from apps.caches import SharedStamp, TTLCache
+
+class ServiceCatalog:
+    """
+    services 전체를 한 번 읽어 스냅샷(SimpleNamespace)으로 보관하고, 사용자별 {service_id: status}를 캐시한다.
+    Service/Subscription이 바뀐 트랜잭션이 commit되면 SQLAlchemy 세션 이벤트로 자동 무효화되며,
+    SharedStamp로 다른 gunicorn 워커에도 알린다. Core 일괄 UPDATE/DELETE 후에는 invalidate_*()를 직접 호출한다.
+    무효화마다 세대(generation)가 증가하며, 읽은 트랜잭션이 시작된 뒤 세대가 바뀌었으면 읽은 값을 캐시에 넣지 않는다
+    (무효화 전에 시작된 조회가 무효화 뒤에 끝나 이전 상태를 다시 채우는 것 방지).
+    """
+    def __init__(self):
+        self._services = None          # service_id -> 스냅샷 (id 순)
+        self._endpoints = {}           # service_endpoint -> 스냅샷
+        self._subscriptions = TTLCache(maxsize=10000, ttl=300)   # user_id -> {service_id: status}
+        self._services_stamp = None
+        self._subscriptions_stamp = None
+        self._services_generation = 0
+        self._lock = threading.Lock()
+    def init_app(self, app, session):
+        instance_dir = app.config['INSTANCE_DIR']
+        self._subscriptions = TTLCache(app.config.get('SUBSCRIPTION_CACHE_SIZE', 10000),
+                                       app.config.get('SUBSCRIPTION_CACHE_TTL', 300))
+        self._services_stamp = SharedStamp(os.path.join(instance_dir, 'catalog.stamp'))
+        self._subscriptions_stamp = SharedStamp(os.path.join(instance_dir, 'subscriptions.stamp'))
+        if not event.contains(session, 'after_flush', self._after_flush):
+            event.listen(session, 'after_flush', self._after_flush)
+            event.listen(session, 'after_commit', self._after_commit)
+            event.listen(session, 'after_rollback', self._after_rollback)
+            event.listen(session, 'after_begin', self._after_begin)
+    # --- 세션 이벤트: flush된 객체 중 Service/Subscription이 있으면 commit 후 무효화 ---
+    def _after_flush(self, session, flush_context):
+        from apps.dbmodels import Service, Subscription
+        for obj in list(session.new) + list(session.dirty) + list(session.deleted):
+            if isinstance(obj, Service):
+                session.info['catalog_changed'] = True
+            elif isinstance(obj, Subscription):
+                session.info['subscriptions_changed'] = True
+    def _after_commit(self, session):
+        if session.info.pop('catalog_changed', False):
+            self.invalidate_services()
+        if session.info.pop('subscriptions_changed', False):
+            self.invalidate_subscriptions()
+    def _after_rollback(self, session):
+        session.info.pop('catalog_changed', None)
+        session.info.pop('subscriptions_changed', None)
+    def _after_begin(self, session, transaction, connection):
+        # 트랜잭션은 시작 시점의 데이터를 읽으므로(SQLite WAL 등) 이 시점의 세대를 기록
+        session.info['catalog_generations'] = (self._services_generation, self._subscriptions.generation)
+    def _generations(self):
+        """(서비스 세대, 구독 세대): 진행 중인 트랜잭션이 있으면 그 시작 시점 값"""
+        from apps.extensions import db
+        current = (self._services_generation, self._subscriptions.generation)
+        session = db.session()
+        if session.in_transaction():
+            return session.info.get('catalog_generations', current)
+        return current
+    # --- 조회 ---
+    def _load_services(self):
+        from apps.dbmodels import Service
+        columns = [c.key for c in Service.__table__.columns]
+        services = {}
+        for service in Service.query.order_by(Service.id):
+            services[service.id] = SimpleNamespace(**{key: getattr(service, key) for key in columns})
+        return services
+    def _snapshot(self):
+        if self._services_stamp is not None and self._services_stamp.changed():   # 다른 워커에서 무효화
+            self._services_generation += 1
+            self._services = None
+        services = self._services
+        if services is None:
+            with self._lock:
+                generation = self._generations()[0]
+                services = self._load_services()
+                if generation == self._services_generation:   # 읽는 도중 무효화되었으면 이번 요청에만 사용
+                    self._endpoints = {s.service_endpoint: s for s in services.values() if s.service_endpoint}
+                    self._services = services
+        return services
+    def services(self, active_only=True):
+        """서비스 스냅샷 목록 (기본: 활성 서비스만)"""
+        return [s for s in self._snapshot().values() if s.is_active or not active_only]
+    def get(self, service_id):
+        return self._snapshot().get(service_id)
+    def by_endpoint(self, service_endpoint):
+        """service_endpoint(예: 'main.predict_iris')로 서비스 스냅샷 조회 (비활성 포함, 없으면 None)"""
+        services = self._snapshot()
+        if services is not self._services:   # 캐시에 넣지 않은 스냅샷
+            return next((s for s in services.values() if s.service_endpoint == service_endpoint), None)
+        return self._endpoints.get(service_endpoint)
+    def subscription_statuses(self, user_id):
+        """{service_id: status} (pending / approved / rejected)"""
+        if self._subscriptions_stamp is not None and self._subscriptions_stamp.changed():
+            self._subscriptions.clear()
+        statuses = self._subscriptions.get(user_id)
+        if statuses is None:
+            from apps.dbmodels import Subscription
+            from apps.extensions import db
+            generation = self._generations()[1]
+            rows = db.session.query(Subscription.service_id, Subscription.status)\
+                             .filter(Subscription.user_id == user_id)
+            statuses = dict(rows)
+            self._subscriptions.set(user_id, statuses, generation=generation)
+        return statuses
+    def entitled(self, user_id, service_id):
+        """
+        예측 경로 권한 확인: 서비스가 활성이고 구독이 approved인지 (캐시 적중 시 딕셔너리 조회만).
+        구독 승인/거부(manage_subscription), 자동 승인(service_detail), 서비스 비활성화는
+        commit 시 세션 이벤트로, 일괄 처리는 invalidate_*() 호출로 무효화된다.
+        """
+        service = self.get(service_id)
+        return service is not None and service.is_active \
+            and self.subscription_statuses(user_id).get(service_id) == 'approved'
+    # --- 무효화 ---
+    def invalidate_services(self):
+        self._services_generation += 1
+        self._services = None
+        if self._services_stamp is not None:
+            self._services_stamp.bump()
+    def invalidate_subscriptions(self):
+        self._subscriptions.clear()
+        if self._subscriptions_stamp is not None:
+            self._subscriptions_stamp.bump()
@@ -0,0 +1,130 @@
+# apps/commands.py
+# flask CLI 명령어 (예: flask usage rebuild-rollups, flask init-db)
+from datetime import datetime
+import click
+from flask import current_app
+from flask.cli import AppGroup, with_appcontext
+
+usage_cli = AppGroup('usage', help='사용량 로그/롤업 관리')
+search_cli = AppGroup('search', help='서비스 검색 인덱스 관리')
+model_cli = AppGroup('model', help='서비스 모델 버전 관리')
+
+@usage_cli.command('rebuild-rollups')
+@click.option('--since', default=None, help='YYYY-MM-DD 이후 구간만 다시 계산 (기본: 전체)')
+def rebuild_rollups_command(since):
+    """usage_logs로 시간/일 단위 롤업 테이블을 다시 계산 (백필)"""
+    from apps.usage import rebuild_rollups
+    since_date = datetime.strptime(since, '%Y-%m-%d') if since else None
+    for table, count in rebuild_rollups(since_date).items():
+        click.echo(f'{table}: {count}행')
+
+@usage_cli.command('rebuild-counters')
+def rebuild_counters_command():
+    """usage_logs로 이번 달/오늘 사용량 한도 카운터와 users/api_keys.usage_count를 다시 계산 (백필)"""
+    from apps.quota import rebuild_counters
+    click.echo(f'usage_counters: {rebuild_counters()}행')
+
+@search_cli.command('rebuild-index')
+def rebuild_search_index_command():
+    """services_fts(FTS5) 인덱스와 트리거를 만들고 전체 서비스로 다시 채움"""
+    from apps.search import create_search_index
+    if create_search_index(rebuild=True):
+        click.echo('서비스 검색 인덱스를 다시 만들었습니다.')
+    else:
+        click.echo('FTS5를 사용할 수 없어 ilike 검색을 사용합니다.')
+
+@model_cli.command('versions')
+def model_versions_command():
+    """서비스(endpoint)별 현재 모델 버전"""
+    from apps.dbmodels import Service
+    from apps.extensions import model_registry
+    for service in Service.query.filter(Service.service_endpoint.isnot(None)).order_by(Service.id):
+        if model_registry.serves(service.service_endpoint):
+            click.echo(f'{service.service_endpoint}: {model_registry.current_version(service.service_endpoint)}')
+
+@model_cli.command('set-version')
+@click.argument('endpoint')
+@click.argument('version')
+def set_model_version_command(endpoint, version):
+    """모델 버전 변경 (예: flask model set-version main.predict_iris 1.1), 실행 중인 워커는 다음 요청에서 적용"""
+    from apps.extensions import model_registry
+    try:
+        old_version = model_registry.switch_version(endpoint, version)
+    except (ValueError, LookupError) as e:
+        raise click.ClickException(str(e))
+    click.echo(f'{endpoint}: {old_version} -> {version}')
+
+@click.command('init-db')
+@with_appcontext
+def init_db_command():
+    """테이블과 검색 인덱스 생성 (배포 시 워커 시작 전에 한 번 실행)"""
+    from apps.bootstrap import init_db
+    init_db()
+    click.echo('데이터베이스 테이블을 준비했습니다.')
+
+@click.command('create-admin')
+@click.option('--username', default=None, help='관리자 아이디 (기본: ADMIN_USERNAME)')
+@click.option('--email', default=None, help='관리자 이메일 (기본: ADMIN_EMAIL)')
+@click.option('--password', default=None, help='관리자 비밀번호 (기본: ADMIN_PASSWORD)')
+@with_appcontext
+def create_admin_command(username, email, password):
+    """최초 관리자 계정 생성 (이미 있으면 그대로 둠)"""
+    from apps.bootstrap import create_admin
+    username = username or current_app.config.get('ADMIN_USERNAME')
+    email = email or current_app.config.get('ADMIN_EMAIL')
+    password = password or current_app.config.get('ADMIN_PASSWORD')
+    if not username or not password:
+        raise click.UsageError('ADMIN_USERNAME/ADMIN_PASSWORD 환경 변수 또는 --username/--password가 필요합니다.')
+    if create_admin(username, email, password):
+        click.echo(f"관리자 계정 '{username}' 이(가) 생성되었습니다.")
+    else:
+        click.echo(f"관리자 계정 '{username}'이(가) 이미 존재합니다.")
+
+@click.command('export-predictions')
+@click.option('--type', 'result_types', multiple=True, help='예측 유형 (iris, loan, 여러 번 지정 가능, 기본: 전체)')
+@click.option('--output', default=None, help='저장 디렉터리 (기본: PREDICTION_EXPORT_DIR)')
+@click.option('--format', 'export_format', type=click.Choice(['auto', 'parquet', 'csv']), default='auto',
+              help='parquet 또는 csv(.csv.gz), auto는 pyarrow가 있으면 parquet')
+@click.option('--chunk-size', default=None, type=int, help='한 번에 읽을 행 수 (기본: PREDICTION_EXPORT_CHUNK_SIZE)')
+@click.option('--full', is_flag=True, help='워터마크를 무시하고 전체를 내보냄 (기본: 마지막 내보내기 이후 행만)')
+@with_appcontext
+def export_predictions_command(result_types, output, export_format, chunk_size, full):
+    """재학습용 예측 결과(입력값, predicted_class, confirmed_class)를 유형별 파일로 내보냄"""
+    from apps.export import export_predictions, export_types
+    from apps.extensions import read_router
+    available = export_types()
+    for result_type in result_types:
+        if result_type not in available:
+            raise click.BadParameter(f"{', '.join(available)} 중 하나여야 합니다.", param_hint='--type')
+    output = output or current_app.config['PREDICTION_EXPORT_DIR']
+    chunk_size = chunk_size or current_app.config['PREDICTION_EXPORT_CHUNK_SIZE']
+    for result_type in result_types or available:
+        try:
+            result = export_predictions(result_type, output, export_format, chunk_size, incremental=not full,
+                                        bind=read_router.engine())   # 읽기 전용 연결 (없으면 기본 엔진)
+        except RuntimeError as e:
+            raise click.ClickException(str(e))
+        since = f" ({result['after'][0]:%Y-%m-%d %H:%M:%S} 이후)" if result['after'] else ''
+        if result['path']:
+            click.echo(f"{result_type}: {result['rows']}행{since} -> {result['path']}")
+        else:
+            click.echo(f"{result_type}: 내보낼 새 행이 없습니다{since}.")
+
+@click.command('check-query-plans')
+@with_appcontext
+def check_query_plans_command():
+    """주요 쿼리의 EXPLAIN QUERY PLAN 확인, 인덱스 없는 전체 스캔이 있으면 종료 코드 1"""
+    from apps.extensions import db
+    from apps.queryplans import check_query_plans
+    if db.engine.dialect.name != 'sqlite':
+        click.echo('EXPLAIN QUERY PLAN 검사는 SQLite에서만 지원합니다.')
+        return
+    failed = 0
+    for name, ok, plan in check_query_plans(db.session):
+        click.echo(f"[{'OK' if ok else 'FAIL'}] {name}")
+        for line in plan:
+            click.echo(f'    {line}')
+        failed += not ok
+    if failed:
+        raise click.ClickException(f'{failed}개 쿼리가 전체 테이블 스캔을 사용하거나 실행할 수 없습니다. (flask db upgrade 실행 여부 확인)')
+    click.echo('모든 쿼리가 인덱스를 사용합니다.')
@@ -6,6 +6,23 @@ if os.environ.get('RENDER', None) != 'true':
     BASE_DIR = os.path.abspath(os.path.dirname(__file__))
     dotenv_path = os.path.join(BASE_DIR, '..', '.env')
     load_dotenv(dotenv_path)
+
+def engine_options(uri):
+    """QueuePool 옵션은 QueuePool을 쓰는 URL에만 넣는다.
+    메모리 SQLite(sqlite://)는 StaticPool/SingletonThreadPool이라 pool_size 등을 주면 create_engine이 TypeError"""
+    from sqlalchemy.engine import make_url
+    options = {'pool_recycle': int(os.getenv('DB_POOL_RECYCLE', 3600))}
+    url = make_url(uri)
+    if url.get_backend_name() == 'sqlite' and (url.database in (None, '', ':memory:')
+                                               or url.query.get('mode') == 'memory'):
+        return options
+    options.update({
+        'pool_size': int(os.getenv('DB_POOL_SIZE', 5)),
+        'max_overflow': int(os.getenv('DB_MAX_OVERFLOW', 10)),
+        'pool_timeout': int(os.getenv('DB_POOL_TIMEOUT', 30)),
+    })
+    return options
+
 class Config:
     BASE_DIR = os.path.abspath(os.path.dirname(__file__))
     SECRET_KEY = os.getenv('SECRET_KEY')
@@ -14,7 +31,24 @@ class Config:
     INSTANCE_DIR = os.path.join(BASE_DIR, '..', 'instance')
     if not os.path.exists(INSTANCE_DIR):
         os.makedirs(INSTANCE_DIR)
-    SQLALCHEMY_DATABASE_URI = 'sqlite:///' + os.path.join(INSTANCE_DIR, 'mydb.sqlite3')
+    SQLALCHEMY_DATABASE_URI = os.getenv('DATABASE_URL', 'sqlite:///' + os.path.join(INSTANCE_DIR, 'mydb.sqlite3'))
+    # 커넥션 풀 (워커 프로세스마다 생성)
+    SQLALCHEMY_ENGINE_OPTIONS = engine_options(SQLALCHEMY_DATABASE_URI)
+    # 조회 화면(@read_only_db)용 읽기 전용 DB: 복제본 URI, 없으면 SQLite 파일을 mode=ro 연결로 연다
+    SQLALCHEMY_READ_DATABASE_URI = os.getenv('READ_DATABASE_URL')
+    DB_READ_ROUTING = os.getenv('DB_READ_ROUTING', 'true').lower() == 'true'
+    # SQLite 연결마다 적용할 PRAGMA (값을 None으로 두면 적용하지 않음)
+    # WAL: 쓰기 중에도 읽기가 막히지 않음, synchronous=NORMAL: WAL에서 안전하면서 commit당 fsync 감소
+    # busy_timeout: 다른 워커가 쓰는 중이면 즉시 'database is locked' 대신 최대 N ms 대기
+    SQLITE_PRAGMAS = {
+        'busy_timeout': int(os.getenv('SQLITE_BUSY_TIMEOUT', 5000)),
+        'journal_mode': os.getenv('SQLITE_JOURNAL_MODE', 'WAL'),
+        'synchronous': os.getenv('SQLITE_SYNCHRONOUS', 'NORMAL'),
+        'foreign_keys': 'ON',
+        'mmap_size': int(os.getenv('SQLITE_MMAP_SIZE', 256 * 1024 * 1024)),
+        'cache_size': int(os.getenv('SQLITE_CACHE_SIZE', -64000)),   # 음수: KiB 단위 (약 64MB)
+        'temp_store': 'MEMORY',
+    }
     SQLALCHEMY_TRACK_MODIFICATIONS = False
     # Flask-Login
     # REMEMBER_COOKIE_DURATION = 3600  # 1시간
@@ -24,6 +58,61 @@ class Config:
     ADMIN_USERNAME = os.getenv('ADMIN_USERNAME')    
     ADMIN_EMAIL = os.getenv('ADMIN_EMAIL')    
     ADMIN_PASSWORD = os.getenv('ADMIN_PASSWORD')
+    # AI 추론: 동시 요청을 모아 한 번에 예측하는 마이크로 배치 설정
+    IRIS_BATCH_MAX_SIZE = int(os.getenv('IRIS_BATCH_MAX_SIZE', 32))
+    IRIS_BATCH_MAX_WAIT_MS = float(os.getenv('IRIS_BATCH_MAX_WAIT_MS', 5))
+    IRIS_MODEL_VERSION = os.getenv('IRIS_MODEL_VERSION', '1.0')
+    # 대출 일괄 예측: 요청 1건당 최대 레코드 수
+    LOAN_BATCH_MAX_RECORDS = int(os.getenv('LOAN_BATCH_MAX_RECORDS', 10000))
+    LOAN_MODEL_VERSION = os.getenv('LOAN_MODEL_VERSION', '1.0')
+    # 예측 이력 API 한 페이지 최대 건수, 라벨 피드백 한 번에 반영할 최대 건수
+    PREDICTIONS_MAX_PAGE_SIZE = int(os.getenv('PREDICTIONS_MAX_PAGE_SIZE', 200))
+    PREDICTION_FEEDBACK_MAX_ITEMS = int(os.getenv('PREDICTION_FEEDBACK_MAX_ITEMS', 1000))
+    # 재학습용 예측 결과 내보내기 (flask export-predictions): 저장 위치, 한 번에 읽을 행 수
+    PREDICTION_EXPORT_DIR = os.getenv('PREDICTION_EXPORT_DIR', os.path.join(INSTANCE_DIR, 'exports'))
+    PREDICTION_EXPORT_CHUNK_SIZE = int(os.getenv('PREDICTION_EXPORT_CHUNK_SIZE', 50000))
+    # 모델 레지스트리: MODEL_DIR/<service_endpoint>/<model_version>.joblib, 처음 호출될 때 로딩
+    MODEL_DIR = os.getenv('MODEL_DIR', os.path.join(INSTANCE_DIR, 'models'))
+    MODEL_REGISTRY_MAX_MODELS = int(os.getenv('MODEL_REGISTRY_MAX_MODELS', 8))
+    MODEL_REGISTRY_MEMORY_MB = int(os.getenv('MODEL_REGISTRY_MEMORY_MB', 512))
+    MODEL_VERSIONS = {
+        'main.predict_iris': IRIS_MODEL_VERSION,
+        'main.predict_loan': LOAN_MODEL_VERSION,
+    }
+    # 예측 결과 캐시: 서비스별 최대 항목 수(0이면 사용 안 함), 유지 시간(초), 특징 값 반올림 자릿수
+    PREDICTION_CACHE_SIZE = int(os.getenv('PREDICTION_CACHE_SIZE', 10000))
+    PREDICTION_CACHE_TTL = int(os.getenv('PREDICTION_CACHE_TTL', 300))
+    PREDICTION_CACHE_ROUNDING = int(os.getenv('PREDICTION_CACHE_ROUNDING', 4))
+    # 로그인 사용자 캐시 (user_loader): 권한/상태 변경 commit 시 즉시 무효화
+    USER_CACHE_SIZE = int(os.getenv('USER_CACHE_SIZE', 10000))
+    USER_CACHE_TTL = int(os.getenv('USER_CACHE_TTL', 60))
+    # 관리자 대시보드 통계 캐시 시간(초)
+    ADMIN_STATS_TTL = int(os.getenv('ADMIN_STATS_TTL', 30))
+    # 요청 계측: 이 비율의 요청만 쿼리 수/SQL 시간/응답 시간 기록 (0이면 끔), Prometheus 수집용 토큰
+    METRICS_SAMPLE_RATE = float(os.getenv('METRICS_SAMPLE_RATE', 1.0))
+    METRICS_TOKEN = os.getenv('METRICS_TOKEN')
+    # 사용자/서비스/API 키 삭제: 자식 행이 이보다 많으면 백그라운드에서 청크 단위로 삭제
+    PURGE_BACKGROUND_THRESHOLD = int(os.getenv('PURGE_BACKGROUND_THRESHOLD', 10000))
+    PURGE_CHUNK_SIZE = int(os.getenv('PURGE_CHUNK_SIZE', 1000))
+    # 사용자별 구독 상태 캐시 (서비스 카탈로그 스냅샷은 commit 시점에 무효화)
+    SUBSCRIPTION_CACHE_SIZE = int(os.getenv('SUBSCRIPTION_CACHE_SIZE', 10000))
+    SUBSCRIPTION_CACHE_TTL = int(os.getenv('SUBSCRIPTION_CACHE_TTL', 300))
+    # 서비스 검색: SQLite FTS5 인덱스 사용 여부 (False 또는 다른 DB면 ilike 검색)
+    SERVICE_SEARCH_FTS = os.getenv('SERVICE_SEARCH_FTS', 'true') == 'true'
+    # 사용량 제한 (예: '60/minute', '300/hour'), 백엔드: memory(워커별) 또는 sqlite(워커 간 공유)
+    RATELIMIT_ENABLED = os.getenv('RATELIMIT_ENABLED', 'true') == 'true'
+    RATELIMIT_API_KEY = os.getenv('RATELIMIT_API_KEY', '60/minute')
+    RATELIMIT_USER = os.getenv('RATELIMIT_USER', '300/hour')
+    RATELIMIT_BACKEND = os.getenv('RATELIMIT_BACKEND', 'memory')
+    RATELIMIT_SQLITE_PATH = os.getenv('RATELIMIT_SQLITE_PATH', os.path.join(INSTANCE_DIR, 'ratelimit.sqlite3'))
+    # 사용자/API 키 일일·월간 사용량 한도 (daily_limit, monthly_limit) 적용 여부
+    QUOTA_ENABLED = os.getenv('QUOTA_ENABLED', 'true') == 'true'
+    # UsageLog 비동기 기록: batch_size건 또는 flush_interval초마다 한 번에 저장
+    USAGE_LOG_ASYNC = os.getenv('USAGE_LOG_ASYNC', 'true') == 'true'
+    USAGE_LOG_BATCH_SIZE = int(os.getenv('USAGE_LOG_BATCH_SIZE', 200))
+    USAGE_LOG_FLUSH_INTERVAL = float(os.getenv('USAGE_LOG_FLUSH_INTERVAL', 2.0))
+    USAGE_LOG_MAX_QUEUE = int(os.getenv('USAGE_LOG_MAX_QUEUE', 10000))
+    USAGE_LOG_MAX_DELAY = float(os.getenv('USAGE_LOG_MAX_DELAY', 10.0))
 
 
     
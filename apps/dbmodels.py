@@ -22,10 +22,12 @@ class User(db.Model, UserMixin):  # db.Model, UserMixin 상속하는 User 클래
     monthly_limit = db.Column(db.Integer, default=5000)
     created_at=db.Column(db.DateTime, default= datetime.now)
     updated_at=db.Column(db.DateTime, default= datetime.now, onupdate=datetime.now)
-    subscriptions = db.relationship('Subscription', backref='user', lazy=True, cascade='all, delete-orphan')
-    api_keys = db.relationship('APIKey', backref='user', lazy=True, cascade='all, delete-orphan')
-    usage_logs = db.relationship('UsageLog', backref='user', lazy=True, cascade='all, delete-orphan')
-    prediction_results = db.relationship('PredictionResult', backref='user', lazy=True, cascade="all, delete-orphan")
+    # 자식 행 삭제는 DB의 ON DELETE CASCADE에 맡김 (passive_deletes: 삭제 전에 자식 행을 로딩하지 않음)
+    # 기존 DB처럼 CASCADE 없이 만들어진 테이블도 있으므로 실제 삭제는 apps/purge.py를 사용한다
+    subscriptions = db.relationship('Subscription', backref='user', lazy=True, cascade='all, delete-orphan', passive_deletes=True)
+    api_keys = db.relationship('APIKey', backref='user', lazy=True, cascade='all, delete-orphan', passive_deletes=True)
+    usage_logs = db.relationship('UsageLog', backref='user', lazy=True, cascade='all, delete-orphan', passive_deletes=True)
+    prediction_results = db.relationship('PredictionResult', backref='user', lazy=True, cascade="all, delete-orphan", passive_deletes=True)
     @property
     def password(self):
         """
@@ -74,24 +76,26 @@ class Service(db.Model):
     created_at=db.Column(db.DateTime, default= datetime.now)
     updated_at=db.Column(db.DateTime, default= datetime.now, onupdate=datetime.now)
 
+    __table_args__ = (db.Index('ix_services_active_created', 'is_active', 'created_at'),)   # 활성 여부 필터 + 등록일 정렬
     # 관계
-    subscriptions = db.relationship('Subscription', backref='service', lazy=True, cascade="all, delete-orphan")
-    usage_logs = db.relationship('UsageLog', backref='service', lazy=True, cascade="all, delete-orphan")
-    prediction_results = db.relationship('PredictionResult', backref='service', lazy=True, cascade="all, delete-orphan")
+    subscriptions = db.relationship('Subscription', backref='service', lazy=True, cascade="all, delete-orphan", passive_deletes=True)
+    usage_logs = db.relationship('UsageLog', backref='service', lazy=True, cascade="all, delete-orphan", passive_deletes=True)
+    prediction_results = db.relationship('PredictionResult', backref='service', lazy=True, cascade="all, delete-orphan", passive_deletes=True)
 
     def __repr__(self) -> str:
         return f"<Service(name='{self.servicename}')>" # servicename으로 변경
 class Subscription(db.Model):
     __tablename__ = "subscriptions"
     id = db.Column(db.Integer, primary_key=True)
-    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
-    service_id = db.Column(db.Integer, db.ForeignKey('services.id'), nullable=False) 
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id', ondelete='CASCADE'), nullable=False)
+    service_id = db.Column(db.Integer, db.ForeignKey('services.id', ondelete='CASCADE'), nullable=False) 
     status = db.Column(db.String(20), default='pending', nullable=False) # pending, approved, rejected
     request_date = db.Column(db.DateTime, nullable=False, default=datetime.now)
     approval_date = db.Column(db.DateTime, nullable=True)
 
     # 한 사용자가 특정 서비스를 여러 번 구독 요청하지 못하도록 제약하는 방식
-    __table_args__ = (db.UniqueConstraint('user_id', 'service_id', name='_user_service_uc'),)
+    __table_args__ = (db.UniqueConstraint('user_id', 'service_id', name='_user_service_uc'),
+                      db.Index('ix_subscriptions_status_request_date', 'status', 'request_date'),)   # 관리자 상태별 목록
 
     def __repr__(self) -> str:
         return f"<Subscription(user_id={self.user_id}, service_id={self.service_id}, status='{self.status}')>"
@@ -100,15 +104,16 @@ class APIKey(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     key_string = db.Column(db.String(32), unique=True, nullable=False, default=lambda: str(uuid.uuid4()).replace('-', '')[:32])
     description = db.Column(db.String(100), nullable=True)
-    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id', ondelete='CASCADE'), nullable=False)
     is_active = db.Column(db.Boolean, default=True)
     created_at = db.Column(db.DateTime, default=datetime.now)
     last_used = db.Column(db.DateTime)
     usage_count = db.Column(db.Integer, default=0) # 이 API 키를 통한 총 사용 횟수
     daily_limit = db.Column(db.Integer, default=1000)
     monthly_limit = db.Column(db.Integer, default=5000)
-    usage_logs = db.relationship('UsageLog', backref='api_key', lazy=True, cascade="all, delete-orphan")
-    prediction_results = db.relationship('PredictionResult', backref='api_key', lazy=True, cascade="all, delete-orphan")
+    __table_args__ = (db.Index('ix_api_keys_user_created', 'user_id', 'created_at'),)   # 사용자별 키 목록
+    usage_logs = db.relationship('UsageLog', backref='api_key', lazy=True, cascade="all, delete-orphan", passive_deletes=True)
+    prediction_results = db.relationship('PredictionResult', backref='api_key', lazy=True, cascade="all, delete-orphan", passive_deletes=True)
     def __init__(self, user_id: int, description: str = None):
         self.user_id = user_id
         self.description = description
@@ -120,9 +125,9 @@ class APIKey(db.Model):
 class PredictionResult(db.Model):
     __tablename__ = 'prediction_results'
     id = db.Column(db.Integer, primary_key=True)
-    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False, index=True)
-    service_id = db.Column(db.Integer, db.ForeignKey('services.id'), nullable=False)
-    api_key_id = db.Column(db.Integer, db.ForeignKey('api_keys.id'), index=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id', ondelete='CASCADE'), nullable=False)   # 인덱스: __table_args__
+    service_id = db.Column(db.Integer, db.ForeignKey('services.id', ondelete='CASCADE'), nullable=False)
+    api_key_id = db.Column(db.Integer, db.ForeignKey('api_keys.id', ondelete='CASCADE'), index=True)
     predicted_class = db.Column(db.String(50))
     model_version = db.Column(db.String(20), default='1.0')
     confirmed_class = db.Column(db.String(50))
@@ -132,6 +137,7 @@ class PredictionResult(db.Model):
     # polymorphic_on과 polymorphic_identity를 사용한 싱글 테이블 상속(Single Table Inheritance) 구조
     # 이를 통해 IrisResult와 LoanResult 같은 특정 서비스의 예측 결과를 유연하게 확장,SQLAlchemy의 고급 기능
     type = db.Column(db.String(50))
+    __table_args__ = (db.Index('ix_prediction_results_user_created', 'user_id', 'created_at'),)   # 사용자별 예측 이력
     __mapper_args__ = {
         'polymorphic_on': type,
         'polymorphic_identity': 'prediction_result'
@@ -141,7 +147,7 @@ class PredictionResult(db.Model):
 # 이 예측 결과 기본 모델을 상속하여 각 서비스별 특수화 필드 추가
 class IrisResult(PredictionResult):
     __tablename__ = 'iris_results'
-    id = db.Column(db.Integer, db.ForeignKey('prediction_results.id'), primary_key=True)
+    id = db.Column(db.Integer, db.ForeignKey('prediction_results.id', ondelete='CASCADE'), primary_key=True)
     sepal_length = db.Column(db.Float, nullable=False)
     sepal_width = db.Column(db.Float, nullable=False)
     petal_length = db.Column(db.Float, nullable=False)
@@ -156,7 +162,7 @@ class IrisResult(PredictionResult):
                 f"petal_length={self.petal_length}, petal_width={self.petal_width}, predicted_class='{self.predicted_class}')>")
 class LoanResult(PredictionResult):
     __tablename__ = 'loan_results'
-    id = db.Column(db.Integer, db.ForeignKey('prediction_results.id'), primary_key=True)
+    id = db.Column(db.Integer, db.ForeignKey('prediction_results.id', ondelete='CASCADE'), primary_key=True)
     age = db.Column(db.Integer, nullable=False)
     balance = db.Column(db.Integer, nullable=False)
 
@@ -173,9 +179,9 @@ class UsageType(enum.Enum):
 class UsageLog(db.Model):
     __tablename__ = 'usage_logs'
     id = db.Column(db.Integer, primary_key=True)
-    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), index=True)
-    service_id = db.Column(db.Integer, db.ForeignKey('services.id'), nullable=False)
-    api_key_id = db.Column(db.Integer, db.ForeignKey('api_keys.id'), index=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id', ondelete='CASCADE'))      # 인덱스: __table_args__
+    service_id = db.Column(db.Integer, db.ForeignKey('services.id', ondelete='CASCADE'), nullable=False)
+    api_key_id = db.Column(db.Integer, db.ForeignKey('api_keys.id', ondelete='CASCADE'))
     endpoint = db.Column(db.String(120), nullable=False)
     usage_type = db.Column(db.Enum(UsageType), nullable=False)
     usage_count = db.Column(db.Integer, default=1, nullable=False) # 각 로그 항목은 기본적으로 1회 사용
@@ -185,5 +191,47 @@ class UsageLog(db.Model):
     remote_addr = db.Column(db.String(45))
     request_data_summary = db.Column(db.Text)
     response_status_code = db.Column(db.Integer)
+    # 조건 컬럼 + 정렬 컬럼 복합 인덱스 (단일 user_id/api_key_id 인덱스는 이 인덱스의 앞부분으로 대체)
+    __table_args__ = (
+        db.Index('ix_usage_logs_user_timestamp', 'user_id', 'timestamp'),                    # 사용량 기록/내보내기
+        db.Index('ix_usage_logs_key_endpoint_timestamp', 'api_key_id', 'endpoint', 'timestamp'),  # API 키별 사용량
+    )
     def __repr__(self) -> str:
         return f"<UsageLog(api_service_id={self.service_id}, usage_type='{self.usage_type}', timestamp={self.timestamp})>"
+# ----------- 사용량 롤업 (대시보드용 시간/일 단위 집계) -----------
+# usage_logs를 매번 합산하지 않도록 UsageLog 기록 시 (구간, 사용자, API 키, 서비스, 유형)별로 누적
+# user_id/api_key_id가 없으면 0으로 저장 (UNIQUE 제약에서 NULL은 서로 다른 값으로 취급되므로)
+class UsageRollupMixin:
+    id = db.Column(db.Integer, primary_key=True)
+    bucket = db.Column(db.DateTime, nullable=False)    # 구간 시작 시각 (시간 또는 일 단위)
+    user_id = db.Column(db.Integer, nullable=False, default=0)
+    api_key_id = db.Column(db.Integer, nullable=False, default=0)
+    service_id = db.Column(db.Integer, nullable=False)
+    usage_type = db.Column(db.Enum(UsageType), nullable=False)
+    usage_count = db.Column(db.Integer, default=0, nullable=False)
+class UsageRollupHourly(UsageRollupMixin, db.Model):
+    __tablename__ = 'usage_rollup_hourly'
+    __table_args__ = (
+        db.UniqueConstraint('bucket', 'user_id', 'api_key_id', 'service_id', 'usage_type', name='_usage_hourly_uc'),
+        db.Index('ix_usage_hourly_user_bucket', 'user_id', 'bucket'),
+    )
+    def __repr__(self) -> str:
+        return f"<UsageRollupHourly(bucket={self.bucket}, user_id={self.user_id}, usage_count={self.usage_count})>"
+class UsageRollupDaily(UsageRollupMixin, db.Model):
+    __tablename__ = 'usage_rollup_daily'
+    __table_args__ = (
+        db.UniqueConstraint('bucket', 'user_id', 'api_key_id', 'service_id', 'usage_type', name='_usage_daily_uc'),
+        db.Index('ix_usage_daily_user_bucket', 'user_id', 'bucket'),
+    )
+    def __repr__(self) -> str:
+        return f"<UsageRollupDaily(bucket={self.bucket}, user_id={self.user_id}, usage_count={self.usage_count})>"
+# 사용량 제한용 기간별 카운터: (주체 종류, 주체 id, 기간)당 한 행, UsageLog 저장과 같은 트랜잭션에서 UPSERT로 누적
+# principal_type: 'user' / 'api_key', period: 일 '2026-10-18' / 월 '2026-10'
+class UsageCounter(db.Model):
+    __tablename__ = 'usage_counters'
+    principal_type = db.Column(db.String(10), primary_key=True)
+    principal_id = db.Column(db.Integer, primary_key=True)
+    period = db.Column(db.String(10), primary_key=True)
+    count = db.Column(db.Integer, default=0, nullable=False)
+    def __repr__(self) -> str:
+        return f"<UsageCounter({self.principal_type}:{self.principal_id}, period={self.period}, count={self.count})>"
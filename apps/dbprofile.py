@@ -0,0 +1,34 @@
+# apps/dbprofile.py
+# SQLite 연결 설정: 새 연결마다 Config.SQLITE_PRAGMAS를 적용 (WAL, synchronous, busy_timeout, mmap 등)
+import logging
+import sqlite3
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+# 적용 순서: busy_timeout을 먼저 설정해야 journal_mode 변경 시 잠금 대기가 적용된다
+PRAGMA_ORDER = ('busy_timeout', 'journal_mode', 'synchronous', 'foreign_keys', 'mmap_size', 'cache_size', 'temp_store')
+
+class SQLiteProfile:
+    """
+    SQLAlchemy 엔진이 sqlite3 연결을 만들 때마다 PRAGMA를 실행한다 (모든 엔진 공통, 다른 DB는 무시).
+    읽기 전용 연결처럼 적용할 수 없는 PRAGMA는 건너뛴다.
+    """
+    def __init__(self, pragmas=None):
+        self.pragmas = dict(pragmas or {'foreign_keys': 'ON'})
+        if not event.contains(Engine, 'connect', self._on_connect):
+            event.listen(Engine, 'connect', self._on_connect)
+    def init_app(self, app):
+        self.pragmas = dict(app.config.get('SQLITE_PRAGMAS', self.pragmas))
+    def statements(self):
+        names = sorted(self.pragmas, key=lambda n: PRAGMA_ORDER.index(n) if n in PRAGMA_ORDER else len(PRAGMA_ORDER))
+        return [f'PRAGMA {name}={self.pragmas[name]}' for name in names if self.pragmas[name] is not None]
+    def _on_connect(self, dbapi_connection, connection_record):
+        if not isinstance(dbapi_connection, sqlite3.Connection):
+            return
+        cursor = dbapi_connection.cursor()
+        for statement in self.statements():
+            try:
+                cursor.execute(statement)
+            except sqlite3.DatabaseError as e:
+                logging.debug(f'{statement} 적용 실패: {e}')
+        cursor.close()
@@ -0,0 +1,72 @@
+# apps/dbrouting.py
+# 읽기 전용 라우팅: 조회 화면의 쿼리를 별도 읽기 전용 연결(또는 복제본 URI)로 보내 쓰기 경로와 분리
+import contextvars
+import os
+import threading
+from contextlib import contextmanager
+from functools import wraps
+from flask_sqlalchemy.session import Session
+from sqlalchemy import create_engine
+from sqlalchemy.engine import make_url
+
+_read_only = contextvars.ContextVar('read_only_db', default=False)
+
+def read_database_uri(config):
+    """SQLALCHEMY_READ_DATABASE_URI, 없으면 SQLite 파일을 읽기 전용(mode=ro)으로 여는 URI. 사용하지 않으면 None"""
+    if not config.get('DB_READ_ROUTING', True):
+        return None
+    if config.get('SQLALCHEMY_READ_DATABASE_URI'):
+        return config['SQLALCHEMY_READ_DATABASE_URI']
+    url = make_url(config['SQLALCHEMY_DATABASE_URI'])
+    if url.get_backend_name() != 'sqlite' or url.database in (None, '', ':memory:'):
+        return None
+    return f'sqlite:///file:{os.path.abspath(url.database)}?mode=ro&uri=true'
+
+class ReadRouter:
+    """읽기 전용 엔진을 워커 프로세스마다 지연 생성 (fork 이전에 만든 연결을 공유하지 않도록)"""
+    def __init__(self):
+        self.uri = None
+        self.options = {}
+        self._engine = None
+        self._pid = None
+        self._lock = threading.Lock()
+    def init_app(self, app):
+        self.uri = read_database_uri(app.config)
+        self.options = dict(app.config.get('SQLALCHEMY_ENGINE_OPTIONS', {}))
+        self._engine = None
+    def engine(self):
+        if self.uri is None:
+            return None
+        if self._engine is None or self._pid != os.getpid():
+            with self._lock:
+                if self._engine is None or self._pid != os.getpid():
+                    self._engine = create_engine(self.uri, **self.options)
+                    self._pid = os.getpid()
+        return self._engine
+
+class RoutingSession(Session):
+    """read_only() 안에서 실행되는 SELECT는 읽기 전용 엔진으로, flush와 INSERT/UPDATE/DELETE는 기본 엔진으로 보낸다."""
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if bind is None and _read_only.get() and not self._flushing and not getattr(clause, 'is_dml', False):
+            from apps.extensions import read_router
+            engine = read_router.engine()
+            if engine is not None:
+                return engine
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+@contextmanager
+def read_only():
+    """with read_only(): 블록 안의 조회를 읽기 전용 엔진으로 실행"""
+    token = _read_only.set(True)
+    try:
+        yield
+    finally:
+        _read_only.reset(token)
+
+def read_only_db(view):
+    """조회 전용 뷰 데코레이터 (템플릿 렌더링 중 지연 로딩 포함)"""
+    @wraps(view)
+    def decorated_function(*args, **kwargs):
+        with read_only():
+            return view(*args, **kwargs)
+    return decorated_function
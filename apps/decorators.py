@@ -3,11 +3,13 @@ from datetime import datetime, timedelta
 import functools
 import logging
 
-from flask import flash, jsonify, redirect, request, url_for
+from flask import current_app, flash, g, jsonify, make_response, redirect, request, url_for
 from flask_login import current_user
 
 from apps.config import Config
-from apps.dbmodels import User
+from apps.dbmodels import UsageType, User
+from apps.extensions import api_key_index, catalog, csrf, db, rate_limiter, usage_writer
+from apps.quota import release_quota, reserve_quota
 
 # 관리자 권한 확인 데코레이터
 # 추가
@@ -37,56 +39,121 @@ def superx_required(f):
             return redirect(url_for('main.index'))
         return f(*args, **kwargs)
     return decorated_function
+# API 인증: X-API-Key 헤더 또는 로그인 세션
+# g.user_id, g.api_key(APIKeyEntry 또는 None)를 설정, 뷰에는 @csrf.exempt를 함께 지정
+def api_auth_required(f):
+    @functools.wraps(f)
+    def decorated_function(*args, **kwargs):
+        key_string = request.headers.get('X-API-Key')
+        if key_string:
+            entry = api_key_index.lookup(key_string)   # 프로세스 내 인덱스 조회 (DB 조회 없음)
+            if entry is None:
+                return jsonify({"error": "유효하지 않은 API Key입니다."}), 401
+            g.api_key, g.user_id = entry, entry.user_id
+        elif current_user.is_authenticated:
+            if current_app.config.get('WTF_CSRF_ENABLED', True):
+                csrf.protect()   # 세션(쿠키) 인증은 CSRF 검사 유지
+            g.api_key, g.user_id = None, current_user.id
+        else:
+            return jsonify({"error": "API Key 또는 로그인이 필요합니다."}), 401
+        return f(*args, **kwargs)
+    return decorated_function
 
-"""
 # AI 사용량 제한 데코레이터
-def rate_limit(limit_config_key):
+# API Key 요청은 키별(RATELIMIT_API_KEY), 로그인 요청은 사용자별(RATELIMIT_USER)로 슬라이딩 윈도우 제한
+# usage_logs를 세지 않고 rate_limiter 백엔드(메모리 또는 공유 SQLite)의 카운터만 사용, @api_auth_required 아래에 지정
+def rate_limit(api_key_limit='RATELIMIT_API_KEY', user_limit='RATELIMIT_USER'):
     def decorator(f):
         @functools.wraps(f)
         def decorated_function(*args, **kwargs):
-            limit_str = getattr(Config, limit_config_key)
-            # 간단한 속도 제한 구현 (프로덕션에서는 Redis 등을 활용하는 것이 좋습니다)
-            # 현재는 UsageLog 테이블을 사용하여 카운트합니다.
-            # 이 로직은 실제 배포 시 성능 문제가 될 수 있으므로 주의가 필요합니다.
-            # Flask-Limiter와 같은 외부 라이브러리를 사용하는 것을 권장합니다.
-            # API Key 사용량 제한
-            if 'api_key_id' in kwargs and kwargs['api_key_id']:
-                api_key = APIKey.query.get(kwargs['api_key_id'])
-                if not api_key:
-                    logging.warning(f"Rate Limit: Invalid API Key ID {kwargs['api_key_id']}")
-                    return jsonify({"error": "Invalid API Key"}), 401
-                # 현재 분의 시작 시간 계산
-                now = datetime.now()
-                minute_ago = now - timedelta(minutes=1)
-                usage_count = UsageLog.query.filter(
-                    UsageLog.api_key_id == api_key.id,
-                    UsageLog.endpoint == request.path,
-                    UsageLog.timestamp >= minute_ago
-                ).count()
-                limit_value = int(limit_str.split('/')[0])
-                if usage_count >= limit_value:
-                    logging.warning(f"Rate Limit Exceeded for API Key {api_key.key_string}. Count: {usage_count}, Limit: {limit_value}")
-                    return jsonify({"error": "API Key usage limit exceeded. Please try again later."}), 429
-                # API Key 사용량 업데이트
-                api_key.usage_count += 1
-                api_key.last_used = now
-                db.session.commit() # 여기서 커밋하여 바로 반영
-            # 로그인 사용자 사용량 제한
+            if not current_app.config.get('RATELIMIT_ENABLED', True):
+                return f(*args, **kwargs)
+            api_key = g.get('api_key')
+            if api_key is not None:
+                key, limit_str = f'key:{api_key.key_id}:{request.endpoint}', current_app.config[api_key_limit]
             elif current_user.is_authenticated:
-                # 현재 시간의 시작 시간 (시간당)
-                now = datetime.now()
-                hour_ago = now - timedelta(hours=1)
-                usage_count = UsageLog.query.filter(
-                    UsageLog.user_id == current_user.id,
-                    UsageLog.endpoint == request.path,
-                    UsageLog.timestamp >= hour_ago
-                ).count()
-                limit_value = int(limit_str.split('/')[0])
-                if usage_count >= limit_value:
-                    logging.warning(f"Rate Limit Exceeded for User {current_user.email}. Count: {usage_count}, Limit: {limit_value}")
-                    flash('시간당 사용량 제한을 초과했습니다. 잠시 후 다시 시도해주세요.', 'warning')
-                    return redirect(url_for('iris.predict')) # 또는 에러 페이지로 리디렉션
+                key, limit_str = f'user:{current_user.id}:{request.endpoint}', current_app.config[user_limit]
+            else:
+                return f(*args, **kwargs)
+            allowed, limit, remaining, retry_after = rate_limiter.hit(key, limit_str)
+            if not allowed:
+                logging.warning(f"Rate Limit Exceeded for {key}. Limit: {limit_str}")
+                response = jsonify({"error": "사용량 제한을 초과했습니다. 잠시 후 다시 시도해주세요.",
+                                    "retry_after": retry_after})
+                response.status_code = 429
+                response.headers['Retry-After'] = str(retry_after)
+            else:
+                response = make_response(f(*args, **kwargs))
+            response.headers['X-RateLimit-Limit'] = str(limit)
+            response.headers['X-RateLimit-Remaining'] = str(remaining)
+            return response
+        return decorated_function
+    return decorator
+
+# 구독 확인 데코레이터: service_endpoint 서비스가 활성이고 호출한 사용자의 구독이 approved일 때만 실행
+# catalog의 서비스 스냅샷/사용자별 구독 상태 캐시만 사용 (요청마다 subscriptions 조회 없음), g.service 설정
+# @api_auth_required 아래에 지정
+def subscription_required(service_endpoint):
+    def decorator(f):
+        @functools.wraps(f)
+        def decorated_function(*args, **kwargs):
+            service = catalog.by_endpoint(service_endpoint)
+            if service is None:
+                return jsonify({"error": "서비스가 등록되어 있지 않습니다."}), 404
+            if not catalog.entitled(g.user_id, service.id):
+                message = "승인된 구독이 필요합니다." if service.is_active else "현재 사용할 수 없는 서비스입니다."
+                return jsonify({"error": message}), 403
+            g.service = service
             return f(*args, **kwargs)
         return decorated_function
     return decorator
-"""
\ No newline at end of file
+
+# 일일/월간 사용량 한도 데코레이터: API Key 요청은 키와 사용자 한도, 로그인 요청은 사용자 한도를 확인
+# 요청이 쓸 단위 수(amount(), 기본 1)를 조건부 UPSERT로 먼저 예약하므로 동시 요청/대량 배치도 한도를 넘지 못한다
+# 예약량은 track_usage가 UsageLog 이벤트와 함께 넘겨 실제 사용량으로 정산되고, 기록 전에 끝난 요청은 바로 반환된다
+# @api_auth_required 아래, @track_usage 위에 지정
+def enforce_quota(amount=None):
+    def decorator(f):
+        @functools.wraps(f)
+        def decorated_function(*args, **kwargs):
+            if not current_app.config.get('QUOTA_ENABLED', True):
+                return f(*args, **kwargs)
+            api_key = g.get('api_key')
+            if api_key is not None:
+                user_limits = (api_key.user_daily_limit, api_key.user_monthly_limit)
+            else:
+                user_limits = (current_user.daily_limit, current_user.monthly_limit)
+            requested, now = amount() if amount else 1, datetime.now()
+            exceeded = reserve_quota(db.engine, g.user_id, user_limits, api_key, requested, now)
+            if exceeded is not None:
+                logging.warning(f"Quota Exceeded for user {g.user_id}: {exceeded}")
+                return jsonify({"error": f"{exceeded['scope']} 사용량 한도({exceeded['limit']}회)를 초과했습니다.",
+                                "period": exceeded['period'], "limit": exceeded['limit'], "used": exceeded['used'],
+                                "requested": exceeded['requested']}), 429
+            g.quota_reserved = (requested, now)
+            try:
+                return f(*args, **kwargs)
+            finally:
+                reserved = g.pop('quota_reserved', None)   # track_usage가 가져가지 않았으면 (예외, 429, 기록 조건 불충족)
+                if reserved is not None:
+                    release_quota(db.engine, g.user_id, api_key and api_key.key_id, *reserved)
+        return decorated_function
+    return decorator
+
+# AI 사용량 기록 데코레이터: 응답 후 UsageLog 이벤트를 usage_writer 큐에 추가 (요청 스레드에서 commit 없음)
+# 뷰에서 g.service_id(필수), g.usage_count, g.usage_summary를 설정, @api_auth_required 아래에 지정
+def track_usage(f):
+    @functools.wraps(f)
+    def decorated_function(*args, **kwargs):
+        response = make_response(f(*args, **kwargs))
+        if g.get('service_id') is not None and g.get('user_id') is not None:
+            api_key = g.get('api_key')
+            usage_writer.record(
+                user_id=g.user_id, service_id=g.service_id, api_key_id=api_key and api_key.key_id,
+                endpoint=request.path, usage_type=UsageType.API_KEY if api_key else UsageType.WEB_UI,
+                usage_count=g.get('usage_count', 1) if response.status_code < 400 else 0,
+                remote_addr=request.remote_addr, request_data_summary=g.get('usage_summary'),
+                response_status_code=response.status_code, quota_reserved=g.pop('quota_reserved', None),
+            )
+        return response
+    return decorated_function
@@ -0,0 +1,143 @@
+# apps/export.py
+# 재학습용 예측 결과 내보내기: 유형별(iris, loan) 기본 테이블 + 입력값 테이블을 조인해 chunk_size행씩 pandas로 읽고
+# Parquet(pyarrow가 있으면) 또는 csv.gz로 저장. 증분 모드는 마지막으로 내보낸 (created_at, id) 이후 행만 내보낸다.
+import gzip
+import json
+import os
+from datetime import datetime
+from sqlalchemy import Boolean, DateTime, Float, Integer, select, tuple_
+
+BASE_COLUMNS = ['id', 'user_id', 'service_id', 'api_key_id', 'model_version', 'predicted_class',
+                'confirmed_class', 'confirm', 'created_at']
+
+def export_types():
+    """{polymorphic_identity: 하위 클래스} (예: {'iris': IrisResult, 'loan': LoanResult})"""
+    from apps.dbmodels import PredictionResult
+    return {m.polymorphic_identity: m.class_ for m in PredictionResult.__mapper__.self_and_descendants
+            if m.local_table is not PredictionResult.__table__}
+
+def parquet_available():
+    try:
+        import pyarrow  # noqa: F401
+        return True
+    except ImportError:
+        return False
+
+def export_statement(model, after=None):
+    """기본 컬럼 + 입력값 컬럼을 (created_at, id) 순으로 조회하는 SELECT (after=(created_at, id) 이후만)"""
+    from apps.dbmodels import PredictionResult
+    base = PredictionResult.__table__
+    features = [c for c in model.__table__.columns if c.key != 'id']
+    stmt = select(*[base.c[name] for name in BASE_COLUMNS], *features)\
+        .join_from(base, model.__table__, base.c.id == model.__table__.c.id)
+    if after is not None:
+        stmt = stmt.where(tuple_(base.c.created_at, base.c.id) > tuple_(*after))
+    return stmt.order_by(base.c.created_at, base.c.id)
+
+def _dtypes(stmt):
+    """SQL 타입 -> pandas dtype (청크마다 NULL 여부가 달라도 같은 스키마로 저장되도록 고정)"""
+    dtypes = {}
+    for column in stmt.selected_columns:
+        if isinstance(column.type, Boolean):
+            dtypes[column.key] = 'boolean'
+        elif isinstance(column.type, Integer):
+            dtypes[column.key] = 'Int64'
+        elif isinstance(column.type, Float):
+            dtypes[column.key] = 'float64'
+        elif isinstance(column.type, DateTime):
+            dtypes[column.key] = 'datetime64[ns]'
+        else:
+            dtypes[column.key] = 'string'
+    return dtypes
+
+class Watermark:
+    """유형별 마지막으로 내보낸 (created_at, id): <output_dir>/<type>.watermark.json"""
+    def __init__(self, output_dir, result_type):
+        self.path = os.path.join(output_dir, f'{result_type}.watermark.json')
+    def read(self):
+        try:
+            with open(self.path, encoding='utf-8') as f:
+                data = json.load(f)
+            return datetime.fromisoformat(data['created_at']), data['id']
+        except FileNotFoundError:
+            return None
+    def write(self, created_at, id_, path):
+        tmp = self.path + '.tmp'
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump({'created_at': created_at.isoformat(), 'id': id_, 'file': os.path.basename(path),
+                       'exported_at': datetime.now().isoformat(timespec='seconds')}, f)
+        os.replace(tmp, self.path)   # 파일 저장이 끝난 뒤에만 워터마크 갱신
+
+class ParquetSink:
+    def __init__(self, path):
+        self.path = path
+        self._writer = None
+    def write(self, df):
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+        table = pa.Table.from_pandas(df, preserve_index=False)
+        if self._writer is None:
+            self._writer = pq.ParquetWriter(self.path, table.schema, compression='snappy')
+        self._writer.write_table(table)   # 청크 하나 = row group 하나
+    def close(self):
+        if self._writer is not None:
+            self._writer.close()
+
+class CsvGzSink:
+    def __init__(self, path):
+        self.path = path
+        self._file = gzip.open(path, 'wt', encoding='utf-8', newline='')
+        self._header = True
+    def write(self, df):
+        df.to_csv(self._file, index=False, header=self._header, date_format='%Y-%m-%d %H:%M:%S.%f')
+        self._header = False
+    def close(self):
+        self._file.close()
+
+def export_predictions(result_type, output_dir, export_format='auto', chunk_size=50000, incremental=True, bind=None):
+    """
+    result_type(iris, loan) 예측 결과를 output_dir에 내보낸다. 반환: {'type', 'rows', 'path', 'after'}
+    내보낼 행이 없으면 파일을 만들지 않는다 (path=None).
+    """
+    import pandas as pd
+    from apps.extensions import db
+    model = export_types()[result_type]
+    if export_format == 'auto':
+        export_format = 'parquet' if parquet_available() else 'csv'
+    if export_format == 'parquet' and not parquet_available():
+        raise RuntimeError('Parquet로 내보내려면 pyarrow가 필요합니다. (--format csv 사용 가능)')
+    os.makedirs(output_dir, exist_ok=True)
+    watermark = Watermark(output_dir, result_type)
+    after = watermark.read() if incremental else None
+    stmt = export_statement(model, after)
+    dtypes = _dtypes(stmt)
+    suffix = 'parquet' if export_format == 'parquet' else 'csv.gz'
+    stamp, n = f'{datetime.now():%Y%m%d%H%M%S}', 1
+    path = os.path.join(output_dir, f'{result_type}_{stamp}.{suffix}')
+    while os.path.exists(path):   # 같은 초에 다시 실행해도 이전 파일을 덮어쓰지 않음
+        n += 1
+        path = os.path.join(output_dir, f'{result_type}_{stamp}_{n}.{suffix}')
+    rows, last, sink = 0, None, None
+    try:
+        with (bind or db.engine).connect() as conn:
+            conn = conn.execution_options(stream_results=True)   # 서버 측 커서로 chunk_size행씩 읽음
+            for chunk in pd.read_sql(stmt, conn, chunksize=chunk_size):
+                if chunk.empty:
+                    continue
+                chunk['created_at'] = pd.to_datetime(chunk['created_at'])
+                chunk = chunk.astype(dtypes)
+                if sink is None:
+                    sink = ParquetSink(path) if export_format == 'parquet' else CsvGzSink(path)
+                sink.write(chunk)
+                rows += len(chunk)
+                last = (chunk['created_at'].iloc[-1].to_pydatetime(), int(chunk['id'].iloc[-1]))
+    except Exception:
+        if sink is not None:   # 중간에 실패하면 일부만 쓴 파일은 지우고 워터마크는 그대로 둔다
+            sink.close()
+            os.remove(path)
+        raise
+    if sink is None:
+        return {'type': result_type, 'rows': 0, 'path': None, 'after': after}
+    sink.close()
+    watermark.write(*last, path)
+    return {'type': result_type, 'rows': rows, 'path': path, 'after': after}
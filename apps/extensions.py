@@ -3,11 +3,38 @@ from flask_sqlalchemy import SQLAlchemy
 from flask_migrate import Migrate
 from flask_login import LoginManager
 from flask_wtf import CSRFProtect
+from .inference import MicroBatcher, load_iris_model, load_loan_model, predict_iris_batch
+from .registry import ModelRegistry
+from .caches import PredictionCache
+from .apikeys import APIKeyIndex
+from .ratelimit import RateLimiter
+from .usage import UsageLogWriter
+from .catalog import ServiceCatalog
+from .identity import IdentityCache
+from .purge import PurgeJobs
+from .dbprofile import SQLiteProfile
+from .dbrouting import ReadRouter, RoutingSession
+from .metrics import RequestMetrics
 
 
-db = SQLAlchemy()
+db = SQLAlchemy(session_options={'class_': RoutingSession})   # read_only() 안의 조회는 읽기 전용 엔진으로
 migrate = Migrate()
 login_manager = LoginManager()
 csrf=CSRFProtect()
+model_registry = ModelRegistry()   # 서비스별 모델 지연 로딩 + LRU
+model_registry.register('main.predict_iris', load_iris_model)
+model_registry.register('main.predict_loan', load_loan_model)
+iris_batcher = MicroBatcher(predict_iris_batch)   # 붓꽃 예측 마이크로 배치
+prediction_cache = PredictionCache()   # 같은 특징 값 재예측 방지 (TTL + LRU)
+model_registry.on_version_change(prediction_cache.invalidate)   # 모델 버전 변경 시 캐시 무효화
+api_key_index = APIKeyIndex()   # X-API-Key 인증용 활성 키 인덱스
+rate_limiter = RateLimiter()    # API Key/사용자별 슬라이딩 윈도우 사용량 제한
+usage_writer = UsageLogWriter() # UsageLog 비동기 일괄 기록
+catalog = ServiceCatalog()      # 서비스 카탈로그 스냅샷 + 사용자별 구독 상태 캐시
+user_cache = IdentityCache()    # Flask-Login user_loader 사용자 캐시
+purge_jobs = PurgeJobs()        # 사용자/서비스/API 키 삭제 (대량이면 백그라운드 청크 삭제)
+sqlite_profile = SQLiteProfile()   # SQLite 연결마다 PRAGMA 적용 (WAL, busy_timeout, foreign_keys 등)
+read_router = ReadRouter()      # 조회 화면용 읽기 전용 엔진 (SQLite mode=ro 또는 복제본 URI)
+request_metrics = RequestMetrics()   # 엔드포인트별 쿼리 수/SQL 시간/응답 시간/응답 크기 히스토그램
 login_manager.login_view = 'auth.login'
 login_manager.login_message = 'login should be required'
\ No newline at end of file
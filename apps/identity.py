@@ -0,0 +1,68 @@
+# apps/identity.py
+# Flask-Login user_loader용 사용자 캐시: 요청마다 users 테이블을 조회하지 않도록 짧은 TTL로 보관
+import os
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import make_transient_to_detached
+from apps.caches import SharedStamp, TTLCache
+
+class IdentityCache:
+    """
+    user_id -> User 컬럼 값을 TTL 동안 캐시하고, 요청마다 session.merge(load=False)로 세션에 붙인다 (SQL 없음).
+    권한/상태/인증 정보(WATCHED)가 바뀐 User가 commit되거나 삭제되면 즉시 무효화되어
+    비활성화/권한 변경이 다음 요청부터 바로 적용된다.
+    조회한 트랜잭션이 시작된 뒤 무효화되었으면 조회 결과를 캐시에 넣지 않는다 (TTLCache.generation).
+    """
+    WATCHED = ('username', 'email', 'password_hash', 'is_admin', 'is_active', 'daily_limit', 'monthly_limit')
+    def __init__(self):
+        self._cache = TTLCache(maxsize=10000, ttl=60)
+        self._stamp = None
+        self._session = None
+    def init_app(self, app, session):
+        self._cache = TTLCache(app.config.get('USER_CACHE_SIZE', 10000), app.config.get('USER_CACHE_TTL', 60))
+        self._stamp = SharedStamp(os.path.join(app.config['INSTANCE_DIR'], 'users.stamp'))
+        self._session = session
+        if not event.contains(session, 'after_flush', self._after_flush):
+            event.listen(session, 'after_flush', self._after_flush)
+            event.listen(session, 'after_commit', self._after_commit)
+            event.listen(session, 'after_rollback', self._after_rollback)
+            event.listen(session, 'after_begin', self._after_begin)
+    def _after_flush(self, session, flush_context):
+        from apps.dbmodels import User
+        changed = session.info.setdefault('users_changed', set())
+        for obj in session.deleted:
+            if isinstance(obj, User):
+                changed.add(obj.id)
+        for obj in session.dirty:
+            if isinstance(obj, User):
+                attrs = inspect(obj).attrs
+                if any(attrs[name].history.has_changes() for name in self.WATCHED):
+                    changed.add(obj.id)
+    def _after_commit(self, session):
+        if session.info.pop('users_changed', None):
+            self.invalidate()
+    def _after_rollback(self, session):
+        session.info.pop('users_changed', None)
+    def _after_begin(self, session, transaction, connection):
+        session.info['users_generation'] = self._cache.generation   # 트랜잭션 시작 시점의 캐시 세대
+    def load(self, user_id):
+        """캐시된 값으로 User를 만들어 현재 세션에 연결 (캐시에 없으면 1회 조회)"""
+        from apps.dbmodels import User
+        if self._stamp is not None and self._stamp.changed():
+            self._cache.clear()
+        values = self._cache.get(user_id)
+        if values is None:
+            session = self._session()
+            generation = session.info.get('users_generation', self._cache.generation) \
+                if session.in_transaction() else self._cache.generation
+            user = session.get(User, user_id)
+            if user is not None:
+                self._cache.set(user_id, {c.key: getattr(user, c.key) for c in User.__table__.columns},
+                                generation=generation)
+            return user
+        user = User(**values)
+        make_transient_to_detached(user)   # 방금 조회한 것과 같은 상태로 표시
+        return self._session.merge(user, load=False)
+    def invalidate(self):
+        self._cache.clear()
+        if self._stamp is not None:
+            self._stamp.bump()
@@ -0,0 +1,124 @@
+# apps/inference.py
+# AI 모델 추론 모듈: 모델 로딩 및 마이크로 배치(micro-batching) 처리
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future
+
+IRIS_LABELS = ['setosa', 'versicolor', 'virginica']
+IRIS_FEATURES = ['sepal_length', 'sepal_width', 'petal_length', 'petal_width']
+LOAN_LABELS = ['rejected', 'approved']
+LOAN_FEATURES = ['age', 'balance']
+LOAN_VALUE_MAX = 2**31 - 1   # age/balance 허용 최댓값 (정수 컬럼 범위)
+
+def load_iris_model():
+    """scikit-learn 내장 iris 데이터셋으로 분류기를 학습하여 반환 (모델 파일이 없을 때의 기본 로더)"""
+    from sklearn.datasets import load_iris  # 무거운 의존성은 필요할 때 import
+    from sklearn.linear_model import LogisticRegression
+    X, y = load_iris(return_X_y=True)
+    return LogisticRegression(max_iter=500).fit(X, y)
+
+def predict_iris_batch(rows):
+    """iris 특징 벡터 목록을 한 번의 벡터화 호출로 분류하여 (레이블, 모델 버전) 목록 반환"""
+    import numpy as np
+    from apps.extensions import model_registry
+    version = model_registry.current_version('main.predict_iris')
+    X = np.asarray(rows, dtype=float).reshape(-1, len(IRIS_FEATURES))
+    return [(IRIS_LABELS[int(i)], version) for i in model_registry.get('main.predict_iris', version).predict(X)]
+
+class LoanBaselineModel:
+    """
+    대출 승인 기준 모델: 나이/잔고에 대한 로지스틱 점수를 numpy로 한 번에 계산한다.
+    학습된 모델이 준비되기 전까지 사용하는 기본값이며 predict(X) 인터페이스는 scikit-learn과 같다.
+    """
+    coef = (0.02, 0.0008)   # (age, balance) 가중치
+    intercept = -2.0
+    min_age, max_age = 19, 70
+    def predict_proba(self, X):
+        import numpy as np
+        X = np.asarray(X, dtype=float)
+        z = self.intercept + X @ np.asarray(self.coef)
+        p = 1.0 / (1.0 + np.exp(-z))
+        p = np.where((X[:, 0] < self.min_age) | (X[:, 0] > self.max_age), 0.0, p)
+        return np.column_stack([1.0 - p, p])
+    def predict(self, X):
+        return (self.predict_proba(X)[:, 1] >= 0.5).astype(int)
+
+def load_loan_model():
+    return LoanBaselineModel()
+
+def predict_loan_frame(df, version=None):
+    """age/balance 컬럼을 가진 DataFrame 전체를 한 번의 벡터화 호출로 예측하여 레이블 배열 반환"""
+    import numpy as np
+    from apps.extensions import model_registry
+    labels = np.asarray(LOAN_LABELS)
+    model = model_registry.get('main.predict_loan', version)
+    return labels[np.asarray(model.predict(df[LOAN_FEATURES].to_numpy(dtype=float)), dtype=int)]
+
+class MicroBatcher:
+    """
+    동시에 들어온 예측 요청을 작은 배치로 모아 predict_fn을 한 번만 호출한다.
+    배치는 max_batch_size개가 모이거나 첫 요청 후 max_wait_ms가 지나면 처리된다.
+    """
+    def __init__(self, predict_fn, max_batch_size=32, max_wait_ms=5):
+        self.predict_fn = predict_fn
+        self.max_batch_size = max_batch_size
+        self.max_wait_ms = max_wait_ms
+        self._queue = queue.Queue()
+        self._lock = threading.Lock()
+        self._worker = None
+        self._pid = None
+    def init_app(self, app, prefix):
+        # 예: prefix='IRIS_BATCH' -> IRIS_BATCH_MAX_SIZE, IRIS_BATCH_MAX_WAIT_MS
+        self.max_batch_size = app.config.get(f'{prefix}_MAX_SIZE', self.max_batch_size)
+        self.max_wait_ms = app.config.get(f'{prefix}_MAX_WAIT_MS', self.max_wait_ms)
+    def _ensure_worker(self):
+        # gunicorn fork 이후에는 스레드가 복사되지 않으므로 프로세스마다 새로 시작
+        if self._worker is not None and self._pid == os.getpid() and self._worker.is_alive():
+            return
+        with self._lock:
+            if self._worker is None or self._pid != os.getpid() or not self._worker.is_alive():
+                self._queue = queue.Queue()
+                self._pid = os.getpid()
+                self._worker = threading.Thread(target=self._run, name='micro-batcher', daemon=True)
+                self._worker.start()
+    def submit(self, features):
+        """특징 벡터 하나를 큐에 넣고 결과를 받을 Future를 반환"""
+        self._ensure_worker()
+        future = Future()
+        self._queue.put((features, future))
+        return future
+    def predict(self, features, timeout=10):
+        return self.submit(features).result(timeout=timeout)
+    def _collect(self):
+        batch = [self._queue.get()]  # 첫 요청이 올 때까지 대기
+        deadline = time.monotonic() + self.max_wait_ms / 1000.0
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self._queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+    def _run(self):
+        while True:
+            batch = self._collect()
+            futures = [future for _, future in batch]
+            try:
+                results = self.predict_fn([features for features, _ in batch])
+            except Exception as e:
+                if len(batch) == 1:
+                    futures[0].set_exception(e)
+                    continue
+                # 잘못된 입력 하나 때문에 같은 배치의 다른 요청까지 실패하지 않도록 한 건씩 다시 예측
+                for features, future in batch:
+                    try:
+                        future.set_result(self.predict_fn([features])[0])
+                    except Exception as single_error:
+                        future.set_exception(single_error)
+                continue
+            for future, result in zip(futures, results):
+                future.set_result(result)
@@ -1,11 +1,18 @@
 # apps/main/views.py
-
-from flask import flash, redirect, render_template, request, url_for
+import math
+from flask import abort, current_app, flash, g, jsonify, redirect, render_template, request, url_for
 from flask_login import current_user
-from sqlalchemy import and_, or_
+from sqlalchemy import case, insert, inspect as sa_inspect, select, update
+from sqlalchemy.orm import selectin_polymorphic
 #from flask_login import login_required, current_user
-from apps.dbmodels import Service, Subscription
+from apps.dbmodels import IrisResult, LoanResult, PredictionResult, Service, Subscription
+from apps.dbrouting import read_only_db
+from apps.decorators import api_auth_required, enforce_quota, rate_limit, subscription_required, track_usage
+from apps.extensions import catalog, csrf, iris_batcher, model_registry, prediction_cache
+from apps.inference import IRIS_FEATURES, IRIS_LABELS, LOAN_FEATURES, LOAN_LABELS, LOAN_VALUE_MAX, predict_loan_frame
 from apps.main import main
+from apps.pagination import decode_cursor, keyset_page
+from apps.search import search_services
 from apps import db
 from datetime import datetime
 
@@ -19,34 +26,28 @@ def services():
     query = request.args.get('query', '')
     if query:
         # 키워드 또는 서비스 이름으로 검색
-        search_results = Service.query.filter( 
-            and_(
-                Service.is_active == True,  # Add this line to filter by active services
-                or_(
-                    Service.servicename.ilike(f'%{query}%'), Service.description.ilike(f'%{query}%'),
-                    Service.keywords.ilike(f'%{query}%')
-                )
-            )
-        ).all()
+        # FTS5 인덱스가 있으면 관련도 순, 없으면 ilike 부분 문자열 검색
+        search_results = search_services(Service.query.filter(Service.is_active == True), query).all()
         title = f"'{query}' 검색 결과"
-    else:    # When no query, only show active services
-        search_results = Service.query.filter_by(is_active=True).all()
+    else:    # When no query, only show active services (캐시된 카탈로그 스냅샷, DB 조회 없음)
+        search_results = catalog.services()
         title = "모든 AI 서비스"
-    if current_user.is_authenticated:     # 각 서비스별 구독 상태 확인
-        user_subscriptions = {sub.service_id: sub.status for sub in current_user.subscriptions}
+    if current_user.is_authenticated:     # 각 서비스별 구독 상태 확인 (사용자별 캐시)
+        user_subscriptions = catalog.subscription_statuses(current_user.id)
     else:
         user_subscriptions = {}
     return render_template('main/services.html', services=search_results, query=query, title=title, user_subscriptions=user_subscriptions)
 # 추가된 부분 2
 @main.route('/service/<int:service_id>', methods=['GET', 'POST'])
 def service_detail(service_id):
-    service = Service.query.get_or_404(service_id)
+    service = catalog.get(service_id)   # 카탈로그 스냅샷에서 조회
+    if service is None:
+        abort(404)
     subscription_status = None
     service_endpoint=None
     if current_user.is_authenticated:
-        subscription = Subscription.query.filter_by(user_id=current_user.id, service_id=service.id).first()
-        if subscription:
-            subscription_status = subscription.status
+        subscription_status = catalog.subscription_statuses(current_user.id).get(service.id)
+        if subscription_status:
             # servie_endpoint 추가
             if service.service_endpoint:
                 service_endpoint = url_for(service.service_endpoint)    # /api/predict/iris
@@ -84,10 +85,194 @@ def service_detail(service_id):
     return render_template('main/service_detail.html', title=service.servicename, service=service, subscription_status=subscription_status, service_endpoint=service_endpoint)
 # 추가된 부분 3
 @main.route('/api/predict/iris', methods=['GET', 'POST'])
+@csrf.exempt   # JSON 모드는 api_auth_required에서 인증 방식에 따라 CSRF 검사
 def predict_iris():
+    if request.method == 'POST' and request.is_json:   # JSON POST: 실제 모델로 예측
+        return predict_iris_json()
     return render_template('main/predict_iris.html', title='붓꽃 서비스')
+@api_auth_required
+@subscription_required('main.predict_iris')
+@enforce_quota()
+@rate_limit()
+@track_usage
+def predict_iris_json():
+    data = request.get_json(silent=True) or {}
+    try:
+        features = [float(data[name]) for name in IRIS_FEATURES]
+    except (KeyError, TypeError, ValueError):
+        return jsonify({"error": f"숫자 입력값이 필요합니다: {', '.join(IRIS_FEATURES)}"}), 400
+    if not all(math.isfinite(value) for value in features):   # NaN/Infinity는 배치에 넣기 전에 거부
+        return jsonify({"error": f"유한한 숫자 입력값이 필요합니다: {', '.join(IRIS_FEATURES)}"}), 400
+    service = g.service   # subscription_required에서 확인한 카탈로그 스냅샷
+    g.service_id = service.id
+    g.usage_summary = ', '.join(f'{name}={value}' for name, value in zip(IRIS_FEATURES, features))
+    # 동시에 들어온 요청들과 함께 마이크로 배치로 예측
+    model_version = model_registry.current_version('main.predict_iris')
+    predicted_class = prediction_cache.get('main.predict_iris', model_version, features)
+    if predicted_class is None:
+        try:
+            predicted_class, model_version = iris_batcher.predict(features)
+        except LookupError as e:   # 레지스트리에 모델이 없는 경우
+            return jsonify({"error": str(e)}), 503
+        prediction_cache.set('main.predict_iris', model_version, features, predicted_class)
+    result = IrisResult(
+        user_id=g.user_id, service_id=service.id, api_key_id=g.api_key and g.api_key.key_id,
+        predicted_class=predicted_class, model_version=model_version, **dict(zip(IRIS_FEATURES, features))
+    )
+    db.session.add(result)
+    db.session.commit()
+    return jsonify({"id": result.id, "predicted_class": predicted_class, "model_version": model_version})
 # 추가된 부분 4
 @main.route('/api/predict/loan', methods=['GET', 'POST'])
 def predict_loan():
     return render_template('main/predict_loan.html', title='대출 서비스')
 
+def loan_batch_records():
+    data = request.get_json(silent=True)
+    return data.get('records') if isinstance(data, dict) else data
+def loan_batch_amount():
+    """사용량 한도에서 예약할 단위 수 = 레코드 수 (형식이 틀리거나 너무 많으면 뷰에서 거절되므로 1)"""
+    records = loan_batch_records()
+    if isinstance(records, list) and 0 < len(records) <= current_app.config['LOAN_BATCH_MAX_RECORDS']:
+        return len(records)
+    return 1
+# 대출 일괄 예측: [{age, balance}, ...] 를 한 번에 예측하고 bulk insert로 저장
+@main.route('/api/predict/loan/batch', methods=['POST'])
+@csrf.exempt
+@api_auth_required
+@subscription_required('main.predict_loan')
+@enforce_quota(amount=loan_batch_amount)
+@rate_limit()
+@track_usage
+def predict_loan_batch():
+    import numpy as np
+    import pandas as pd
+    records = loan_batch_records()
+    if not isinstance(records, list) or not records:
+        return jsonify({"error": "records 배열이 필요합니다."}), 400
+    max_records = current_app.config['LOAN_BATCH_MAX_RECORDS']
+    if len(records) > max_records:
+        return jsonify({"error": f"한 번에 최대 {max_records}건까지 요청할 수 있습니다."}), 413
+    if not all(isinstance(record, dict) for record in records):
+        return jsonify({"error": "각 레코드는 {age, balance} 객체여야 합니다."}), 400
+    df = pd.DataFrame.from_records(records).reindex(columns=LOAN_FEATURES)
+    # 정수 컬럼에 저장하므로 true/false, NaN/Infinity, 소수, 범위 밖 값은 캐스팅 전에 거부 (잘림/오버플로 방지)
+    is_bool = df.map(lambda value: isinstance(value, bool)).any(axis=1)
+    df = df.apply(pd.to_numeric, errors='coerce').astype(float)
+    valid = np.isfinite(df).all(axis=1) & (df % 1 == 0).all(axis=1) \
+        & ((df >= 0) & (df <= LOAN_VALUE_MAX)).all(axis=1) & ~is_bool
+    invalid = df.index[~valid].tolist()
+    if invalid:
+        return jsonify({"error": f"age, balance는 0 이상 {LOAN_VALUE_MAX} 이하의 정수여야 합니다.",
+                        "invalid_rows": invalid[:100]}), 400
+    service = g.service
+    g.service_id, g.usage_count = service.id, len(df)
+    g.usage_summary = f'records={len(df)}'
+    df = df.astype(int)
+    model_version = model_registry.current_version('main.predict_loan')
+    # 캐시에 없는 (age, balance) 조합만 모아서 한 번에 예측
+    features = df[LOAN_FEATURES].itertuples(index=False, name=None)
+    cached = [prediction_cache.get('main.predict_loan', model_version, row) for row in features]
+    df['predicted_class'] = cached
+    missing = df['predicted_class'].isna()
+    if missing.any():
+        try:
+            df.loc[missing, 'predicted_class'] = predict_loan_frame(df[missing], model_version)
+        except LookupError as e:
+            return jsonify({"error": str(e)}), 503
+        for row in df.loc[missing, LOAN_FEATURES + ['predicted_class']].itertuples(index=False, name=None):
+            prediction_cache.set('main.predict_loan', model_version, row[:-1], row[-1])
+    now = datetime.now()
+    rows = df.assign(user_id=g.user_id, service_id=service.id, api_key_id=g.api_key and g.api_key.key_id,
+                     model_version=model_version, created_at=now).to_dict('records')
+    # ORM bulk insert: prediction_results / loan_results 두 테이블에 한 번에 저장 (객체 생성 없음)
+    ids = db.session.execute(
+        insert(LoanResult).returning(LoanResult.id, sort_by_parameter_order=True), rows
+    ).scalars().all()
+    db.session.commit()
+    df['id'] = ids
+    return jsonify({
+        "count": len(ids),
+        "model_version": model_version,
+        "results": df[['id'] + LOAN_FEATURES + ['predicted_class']].to_dict('records'),
+    })
+
+# 예측 이력: 기본 테이블을 (created_at, id) 키셋으로 한 페이지 조회한 뒤
+# selectin_polymorphic으로 iris_results / loan_results를 유형별 IN 조회 한 번씩 로딩 (행마다 지연 로딩 없음)
+PREDICTION_TYPES = {'iris': IrisResult, 'loan': LoanResult}
+PREDICTION_LABELS = {'iris': IRIS_LABELS, 'loan': LOAN_LABELS}   # 유형별 confirmed_class 허용 값
+
+def prediction_to_dict(result):
+    data = {'id': result.id, 'type': result.type, 'service_id': result.service_id, 'api_key_id': result.api_key_id,
+            'predicted_class': result.predicted_class, 'model_version': result.model_version,
+            'confirm': bool(result.confirm), 'confirmed_class': result.confirmed_class,
+            'created_at': result.created_at.isoformat() if result.created_at else None}
+    local_table = sa_inspect(result).mapper.local_table
+    if local_table is not PredictionResult.__table__:   # 하위 유형의 입력값 (sepal_length, age, ...)
+        data['features'] = {c.key: getattr(result, c.key) for c in local_table.columns if c.key != 'id'}
+    return data
+
+@main.route('/api/predictions', methods=['GET'])
+@api_auth_required
+@read_only_db
+def prediction_history():
+    cursor = request.args.get('cursor')
+    if cursor and decode_cursor(cursor) is None:
+        return jsonify({"error": "잘못된 cursor 값입니다."}), 400
+    per_page = min(max(request.args.get('limit', 50, type=int), 1), current_app.config['PREDICTIONS_MAX_PAGE_SIZE'])
+    query = PredictionResult.query.options(selectin_polymorphic(PredictionResult, list(PREDICTION_TYPES.values())))\
+                                  .filter(PredictionResult.user_id == g.user_id)
+    result_type = request.args.get('type')
+    if result_type:
+        if result_type not in PREDICTION_TYPES:
+            return jsonify({"error": f"type은 {', '.join(PREDICTION_TYPES)} 중 하나여야 합니다."}), 400
+        query = query.filter(PredictionResult.type == result_type)
+    page = keyset_page(query, PredictionResult.created_at, PredictionResult.id, cursor, per_page)
+    return jsonify({"results": [prediction_to_dict(result) for result in page.items], "next_cursor": page.next_cursor})
+
+# 라벨 피드백 일괄 반영: {"items": [{"id": 1, "confirmed_class": "setosa"}, {"id": 2, "confirm": true}, {"id": 3, "confirm": false}]}
+# confirmed_class 지정 -> 그 값으로 확정, confirm=true -> 예측 값으로 확정, confirm=false -> 확정 취소
+# CASE id WHEN ... 로 한 번의 UPDATE, 호출한 사용자의 행만 변경
+@main.route('/api/predictions/feedback', methods=['POST'])
+@csrf.exempt
+@api_auth_required
+def prediction_feedback():
+    data = request.get_json(silent=True)
+    items = data.get('items') if isinstance(data, dict) else None
+    if not isinstance(items, list) or not items:
+        return jsonify({"error": "items 배열이 필요합니다."}), 400
+    max_items = current_app.config['PREDICTION_FEEDBACK_MAX_ITEMS']
+    if len(items) > max_items:
+        return jsonify({"error": f"한 번에 최대 {max_items}건까지 요청할 수 있습니다."}), 413
+    table = PredictionResult.__table__
+    confirms, classes = {}, {}
+    for item in items:
+        # bool은 int의 하위 클래스이므로 먼저 거른다 (true가 id 1로 처리되지 않도록)
+        if not isinstance(item, dict) or isinstance(item.get('id'), bool) or not isinstance(item.get('id'), int):
+            return jsonify({"error": "각 항목에 정수 id가 필요합니다."}), 400
+        confirmed_class = item.get('confirmed_class')
+        if confirmed_class is not None:
+            if not isinstance(confirmed_class, str) or not 0 < len(confirmed_class) <= 50:
+                return jsonify({"error": "confirmed_class는 50자 이하 문자열이어야 합니다.", "id": item['id']}), 400
+            confirms[item['id']], classes[item['id']] = True, confirmed_class
+        elif isinstance(item.get('confirm'), bool):
+            confirms[item['id']] = item['confirm']
+            classes[item['id']] = table.c.predicted_class if item['confirm'] else None
+        else:
+            return jsonify({"error": "confirmed_class 또는 confirm(true/false)이 필요합니다.", "id": item['id']}), 400
+    labeled = [id_ for id_, value in classes.items() if isinstance(value, str)]
+    if labeled:
+        # 행의 유형(iris/loan)에 맞는 레이블인지 확인: 본인 행의 (id, type)만 한 번에 조회
+        types = dict(db.session.execute(
+            select(table.c.id, table.c.type).where(table.c.user_id == g.user_id, table.c.id.in_(labeled))
+        ).all())
+        invalid = [id_ for id_ in labeled if id_ in types and classes[id_] not in PREDICTION_LABELS.get(types[id_], ())]
+        if invalid:
+            return jsonify({"error": "confirmed_class가 예측 유형의 레이블이 아닙니다.", "invalid_ids": invalid,
+                            "labels": PREDICTION_LABELS}), 400
+    result = db.session.execute(
+        update(table).where(table.c.user_id == g.user_id, table.c.id.in_(list(confirms)))
+        .values(confirm=case(confirms, value=table.c.id), confirmed_class=case(classes, value=table.c.id))
+    )
+    db.session.commit()
+    return jsonify({"requested": len(confirms), "updated": result.rowcount})
@@ -0,0 +1,160 @@
+# apps/metrics.py
+# 요청별 SQL/시간 계측: 엔드포인트마다 쿼리 수, SQL 시간, 전체 시간, 응답 크기를 메모리 히스토그램에 누적
+import random
+import threading
+import time
+from bisect import bisect_left
+from flask import g, has_request_context, request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+TIME_BUCKETS_MS = (1, 2.5, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000)
+QUERY_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100, 200)
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+
+class Histogram:
+    """고정 구간 히스토그램 (Prometheus histogram과 같은 누적 구간 규칙, 마지막은 +Inf)"""
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+        self.max = 0
+    def observe(self, value):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+        self.max = max(self.max, value)
+    def quantile(self, q):
+        """q 분위수의 구간 상한 추정 (마지막 구간이면 최댓값)"""
+        if not self.count:
+            return None
+        rank, seen = q * self.count, 0
+        for i, n in enumerate(self.counts):
+            seen += n
+            if seen >= rank:
+                return self.buckets[i] if i < len(self.buckets) else self.max
+        return self.max
+    def cumulative(self):
+        """[(상한 문자열, 누적 개수)] (+Inf 포함)"""
+        result, seen = [], 0
+        for bound, n in zip(list(self.buckets) + ['+Inf'], self.counts):
+            seen += n
+            result.append((str(bound), seen))
+        return result
+    def mean(self):
+        return self.sum / self.count if self.count else None
+
+class EndpointStats:
+    def __init__(self):
+        self.duration_ms = Histogram(TIME_BUCKETS_MS)
+        self.sql_ms = Histogram(TIME_BUCKETS_MS)
+        self.queries = Histogram(QUERY_BUCKETS)
+        self.response_bytes = Histogram(SIZE_BUCKETS)
+        self.statuses = {}
+
+class RequestMetrics:
+    """
+    sample_rate 비율의 요청만 계측한다 (1.0: 모든 요청, 0: 끔). 쿼리 시간은 모든 엔진의
+    before/after_cursor_execute 이벤트로 재며, 요청 컨텍스트 밖(백그라운드 스레드)의 쿼리는 제외한다.
+    값은 워커 프로세스별로 집계된다.
+    """
+    def __init__(self, sample_rate=1.0):
+        self.sample_rate = sample_rate
+        self._endpoints = {}
+        self._lock = threading.Lock()
+        self._started = time.time()
+        if not event.contains(Engine, 'before_cursor_execute', self._before_cursor_execute):
+            event.listen(Engine, 'before_cursor_execute', self._before_cursor_execute)
+            event.listen(Engine, 'after_cursor_execute', self._after_cursor_execute)
+    def init_app(self, app):
+        self.sample_rate = app.config.get('METRICS_SAMPLE_RATE', self.sample_rate)
+        app.before_request(self._before_request)
+        app.after_request(self._after_request)
+    # --- 요청 훅 ---
+    def _before_request(self):
+        if self.sample_rate > 0 and (self.sample_rate >= 1 or random.random() < self.sample_rate):
+            g._metrics = {'start': time.perf_counter(), 'queries': 0, 'sql': 0.0}
+    def _after_request(self, response):
+        sample = g.pop('_metrics', None)
+        if sample is None:
+            return response
+        endpoint = request.url_rule.endpoint if request.url_rule else '(unmatched)'
+        size = 0 if response.is_streamed else (response.calculate_content_length() or 0)
+        duration = (time.perf_counter() - sample['start']) * 1000
+        with self._lock:
+            stats = self._endpoints.get(endpoint)
+            if stats is None:
+                stats = self._endpoints[endpoint] = EndpointStats()
+            stats.duration_ms.observe(duration)
+            stats.sql_ms.observe(sample['sql'] * 1000)
+            stats.queries.observe(sample['queries'])
+            stats.response_bytes.observe(size)
+            stats.statuses[response.status_code] = stats.statuses.get(response.status_code, 0) + 1
+        return response
+    # --- SQL 훅 ---
+    def _before_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        if context is not None and has_request_context() and '_metrics' in g:
+            context._metrics_start = time.perf_counter()
+    def _after_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        started = getattr(context, '_metrics_start', None)
+        if started is not None and has_request_context():
+            sample = g.get('_metrics')
+            if sample is not None:
+                sample['queries'] += 1
+                sample['sql'] += time.perf_counter() - started
+    # --- 조회 ---
+    def snapshot(self):
+        """엔드포인트별 요약 (요청 수 내림차순)"""
+        rows = []
+        with self._lock:
+            for endpoint, stats in self._endpoints.items():
+                rows.append({
+                    'endpoint': endpoint,
+                    'count': stats.duration_ms.count,
+                    'avg_ms': stats.duration_ms.mean(),
+                    'p50_ms': stats.duration_ms.quantile(0.5),
+                    'p95_ms': stats.duration_ms.quantile(0.95),
+                    'max_ms': stats.duration_ms.max,
+                    'avg_queries': stats.queries.mean(),
+                    'max_queries': stats.queries.max,
+                    'avg_sql_ms': stats.sql_ms.mean(),
+                    'avg_bytes': stats.response_bytes.mean(),
+                    'statuses': dict(stats.statuses),
+                })
+        return sorted(rows, key=lambda row: row['count'], reverse=True)
+    def prometheus(self):
+        """Prometheus text exposition format (0.0.4)"""
+        metrics = [
+            ('http_request_duration_milliseconds', 'duration_ms', '요청 처리 시간 (ms)'),
+            ('http_request_sql_milliseconds', 'sql_ms', '요청당 SQL 실행 시간 (ms)'),
+            ('http_request_sql_queries', 'queries', '요청당 SQL 쿼리 수'),
+            ('http_response_size_bytes', 'response_bytes', '응답 크기 (bytes)'),
+        ]
+        lines = []
+        with self._lock:
+            for name, attr, help_text in metrics:
+                lines.append(f'# HELP {name} {help_text}')
+                lines.append(f'# TYPE {name} histogram')
+                for endpoint, stats in sorted(self._endpoints.items()):
+                    histogram = getattr(stats, attr)
+                    for bound, count in histogram.cumulative():
+                        lines.append(f'{name}_bucket{{endpoint="{endpoint}",le="{bound}"}} {count}')
+                    lines.append(f'{name}_sum{{endpoint="{endpoint}"}} {histogram.sum}')
+                    lines.append(f'{name}_count{{endpoint="{endpoint}"}} {histogram.count}')
+            lines.append('# HELP http_responses_total 응답 코드별 요청 수 (샘플링된 요청)')
+            lines.append('# TYPE http_responses_total counter')
+            for endpoint, stats in sorted(self._endpoints.items()):
+                for status, count in sorted(stats.statuses.items()):
+                    lines.append(f'http_responses_total{{endpoint="{endpoint}",status="{status}"}} {count}')
+        lines.append('# HELP metrics_sample_rate 계측 샘플링 비율')
+        lines.append('# TYPE metrics_sample_rate gauge')
+        lines.append(f'metrics_sample_rate {self.sample_rate}')
+        return '\n'.join(lines) + '\n'
+    def reset(self):
+        with self._lock:
+            self._endpoints.clear()
+            self._started = time.time()
+    @property
+    def started(self):
+        return self._started
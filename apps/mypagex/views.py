@@ -1,12 +1,21 @@
-from flask import render_template, redirect, url_for, flash, request
+import csv
+import io
+import json
+from flask import Response, render_template, redirect, url_for, flash, request, stream_with_context
 from flask_login import login_required, current_user
 from datetime import datetime, timedelta
+from sqlalchemy import func, select
+from sqlalchemy.orm import joinedload
 from . import mypagex
 from apps.mypagex.forms import ApiKeyForm, ChangePasswordForm
 from apps import db
-from apps.dbmodels import APIKey, Subscription, UsageLog, User
+from apps.extensions import api_key_index, purge_jobs
+from apps.dbmodels import APIKey, Service, Subscription, UsageLog, UsageRollupDaily, User
+from apps.dbrouting import read_only, read_only_db
+from apps.pagination import keyset_page
 @mypagex.route('/dashboard')
 @login_required
+@read_only_db
 def dashboard():
     total_api_keys = APIKey.query.filter_by(user_id=current_user.id).count()
     approved_subscriptions = Subscription.query.filter_by(user_id=current_user.id, status='approved').count()
@@ -16,15 +25,12 @@ def dashboard():
     # UsageLog.query.filter_by(user_id=current_user.id)\
     #                                .order_by(UsageLog.timestamp.desc())\
     #                                .limit(5).all()
-    # 이번 달 총 사용량
-    current_month = datetime.now().month
-    current_year = datetime.now().year
-    monthly_usage = 0
-    #db.session.query(func.sum(UsageLog.usage_count))\
-    #                    .filter(UsageLog.user_id == current_user.id)\
-    #                    .filter(extract('month', UsageLog.timestamp) == current_month)\
-    #                    .filter(extract('year', UsageLog.timestamp) == current_year)\
-    #                    .scalar() or 0
+    # 이번 달 총 사용량: usage_logs 대신 일 단위 롤업(최대 31일치)을 합산
+    month_start = datetime.now().replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+    monthly_usage = db.session.query(func.sum(UsageRollupDaily.usage_count))\
+                        .filter(UsageRollupDaily.user_id == current_user.id)\
+                        .filter(UsageRollupDaily.bucket >= month_start)\
+                        .scalar() or 0
     return render_template('mypagex/dashboard.html',
                            title='마이페이지 대시보드',
                            total_api_keys=total_api_keys,
@@ -108,6 +114,7 @@ def generate_api_key():
     new_key.generate_key()
     db.session.add(new_key)
     db.session.commit()
+    api_key_index.invalidate()   # 인증 인덱스 즉시 갱신
     flash(f'새로운 API Key가 발급되었습니다: {new_key.key_string}', 'success')
     return redirect(url_for('mypagex.api_keys'))
 
@@ -123,6 +130,7 @@ def toggle_api_key_active(key_id):
 
     api_key.is_active = not api_key.is_active # 상태 토글
     db.session.commit()
+    api_key_index.invalidate()
     flash(f"API 키 {'활성화' if api_key.is_active else '비활성화'} 완료.", 'success')
     return redirect(url_for('mypagex.api_keys'))
 
@@ -135,18 +143,89 @@ def delete_api_key(key_id):
         flash('권한이 없습니다.', 'danger')
         return redirect(url_for('mypagex.api_keys'))
     try:
-        db.session.delete(api_key) # API 키 삭제
-        db.session.commit()
-        flash('API 키가 성공적으로 삭제되었습니다.', 'success')
+        job = purge_jobs.run('api_key', api_key.id) # API 키 삭제 (사용 기록/예측 결과 포함, 테이블별 DELETE)
+        if job['status'] == 'running':
+            flash('API 키를 비활성화했습니다. 사용 기록은 백그라운드에서 삭제 중입니다.', 'info')
+        else:
+            flash('API 키가 성공적으로 삭제되었습니다.', 'success')
     except Exception as e:
         db.session.rollback() # 오류 발생 시 롤백
         flash(f'API 키 삭제 중 오류가 발생했습니다: {e}', 'danger')
     return redirect(url_for('mypagex.api_keys'))
+def usage_filters(args):
+    """usage_history/export 공통 필터: start, end(YYYY-MM-DD, 포함), service_id"""
+    conditions = [UsageLog.user_id == current_user.id]
+    filters = {'start': args.get('start', ''), 'end': args.get('end', ''),
+               'service_id': args.get('service_id', None, type=int)}
+    try:
+        if filters['start']:
+            conditions.append(UsageLog.timestamp >= datetime.strptime(filters['start'], '%Y-%m-%d'))
+        if filters['end']:
+            conditions.append(UsageLog.timestamp < datetime.strptime(filters['end'], '%Y-%m-%d') + timedelta(days=1))
+    except ValueError:
+        flash('유효하지 않은 날짜 형식입니다. YYYY-MM-DD 형식으로 입력해주세요.', 'warning')
+        filters['start'] = filters['end'] = ''
+        conditions = conditions[:1]
+    if filters['service_id']:
+        conditions.append(UsageLog.service_id == filters['service_id'])
+    return conditions, filters
 @mypagex.route('/usage_history')
 @login_required
+@read_only_db
 def usage_history():
     # 사용자의 AI 사용량 로그를 보여줍니다.
     # 로그인 기반 사용량과 API Key 기반 사용량을 모두 포함
-    user_usage_logs = UsageLog.query.filter_by(user_id=current_user.id)\
-                                .order_by(UsageLog.timestamp.desc()).all()
-    return render_template('mypagex/usage_history.html', title='내 사용량 기록', logs=user_usage_logs)
+    # (timestamp, id) 키셋 페이지네이션: 기록이 많아도 한 페이지(PER_PAGE건)만 조회
+    PER_PAGE = 50
+    conditions, filters = usage_filters(request.args)
+    query = UsageLog.query.options(joinedload(UsageLog.api_key), joinedload(UsageLog.service)).filter(*conditions)
+    page = keyset_page(query, UsageLog.timestamp, UsageLog.id, request.args.get('cursor'), PER_PAGE)
+    services = Service.query.join(Subscription).filter(Subscription.user_id == current_user.id)\
+                            .order_by(Service.servicename).all()
+    return render_template('mypagex/usage_history.html', title='내 사용량 기록', logs=page.items,
+                           next_cursor=page.next_cursor, filters=filters, services=services)
+@mypagex.route('/usage_history/export')
+@login_required
+def export_usage_history():
+    # 사용량 기록 전체를 CSV 또는 NDJSON으로 스트리밍 (서버 측 커서로 일정 크기씩 읽어 메모리 사용량 일정)
+    export_format = request.args.get('format', 'csv')
+    if export_format not in ('csv', 'ndjson'):
+        flash('지원하지 않는 형식입니다.', 'warning')
+        return redirect(url_for('mypagex.usage_history'))
+    conditions, _ = usage_filters(request.args)
+    columns = ['id', 'timestamp', 'usage_type', 'endpoint', 'service', 'api_key', 'usage_count', 'response_status_code']
+    stmt = select(UsageLog.id, UsageLog.timestamp, UsageLog.usage_type, UsageLog.endpoint, Service.servicename,
+                  APIKey.key_string, UsageLog.usage_count, UsageLog.response_status_code)\
+        .join(Service, UsageLog.service_id == Service.id)\
+        .outerjoin(APIKey, UsageLog.api_key_id == APIKey.id)\
+        .where(*conditions).order_by(UsageLog.timestamp.desc(), UsageLog.id.desc())\
+        .execution_options(yield_per=1000)
+    def rows():
+        with read_only():   # 스트리밍 중에도 쓰기 경로와 분리된 읽기 전용 연결 사용
+            result = db.session.execute(stmt)
+        for row in result:
+            values = list(row)
+            values[1] = values[1].isoformat(sep=' ') if values[1] else None
+            values[2] = values[2].value if values[2] else None
+            yield values
+    def generate_csv():
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        writer.writerow(columns)
+        for i, values in enumerate(rows(), 1):
+            writer.writerow(values)
+            if i % 1000 == 0:
+                yield buffer.getvalue()
+                buffer.seek(0)
+                buffer.truncate(0)
+        yield buffer.getvalue()
+    def generate_ndjson():
+        for values in rows():
+            yield json.dumps(dict(zip(columns, values)), ensure_ascii=False) + '\n'
+    if export_format == 'csv':
+        body, mimetype = generate_csv(), 'text/csv'
+    else:
+        body, mimetype = generate_ndjson(), 'application/x-ndjson'
+    filename = f"usage_history_{datetime.now():%Y%m%d%H%M%S}.{export_format}"
+    return Response(stream_with_context(body), mimetype=mimetype,
+                    headers={'Content-Disposition': f'attachment; filename={filename}'})
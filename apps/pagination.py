@@ -0,0 +1,41 @@
+# apps/pagination.py
+# 키셋(커서) 페이지네이션: OFFSET 없이 (정렬 컬럼, id) 기준으로 다음 페이지 조회
+import base64
+from collections import namedtuple
+from datetime import datetime
+from sqlalchemy import tuple_
+
+KeysetPage = namedtuple('KeysetPage', ['items', 'next_cursor'])
+
+def encode_cursor(value, id_):
+    raw = f'{value.isoformat() if isinstance(value, datetime) else value}|{id_}'
+    return base64.urlsafe_b64encode(raw.encode('utf-8')).decode('ascii')
+
+def decode_cursor(cursor):
+    """커서 문자열 -> (datetime, id). 형식이 잘못되면 None"""
+    try:
+        value, id_ = base64.urlsafe_b64decode(cursor.encode('ascii')).decode('utf-8').rsplit('|', 1)
+        return datetime.fromisoformat(value), int(id_)
+    except (ValueError, UnicodeError):
+        return None
+
+def keyset_page(query, sort_col, id_col, cursor=None, per_page=50, descending=True):
+    """
+    query를 (sort_col, id_col) 순으로 정렬하여 cursor 다음 per_page개를 반환.
+    (sort_col, id_col) 복합 인덱스가 있으면 페이지 위치와 관계없이 일정한 비용으로 조회된다.
+    """
+    position = decode_cursor(cursor) if cursor else None
+    if position is not None:
+        key = tuple_(sort_col, id_col)
+        query = query.filter(key < tuple_(*position) if descending else key > tuple_(*position))
+    if descending:
+        query = query.order_by(sort_col.desc(), id_col.desc())
+    else:
+        query = query.order_by(sort_col.asc(), id_col.asc())
+    items = query.limit(per_page + 1).all()
+    next_cursor = None
+    if len(items) > per_page:
+        items = items[:per_page]
+        last = items[-1]
+        next_cursor = encode_cursor(getattr(last, sort_col.key), getattr(last, id_col.key))
+    return KeysetPage(items, next_cursor)
@@ -0,0 +1,171 @@
+# apps/purge.py
+# 사용자/서비스/API 키 삭제: ORM cascade로 자식 행을 모두 로딩하지 않고 테이블별 DELETE로 삭제
+# 자식 행이 많으면 백그라운드 스레드에서 청크 단위로 삭제하고 진행 상황을 기록한다
+import logging
+import threading
+import uuid
+from collections import OrderedDict
+from datetime import datetime
+from sqlalchemy import and_, func, or_, select, update
+
+# 삭제 대상 -> (자식 테이블의 FK 컬럼, 자식 테이블 (삭제 순서), 대상 테이블)
+# ON DELETE CASCADE 없이 만들어진 기존 DB(마이그레이션 b8d2f5e61c34 이전)에서도 동작하도록 자식 -> 부모 순으로 직접 삭제한다
+# usage_counters는 FK가 없으므로(principal_type, principal_id) 지우지 않으면 재사용된 id가 이전 사용량을 이어받는다
+PURGE_TARGETS = {
+    'user': ('user_id', ['prediction_results', 'usage_logs', 'usage_rollup_hourly', 'usage_rollup_daily',
+                         'usage_counters', 'subscriptions', 'api_keys'], 'users'),
+    'service': ('service_id', ['prediction_results', 'usage_logs', 'usage_rollup_hourly', 'usage_rollup_daily',
+                               'subscriptions'], 'services'),
+    'api_key': ('api_key_id', ['prediction_results', 'usage_logs', 'usage_rollup_hourly', 'usage_rollup_daily',
+                               'usage_counters'], 'api_keys'),
+}
+
+def _prediction_subtables():
+    """PredictionResult 하위 클래스 테이블 (iris_results, loan_results 등, 같은 id 사용)"""
+    from apps.dbmodels import PredictionResult
+    return [m.local_table for m in PredictionResult.__mapper__.self_and_descendants
+            if m.local_table is not PredictionResult.__table__]
+
+def _counter_condition(kind, target_id):
+    """삭제 대상의 usage_counters 조건 (사용자면 그 사용자의 API 키 카운터 포함, api_keys보다 먼저 삭제)"""
+    from apps.extensions import db
+    counters, api_keys = db.metadata.tables['usage_counters'], db.metadata.tables['api_keys']
+    if kind == 'api_key':
+        return and_(counters.c.principal_type == 'api_key', counters.c.principal_id == target_id)
+    return or_(and_(counters.c.principal_type == 'user', counters.c.principal_id == target_id),
+               and_(counters.c.principal_type == 'api_key',
+                    counters.c.principal_id.in_(select(api_keys.c.id).where(api_keys.c.user_id == target_id))))
+
+def purge_steps(kind, target_id):
+    """[(테이블, 조건, 같은 id로 먼저 지울 하위 테이블)] 자식 -> 부모 순"""
+    from apps.extensions import db
+    column, children, target = PURGE_TARGETS[kind]
+    tables = db.metadata.tables
+    steps = []
+    for name in children:
+        table = tables[name]
+        subtables = _prediction_subtables() if name == 'prediction_results' else []
+        cond = _counter_condition(kind, target_id) if name == 'usage_counters' else table.c[column] == target_id
+        steps.append((table, cond, subtables))
+    table = tables[target]
+    steps.append((table, table.c.id == target_id, []))
+    return steps
+
+def count_rows(kind, target_id):
+    """삭제될 행 수 (하위 테이블 제외), 스칼라 서브쿼리로 한 번에 조회"""
+    from apps.extensions import db
+    counts = [select(func.count()).select_from(table).where(cond).scalar_subquery()
+              for table, cond, _ in purge_steps(kind, target_id)]
+    return sum(db.session.execute(select(*counts)).one())
+
+def invalidate_caches():
+    # Core DELETE는 세션 이벤트로 감지되지 않으므로 관련 캐시를 직접 무효화
+    from apps.extensions import api_key_index, catalog, user_cache
+    from apps.stats import admin_stats
+    api_key_index.invalidate()
+    catalog.invalidate_services()
+    catalog.invalidate_subscriptions()
+    user_cache.invalidate()
+    admin_stats.invalidate()
+
+def purge(kind, target_id):
+    """한 트랜잭션에서 테이블마다 DELETE 한 번씩 실행. {테이블 이름: 삭제 행 수}"""
+    from apps.extensions import db
+    deleted = {}
+    try:
+        for table, cond, subtables in purge_steps(kind, target_id):
+            for sub in subtables:
+                ids = select(table.c.id).where(cond)
+                deleted[sub.name] = db.session.execute(sub.delete().where(sub.c.id.in_(ids))).rowcount
+            deleted[table.name] = db.session.execute(table.delete().where(cond)).rowcount
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        raise
+    invalidate_caches()
+    return deleted
+
+def purge_chunk(table, cond, subtables, chunk_size):
+    """조건에 맞는 행을 최대 chunk_size개 삭제하고 commit (쓰기 잠금을 짧게 유지). 삭제한 행 수"""
+    from apps.extensions import db
+    if 'id' not in table.c:   # usage_counters: 대상마다 (일/월 기간 수)행뿐이라 한 번에 삭제
+        count = db.session.execute(table.delete().where(cond)).rowcount
+        db.session.commit()
+        return count
+    ids = db.session.execute(select(table.c.id).where(cond).limit(chunk_size)).scalars().all()
+    if not ids:
+        return 0
+    for sub in subtables:
+        db.session.execute(sub.delete().where(sub.c.id.in_(ids)))
+    db.session.execute(table.delete().where(table.c.id.in_(ids)))
+    db.session.commit()
+    return len(ids)
+
+class PurgeJobs:
+    """
+    run()은 삭제할 행이 threshold 이하면 바로 purge()하고, 많으면 대상을 비활성화한 뒤
+    백그라운드 스레드에서 chunk_size개씩 삭제한다. 진행 상황은 프로세스 메모리에 보관된다 (최근 max_jobs개).
+    """
+    def __init__(self, threshold=10000, chunk_size=1000, max_jobs=100):
+        self.threshold = threshold
+        self.chunk_size = chunk_size
+        self.max_jobs = max_jobs
+        self.app = None
+        self._jobs = OrderedDict()
+        self._lock = threading.Lock()
+    def init_app(self, app):
+        self.app = app
+        self.threshold = app.config.get('PURGE_BACKGROUND_THRESHOLD', self.threshold)
+        self.chunk_size = app.config.get('PURGE_CHUNK_SIZE', self.chunk_size)
+    def run(self, kind, target_id):
+        """삭제 작업 정보(dict). status: done(즉시 삭제) / running(백그라운드)"""
+        total = count_rows(kind, target_id)
+        job = {'id': uuid.uuid4().hex, 'kind': kind, 'target_id': target_id, 'status': 'running',
+               'total': total, 'deleted': 0, 'started_at': datetime.now().isoformat(timespec='seconds'),
+               'finished_at': None, 'error': None}
+        if total <= self.threshold:
+            purge(kind, target_id)
+            job.update(status='done', deleted=total, finished_at=datetime.now().isoformat(timespec='seconds'))
+            return job
+        self._deactivate(kind, target_id)
+        with self._lock:
+            self._jobs[job['id']] = job
+            while len(self._jobs) > self.max_jobs:
+                self._jobs.popitem(last=False)
+        threading.Thread(target=self._run, args=(job,), name=f'purge-{kind}-{target_id}', daemon=True).start()
+        return dict(job)
+    def _deactivate(self, kind, target_id):
+        # 삭제가 끝날 때까지 대상 사용자/서비스/API 키를 사용할 수 없게 함
+        from apps.extensions import db
+        table = db.metadata.tables[PURGE_TARGETS[kind][2]]
+        db.session.execute(update(table).where(table.c.id == target_id).values(is_active=False))
+        db.session.commit()
+        invalidate_caches()
+    def _run(self, job):
+        from apps.extensions import db
+        with self.app.app_context():
+            try:
+                for table, cond, subtables in purge_steps(job['kind'], job['target_id']):
+                    while True:
+                        count = purge_chunk(table, cond, subtables, self.chunk_size)
+                        if not count:
+                            break
+                        with self._lock:
+                            job['deleted'] += count
+                status, error = 'done', None
+            except Exception as e:
+                db.session.rollback()
+                logging.exception(f"{job['kind']} {job['target_id']} 삭제 작업 실패")
+                status, error = 'failed', str(e)
+            finally:
+                invalidate_caches()
+                db.session.remove()
+            with self._lock:
+                job.update(status=status, error=error, finished_at=datetime.now().isoformat(timespec='seconds'))
+    def get(self, job_id):
+        with self._lock:
+            job = self._jobs.get(job_id)
+            return dict(job) if job else None
+    def jobs(self):
+        with self._lock:
+            return [dict(job) for job in reversed(self._jobs.values())]
@@ -0,0 +1,66 @@
+# apps/queryplans.py
+# 자주 실행되는 쿼리의 실행 계획 확인: SQLite EXPLAIN QUERY PLAN에 인덱스 없는 전체 스캔(SCAN <table>)이 있으면 실패
+import re
+from datetime import datetime, timedelta
+from sqlalchemy import func, select, text, tuple_
+from sqlalchemy.exc import OperationalError
+
+# 'SCAN usage_logs' (전체 테이블 스캔)만 실패로 본다. 'SCAN ... USING INDEX'는 인덱스 순서대로 읽는 것
+_FULL_SCAN = re.compile(r'^SCAN (\w+)(?: AS \w+)?$')
+
+def hot_queries():
+    """[(이름, SQLAlchemy 구문)] 뷰/제한/집계에서 쓰는 대표 쿼리 (파라미터 값은 예시)"""
+    from apps.dbmodels import APIKey, PredictionResult, Service, Subscription, UsageCounter, UsageLog, UsageRollupDaily
+    from apps.quota import counter_keys
+    now = datetime.now()
+    week_ago = now - timedelta(days=7)
+    return [
+        ('usage_history 첫 페이지',
+         select(UsageLog).where(UsageLog.user_id == 1)
+         .order_by(UsageLog.timestamp.desc(), UsageLog.id.desc()).limit(51)),
+        ('usage_history 기간 필터 + 다음 페이지',
+         select(UsageLog).where(UsageLog.user_id == 1, UsageLog.timestamp >= week_ago,
+                                tuple_(UsageLog.timestamp, UsageLog.id) < tuple_(now, 1000))
+         .order_by(UsageLog.timestamp.desc(), UsageLog.id.desc()).limit(51)),
+        ('API 키 엔드포인트별 사용량',
+         select(func.count(UsageLog.id)).where(UsageLog.api_key_id == 1, UsageLog.endpoint == '/api/predict/iris',
+                                                UsageLog.timestamp >= week_ago)),
+        ('관리자 구독 목록 (상태별)',
+         select(Subscription).where(Subscription.status == 'pending')
+         .order_by(Subscription.request_date.asc(), Subscription.id.asc()).limit(51)),
+        ('사용자별 구독 상태',
+         select(Subscription.service_id, Subscription.status).where(Subscription.user_id == 1)),
+        ('활성 서비스 목록 (등록일 순)',
+         select(Service).where(Service.is_active == True).order_by(Service.created_at.desc()).limit(10)),
+        ('사용자별 API 키 목록',
+         select(APIKey).where(APIKey.user_id == 1).order_by(APIKey.created_at.desc())),
+        ('사용량 한도 확인 (카운터)',
+         select(UsageCounter.count).where(
+             counter_keys([('user', 1, now.strftime('%Y-%m-%d')), ('api_key', 1, now.strftime('%Y-%m'))]))),
+        ('예측 이력 다음 페이지',
+         select(PredictionResult).where(PredictionResult.user_id == 1,
+                                        tuple_(PredictionResult.created_at, PredictionResult.id) < tuple_(now, 1000))
+         .order_by(PredictionResult.created_at.desc(), PredictionResult.id.desc()).limit(51)),
+        ('이번 달 사용량 (롤업)',
+         select(func.sum(UsageRollupDaily.usage_count))
+         .where(UsageRollupDaily.user_id == 1, UsageRollupDaily.bucket >= week_ago)),
+    ]
+
+def explain(session, stmt):
+    """EXPLAIN QUERY PLAN 결과의 detail 열 목록"""
+    compiled = stmt.compile(dialect=session.get_bind().dialect, compile_kwargs={'literal_binds': True})
+    return [row[-1] for row in session.execute(text(f'EXPLAIN QUERY PLAN {compiled}'))]
+
+def check_query_plans(session):
+    """[(이름, 통과 여부, 실행 계획 줄 목록)]"""
+    results = []
+    for name, stmt in hot_queries():
+        try:
+            plan = explain(session, stmt)
+        except OperationalError as e:   # 테이블이 없는 경우 등 (flask db upgrade 필요)
+            session.rollback()
+            results.append((name, False, [str(e.orig)]))
+            continue
+        ok = not any(_FULL_SCAN.match(line.strip()) for line in plan)
+        results.append((name, ok, plan))
+    return results
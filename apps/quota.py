@@ -0,0 +1,142 @@
+# apps/quota.py
+# 사용자/API 키 일일·월간 사용량 제한: usage_logs를 세지 않고 (주체, 기간)별 카운터 행만 조회/누적
+# 요청 시작 시 쓸 단위 수만큼 조건부 UPSERT로 미리 예약하고(reserve_quota), usage_writer가 실제 사용량과의 차이만 반영
+from collections import Counter
+from datetime import datetime
+from sqlalchemy import and_, bindparam, func, literal, or_, select, true, update
+from apps.usage import dialect_insert
+
+def periods(ts=None):
+    """(일 기간, 월 기간) 예: ('2026-10-18', '2026-10')"""
+    ts = ts or datetime.now()
+    return ts.strftime('%Y-%m-%d'), ts.strftime('%Y-%m')
+
+def quota_limits(user_id, user_limits, api_key=None, now=None, unlimited=False):
+    """{(principal_type, principal_id, period): (limit, '설명')} 제한 값이 없으면(None) 제외 (unlimited=True면 포함)"""
+    day, month = periods(now)
+    limits = {('user', user_id, day): (user_limits[0], '사용자 일일'),
+              ('user', user_id, month): (user_limits[1], '사용자 월간')}
+    if api_key is not None:
+        limits[('api_key', api_key.key_id, day)] = (api_key.daily_limit, 'API 키 일일')
+        limits[('api_key', api_key.key_id, month)] = (api_key.monthly_limit, 'API 키 월간')
+    return {key: value for key, value in limits.items() if unlimited or value[0] is not None}
+
+def counter_keys(keys):
+    """(principal_type, principal_id, period) 목록의 WHERE 조건
+    SQLite는 행 값 IN (VALUES ...)에 기본 키를 쓰지 않으므로 OR로 풀어서 키마다 기본 키 조회가 되게 한다"""
+    from apps.dbmodels import UsageCounter
+    return or_(*(and_(UsageCounter.principal_type == principal_type, UsageCounter.principal_id == principal_id,
+                      UsageCounter.period == period) for principal_type, principal_id, period in keys))
+
+def reserve_quota(engine, user_id, user_limits, api_key=None, amount=1, now=None):
+    """
+    이번 요청이 쓸 amount만큼 카운터를 미리 증가 (사용자/API 키 x 일/월, 최대 4행).
+    한도가 있는 행은 count + amount <= limit일 때만 증가하는 조건부 UPSERT ... RETURNING이라 동시 요청도 한도를 넘지 못한다.
+    한 항목이라도 넘으면 전체를 rollback하고 {'scope', 'period', 'limit', 'used', 'requested'}, 예약되면 None.
+    요청 세션(db.session)과 별도 연결에서 바로 commit한다 (세션 객체 만료 없음)
+    """
+    from apps.dbmodels import UsageCounter
+    table = UsageCounter.__table__
+    columns = ['principal_type', 'principal_id', 'period', 'count']
+    with engine.connect() as conn:
+        transaction = conn.begin()
+        for (principal_type, principal_id, period), (limit, scope) in \
+                quota_limits(user_id, user_limits, api_key, now, unlimited=True).items():
+            values = (literal(principal_type), literal(principal_id), literal(period), literal(amount))
+            if limit is None:   # 한도 없음: 사용량만 누적
+                stmt = dialect_insert(table).from_select(columns, select(*values).where(true()))
+                stmt = stmt.on_conflict_do_update(index_elements=columns[:3],
+                                                  set_={'count': table.c.count + stmt.excluded.count})
+            else:
+                stmt = dialect_insert(table).from_select(columns, select(*values).where(literal(amount) <= limit))
+                stmt = stmt.on_conflict_do_update(index_elements=columns[:3],
+                                                  set_={'count': table.c.count + stmt.excluded.count},
+                                                  where=table.c.count + stmt.excluded.count <= limit)
+            if conn.execute(stmt.returning(table.c.count)).first() is None:
+                transaction.rollback()
+                used = conn.execute(select(table.c.count).where(counter_keys([(principal_type, principal_id, period)])))\
+                    .scalar()
+                return {'scope': scope, 'period': period, 'limit': limit, 'used': used or 0, 'requested': amount}
+        transaction.commit()
+    return None
+
+def release_quota(engine, user_id, api_key_id, amount, reserved_at):
+    """reserve_quota로 예약했지만 usage_writer에 넘기지 못한 사용량 반환 (예외, 제한 등으로 기록 전에 끝난 요청)"""
+    from apps.dbmodels import UsageCounter
+    principals = [('user', user_id)] + ([('api_key', api_key_id)] if api_key_id else [])
+    keys = [(principal_type, principal_id, period) for principal_type, principal_id in principals
+            for period in periods(reserved_at)]
+    with engine.begin() as conn:
+        conn.execute(update(UsageCounter.__table__).where(counter_keys(keys))
+                     .values(count=UsageCounter.__table__.c.count - amount))
+
+def apply_counters(session, rows):
+    """
+    UsageLog 행(dict) 목록을 기간별 카운터에 UPSERT로 누적하고 users/api_keys.usage_count도 함께 증가
+    (호출한 쪽 트랜잭션에서 실행, apply_rollups와 같은 규칙: usage_count 0인 실패 요청은 제외)
+    quota_reserved=(예약량, 예약 시각)이 있는 행은 reserve_quota가 이미 더한 만큼을 빼고 차이만 반영한다
+    (실패 요청은 예약량 반환)
+    """
+    from apps.dbmodels import APIKey, UsageCounter, User
+    counters, totals = Counter(), {'user': Counter(), 'api_key': Counter()}
+    for row in rows:
+        if row.get('user_id') is None:
+            continue
+        amount = row.get('usage_count', 1) or 0
+        reserved, counted_at = row.get('quota_reserved') or (0, row['timestamp'])
+        principals = [('user', row['user_id'])]
+        if row.get('api_key_id'):
+            principals.append(('api_key', row['api_key_id']))
+        for principal_type, principal_id in principals:
+            totals[principal_type][principal_id] += amount
+            for period in periods(counted_at):
+                counters[(principal_type, principal_id, period)] += amount - reserved
+    counters = {key: count for key, count in counters.items() if count}
+    for principal_type in totals:
+        totals[principal_type] = {key: amount for key, amount in totals[principal_type].items() if amount}
+    if not counters and not any(totals.values()):
+        return
+    if counters:
+        table = UsageCounter.__table__
+        stmt = dialect_insert(table)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=['principal_type', 'principal_id', 'period'],
+            set_={'count': table.c.count + stmt.excluded.count},
+        )
+        session.execute(stmt, [dict(principal_type=principal_type, principal_id=principal_id, period=period, count=count)
+                               for (principal_type, principal_id, period), count in counters.items()])
+    for principal_type, model in (('user', User), ('api_key', APIKey)):
+        if totals[principal_type]:
+            table = model.__table__
+            session.execute(
+                update(table).where(table.c.id == bindparam('b_id'))
+                .values(usage_count=func.coalesce(table.c.usage_count, 0) + bindparam('b_amount')),
+                [{'b_id': principal_id, 'b_amount': amount} for principal_id, amount in totals[principal_type].items()],
+            )
+
+def rebuild_counters(now=None):
+    """현재 일/월 카운터와 users/api_keys.usage_count를 usage_logs로 다시 계산 (백필용). 반환: 기록한 카운터 행 수"""
+    from sqlalchemy import delete
+    from apps.dbmodels import APIKey, UsageCounter, UsageLog, User
+    from apps.extensions import db
+    now = now or datetime.now()
+    day, month = periods(now)
+    month_start = now.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+    day_start = now.replace(hour=0, minute=0, second=0, microsecond=0)
+    db.session.execute(delete(UsageCounter).where(UsageCounter.period.in_([day, month])))
+    rows = []
+    for principal_type, column in (('user', UsageLog.user_id), ('api_key', UsageLog.api_key_id)):
+        for period, since in ((month, month_start), (day, day_start)):
+            query = db.session.query(column, func.sum(UsageLog.usage_count)).filter(
+                column.isnot(None), UsageLog.usage_count > 0, UsageLog.timestamp >= since,
+            ).group_by(column)
+            rows.extend(dict(principal_type=principal_type, principal_id=principal_id, period=period, count=total)
+                        for principal_id, total in query)
+    if rows:
+        db.session.execute(UsageCounter.__table__.insert(), rows)
+    for model, column in ((User, UsageLog.user_id), (APIKey, UsageLog.api_key_id)):
+        total = select(func.coalesce(func.sum(UsageLog.usage_count), 0)).where(
+            column == model.id, UsageLog.usage_count > 0).scalar_subquery()
+        db.session.execute(update(model.__table__).values(usage_count=total))
+    db.session.commit()
+    return len(rows)
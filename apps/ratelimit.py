@@ -0,0 +1,102 @@
+# apps/ratelimit.py
+# 슬라이딩 윈도우 카운터 방식의 사용량 제한 (usage_logs를 조회하지 않는 O(1) 방식)
+import math
+import os
+import sqlite3
+import threading
+import time
+
+_PERIODS = {'second': 1, 'minute': 60, 'hour': 3600, 'day': 86400}
+
+def parse_limit(limit_str):
+    """'60/minute' -> (60, 60). 단위: second, minute, hour, day (복수형 허용)"""
+    count, _, unit = limit_str.partition('/')
+    unit = unit.strip().lower().rstrip('s')
+    if unit not in _PERIODS:
+        raise ValueError(f'알 수 없는 제한 단위입니다: {limit_str}')
+    return int(count), _PERIODS[unit]
+
+def slide(state, limit, period, now):
+    """
+    슬라이딩 윈도우 카운터 한 단계 계산.
+    state=(window_start, prev_count, curr_count) -> (allowed, 새 state, remaining, retry_after초)
+    이전 윈도우 카운트를 현재 윈도우와 겹치는 비율만큼 반영하여 요청 수를 추정한다.
+    """
+    window = math.floor(now / period) * period
+    window_start, prev_count, curr_count = state or (window, 0, 0)
+    if window_start != window:   # 윈도우가 넘어갔으면 이전/현재 카운트 이동
+        prev_count = curr_count if window_start == window - period else 0
+        curr_count = 0
+    elapsed = (now - window) / period
+    estimated = prev_count * (1 - elapsed) + curr_count
+    if estimated + 1 <= limit:
+        curr_count += 1
+        remaining = int(limit - (estimated + 1))
+        return True, (window, prev_count, curr_count), remaining, 0
+    # 추정 요청 수가 limit - 1 이하로 떨어지는 시각 계산
+    if curr_count <= limit - 1 and prev_count:
+        wait_until = window + period * (1 - (limit - 1 - curr_count) / prev_count)
+    else:
+        wait_until = window + period * (2 - (limit - 1) / max(curr_count, 1))
+    retry_after = max(1, math.ceil(wait_until - now))
+    return False, (window, prev_count, curr_count), 0, retry_after
+
+class MemoryBackend:
+    """프로세스 내 상태 저장 (단일 워커 또는 워커별 제한)"""
+    def __init__(self):
+        self._state = {}
+        self._lock = threading.Lock()
+    def hit(self, key, limit, period, now):
+        with self._lock:
+            allowed, state, remaining, retry_after = slide(self._state.get((key, period)), limit, period, now)
+            self._state[(key, period)] = state
+        return allowed, remaining, retry_after
+
+class SQLiteBackend:
+    """여러 gunicorn 워커가 공유하는 SQLite 파일 상태 저장 (키당 한 행 UPSERT)"""
+    def __init__(self, path):
+        self.path = path
+        self._local = threading.local()
+    def _connection(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None or self._local.pid != os.getpid():   # fork 이후에는 새 연결
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            conn.execute('CREATE TABLE IF NOT EXISTS rate_limits ('
+                         'key TEXT PRIMARY KEY, window_start REAL, prev_count INTEGER, curr_count INTEGER)')
+            self._local.conn, self._local.pid = conn, os.getpid()
+        return conn
+    def hit(self, key, limit, period, now):
+        conn = self._connection()
+        key = f'{key}:{period}'
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            row = conn.execute('SELECT window_start, prev_count, curr_count FROM rate_limits WHERE key = ?',
+                               (key,)).fetchone()
+            allowed, state, remaining, retry_after = slide(row, limit, period, now)
+            conn.execute('INSERT INTO rate_limits (key, window_start, prev_count, curr_count) VALUES (?, ?, ?, ?) '
+                         'ON CONFLICT(key) DO UPDATE SET window_start = excluded.window_start, '
+                         'prev_count = excluded.prev_count, curr_count = excluded.curr_count', (key, *state))
+            conn.execute('COMMIT')
+        except Exception:
+            conn.execute('ROLLBACK')
+            raise
+        return allowed, remaining, retry_after
+
+class RateLimiter:
+    def __init__(self):
+        self.backend = MemoryBackend()
+    def init_app(self, app):
+        backend = app.config.get('RATELIMIT_BACKEND', 'memory')
+        if backend == 'sqlite':
+            self.backend = SQLiteBackend(app.config['RATELIMIT_SQLITE_PATH'])
+        elif backend == 'memory':
+            self.backend = MemoryBackend()
+        else:
+            raise ValueError(f'알 수 없는 RATELIMIT_BACKEND 입니다: {backend}')
+    def hit(self, key, limit_str):
+        """요청 1회 기록. (allowed, limit, remaining, retry_after) 반환"""
+        limit, period = parse_limit(limit_str)
+        allowed, remaining, retry_after = self.backend.hit(key, limit, period, time.time())
+        return allowed, limit, remaining, retry_after
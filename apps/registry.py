@@ -0,0 +1,158 @@
+# apps/registry.py
+# 모델 레지스트리: Service.service_endpoint + model_version 별로 모델을 지연 로딩하고 LRU로 관리
+import json
+import os
+import pickle
+import re
+import sys
+import threading
+from collections import OrderedDict
+from apps.caches import SharedStamp
+
+DEFAULT_MODEL_VERSION = '1.0'   # PredictionResult.model_version 기본값과 동일
+_VERSION_PATTERN = re.compile(r'^[A-Za-z0-9._-]{1,20}$')   # 파일 이름으로 쓰이고 model_version은 20자
+
+class ModelRegistry:
+    """
+    서비스가 처음 호출될 때 모델을 로딩하고, 최근 사용 순(LRU)으로 최대 개수/메모리 한도 내에서 유지한다.
+    모델 파일은 MODEL_DIR/<service_endpoint>/<model_version>.joblib 에서 찾고,
+    없으면 register()로 등록된 기본 로더를 사용한다. 스레드 방식의 gunicorn 워커에서도 안전하다.
+    서비스 중인 버전은 MODEL_VERSIONS 설정이 기본이고, switch_version()(관리자 화면, flask model set-version)으로
+    바꾸면 instance/model_versions.json에 기록되어 모든 워커가 다음 요청에서 적용한다 (이전 버전 예측 캐시도 비움).
+    """
+    def __init__(self, max_models=8, memory_budget_mb=512):
+        self.max_models = max_models
+        self.memory_budget = memory_budget_mb * 1024 * 1024
+        self.model_dir = None
+        self._loaders = {}        # endpoint -> 기본 로더 함수
+        self._versions = {}       # endpoint -> 현재 서비스 중인 버전
+        self._models = OrderedDict()   # (endpoint, version) -> (model, 추정 크기)
+        self._load_locks = {}     # (endpoint, version) -> 로딩 중복 방지용 Lock
+        self._version_listeners = []
+        self._versions_path = None
+        self._versions_stamp = None
+        self._lock = threading.Lock()
+        self.hits = self.misses = self.evictions = 0
+    def init_app(self, app):
+        self.model_dir = app.config.get('MODEL_DIR')
+        self.max_models = app.config.get('MODEL_REGISTRY_MAX_MODELS', self.max_models)
+        self.memory_budget = app.config.get('MODEL_REGISTRY_MEMORY_MB', self.memory_budget // (1024 * 1024)) * 1024 * 1024
+        self._versions.update(app.config.get('MODEL_VERSIONS', {}))
+        self._versions_path = os.path.join(app.config['INSTANCE_DIR'], 'model_versions.json')
+        self._versions_stamp = SharedStamp(self._versions_path)
+        self._versions.update(self._read_versions())   # 운영 중 변경한 버전이 설정보다 우선
+    def register(self, endpoint, loader):
+        """모델 파일이 없을 때 사용할 기본 로더 등록 (로딩은 첫 호출 시점까지 미룬다)"""
+        self._loaders[endpoint] = loader
+    def _read_versions(self):
+        try:
+            with open(self._versions_path, encoding='utf-8') as f:
+                return json.load(f)
+        except (FileNotFoundError, ValueError):
+            return {}
+    def _sync_versions(self):
+        # 다른 워커/CLI에서 바꾼 버전 적용 (확인 비용은 os.stat 한 번)
+        if self._versions_stamp is not None and self._versions_stamp.changed():
+            for endpoint, version in self._read_versions().items():
+                self.set_version(endpoint, version)
+    def serves(self, endpoint):
+        """기본 로더가 등록되었거나 MODEL_DIR/<endpoint>/ 가 있는 서비스인지"""
+        return endpoint in self._loaders or bool(self.model_dir and os.path.isdir(os.path.join(self.model_dir, endpoint)))
+    def current_version(self, endpoint):
+        self._sync_versions()
+        return self._versions.get(endpoint, DEFAULT_MODEL_VERSION)
+    def switch_version(self, endpoint, version):
+        """
+        운영 중 모델 버전 변경: 새 버전을 먼저 로딩해 확인한 뒤 model_versions.json에 기록하고 이 프로세스에 적용.
+        다른 워커는 파일 변경을 보고 set_version()을 호출한다. 반환: 이전 버전
+        잘못된 endpoint/버전이면 ValueError, 모델을 로딩할 수 없으면 LookupError
+        """
+        if not self.serves(endpoint):
+            raise ValueError(f"'{endpoint}'은(는) 등록된 모델 서비스가 아닙니다.")
+        if not _VERSION_PATTERN.match(version or ''):
+            raise ValueError('버전은 영문, 숫자, ., _, - 로 된 20자 이하여야 합니다.')
+        self.get(endpoint, version)
+        old_version = self.current_version(endpoint)
+        versions = self._read_versions()
+        versions[endpoint] = version
+        tmp = self._versions_path + '.tmp'
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump(versions, f)
+        os.replace(tmp, self._versions_path)   # mtime 변경 = 다른 워커에 알림
+        self.set_version(endpoint, version)
+        return old_version
+    def set_version(self, endpoint, version):
+        """서비스의 모델 버전 변경: 이전 버전 모델은 메모리에서 내리고 리스너에게 알린다"""
+        with self._lock:
+            old_version = self._versions.get(endpoint, DEFAULT_MODEL_VERSION)
+            self._versions[endpoint] = version
+            entry = self._models.pop((endpoint, old_version), None) if old_version != version else None
+        if old_version != version:
+            for listener in self._version_listeners:
+                listener(endpoint, old_version, version)
+        return entry is not None
+    def on_version_change(self, listener):
+        """listener(endpoint, old_version, new_version) 형태의 콜백 등록"""
+        self._version_listeners.append(listener)
+        return listener
+    def get(self, endpoint, version=None):
+        """(endpoint, version) 모델 반환. 메모리에 없으면 이 시점에 로딩한다."""
+        key = (endpoint, version or self.current_version(endpoint))
+        with self._lock:
+            entry = self._models.get(key)
+            if entry is not None:
+                self._models.move_to_end(key)
+                self.hits += 1
+                return entry[0]
+            load_lock = self._load_locks.setdefault(key, threading.Lock())
+        with load_lock:   # 같은 모델을 여러 스레드가 동시에 로딩하지 않도록
+            with self._lock:
+                entry = self._models.get(key)
+                if entry is not None:
+                    self._models.move_to_end(key)
+                    self.hits += 1
+                    return entry[0]
+                self.misses += 1
+            model = self._load(*key)
+            size = self._estimate_size(model)
+            with self._lock:
+                self._models[key] = (model, size)
+                self._evict()
+                self._load_locks.pop(key, None)
+        return model
+    def _artifact_path(self, endpoint, version):
+        if not self.model_dir:
+            return None
+        return os.path.join(self.model_dir, endpoint, f'{version}.joblib')
+    def _load(self, endpoint, version):
+        path = self._artifact_path(endpoint, version)
+        if path and os.path.exists(path):
+            import joblib
+            return joblib.load(path)
+        loader = self._loaders.get(endpoint)
+        if loader is None:
+            raise LookupError(f"'{endpoint}' (버전 {version}) 모델을 찾을 수 없습니다.")
+        return loader()
+    @staticmethod
+    def _estimate_size(model):
+        try:
+            return len(pickle.dumps(model, protocol=pickle.HIGHEST_PROTOCOL))
+        except Exception:
+            return sys.getsizeof(model)
+    def _evict(self):
+        # 가장 오래 사용되지 않은 모델부터 제거 (방금 로딩한 모델 1개는 유지)
+        total = sum(size for _, size in self._models.values())
+        while len(self._models) > 1 and (len(self._models) > self.max_models or total > self.memory_budget):
+            _, (_, size) = self._models.popitem(last=False)
+            total -= size
+            self.evictions += 1
+    def evict(self, endpoint, version=None):
+        with self._lock:
+            return self._models.pop((endpoint, version or self.current_version(endpoint)), None) is not None
+    def stats(self):
+        with self._lock:
+            return {
+                "loaded": [f"{endpoint}@{version}" for endpoint, version in self._models],
+                "memory_bytes": sum(size for _, size in self._models.values()),
+                "hits": self.hits, "misses": self.misses, "evictions": self.evictions,
+            }
@@ -9,5 +9,7 @@ app =create_app()
 
 # render.com
 if __name__ == '__main__':
+    from apps.bootstrap import bootstrap
+    bootstrap(app)   # 직접 실행 시 테이블/관리자 계정 준비 (gunicorn은 gunicorn.conf.py에서 처리)
     port = int(os.environ.get("PORT", 5000))  # Render가 포트 넘버 환경변수로 줍니다!
     app.run(host="0.0.0.0", port=port, debug=False)
@@ -0,0 +1,72 @@
+# apps/search.py
+# 서비스 카탈로그 검색: SQLite FTS5(trigram) 인덱스 + 관련도(bm25) 정렬, 그 외 DB는 ilike 검색
+import logging
+from sqlalchemy import column, literal_column, or_, table, text
+
+FTS_TABLE = 'services_fts'
+# external content 방식: 본문은 services 테이블에 두고 트리거로 인덱스만 동기화
+# trigram 토크나이저는 부분 문자열 검색(기존 '%q%')과 같은 결과를 인덱스로 처리한다 (검색어 3글자 이상)
+# 기존 DB는 마이그레이션 e3f7a2c91d58이 같은 DDL로 만든다 (바꿀 때는 새 마이그레이션 추가)
+_FTS_DDL = [
+    f"CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5("
+    "servicename, description, keywords, content='services', content_rowid='id', tokenize='trigram')",
+    f"CREATE TRIGGER IF NOT EXISTS services_fts_ai AFTER INSERT ON services BEGIN "
+    f"INSERT INTO {FTS_TABLE}(rowid, servicename, description, keywords) "
+    "VALUES (new.id, new.servicename, new.description, new.keywords); END",
+    f"CREATE TRIGGER IF NOT EXISTS services_fts_ad AFTER DELETE ON services BEGIN "
+    f"INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, servicename, description, keywords) "
+    "VALUES ('delete', old.id, old.servicename, old.description, old.keywords); END",
+    f"CREATE TRIGGER IF NOT EXISTS services_fts_au AFTER UPDATE OF servicename, description, keywords ON services BEGIN "
+    f"INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, servicename, description, keywords) "
+    "VALUES ('delete', old.id, old.servicename, old.description, old.keywords); "
+    f"INSERT INTO {FTS_TABLE}(rowid, servicename, description, keywords) "
+    "VALUES (new.id, new.servicename, new.description, new.keywords); END",
+]
+MIN_FTS_QUERY_LENGTH = 3
+_fts_ready = {}   # 엔진 URL -> FTS 인덱스 사용 가능 여부 (프로세스당 1회 확인)
+
+def create_search_index(rebuild=False):
+    """FTS5 인덱스와 동기화 트리거 생성. 처음 만들거나 rebuild=True면 기존 서비스로 인덱스를 채운다."""
+    from apps.extensions import db
+    if db.engine.dialect.name != 'sqlite':
+        return False
+    with db.engine.begin() as conn:
+        exists = conn.execute(text("SELECT 1 FROM sqlite_master WHERE name = :name"), {'name': FTS_TABLE}).first()
+        try:
+            for ddl in _FTS_DDL:
+                conn.execute(text(ddl))
+        except Exception as e:   # FTS5/trigram 미지원 SQLite: ilike 검색 사용
+            logging.warning(f'FTS5 검색 인덱스를 만들 수 없어 ilike 검색을 사용합니다: {e}')
+            _fts_ready[str(db.engine.url)] = False
+            return False
+        if rebuild or not exists:
+            conn.execute(text(f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')"))
+    _fts_ready[str(db.engine.url)] = True
+    return True
+
+def fts_available():
+    from apps.extensions import db
+    from flask import current_app
+    key = str(db.engine.url)
+    if key not in _fts_ready:
+        ready = False
+        if current_app.config.get('SERVICE_SEARCH_FTS', True) and db.engine.dialect.name == 'sqlite':
+            ready = db.session.execute(text("SELECT 1 FROM sqlite_master WHERE name = :name"),
+                                       {'name': FTS_TABLE}).first() is not None
+        _fts_ready[key] = ready
+    return _fts_ready[key]
+
+def search_services(query, q):
+    """Service 쿼리에 검색 조건 추가. FTS 사용 시 관련도 순으로 정렬된다."""
+    from apps.dbmodels import Service
+    q = q.strip()
+    if fts_available() and len(q) >= MIN_FTS_QUERY_LENGTH:
+        fts = table(FTS_TABLE, column('rowid'), column('rank'))
+        phrase = '"' + q.replace('"', '""') + '"'   # 검색어 전체를 하나의 구문으로 (부분 문자열 일치)
+        return query.join(fts, fts.c.rowid == Service.id)\
+                    .filter(literal_column(FTS_TABLE).op('MATCH')(phrase))\
+                    .order_by(fts.c.rank)
+    return query.filter(or_(
+        Service.servicename.ilike(f'%{q}%'), Service.description.ilike(f'%{q}%'),
+        Service.keywords.ilike(f'%{q}%'),
+    ))
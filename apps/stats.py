@@ -0,0 +1,63 @@
+# apps/stats.py
+# 관리자 대시보드 통계: 모든 지표를 스칼라 서브쿼리로 묶어 한 번의 쿼리로 조회하고 짧은 TTL 동안 캐시
+from datetime import datetime, timedelta
+from sqlalchemy import func, select
+from apps.caches import TTLCache
+
+class DashboardStats:
+    """
+    register()로 등록한 지표(스칼라 서브쿼리)를 SELECT 하나로 계산한다.
+    새 지표는 함수 하나를 등록하면 되며, 추가 왕복이나 별도 COUNT 쿼리가 늘지 않는다.
+    """
+    def __init__(self, ttl=30):
+        self._metrics = {}   # 이름 -> 스칼라 서브쿼리를 반환하는 함수
+        self._cache = TTLCache(maxsize=1, ttl=ttl)
+    def init_app(self, app):
+        self._cache = TTLCache(maxsize=1, ttl=app.config.get('ADMIN_STATS_TTL', self._cache.ttl))
+    def register(self, name):
+        def decorator(fn):
+            self._metrics[name] = fn
+            return fn
+        return decorator
+    def snapshot(self):
+        """{지표 이름: 값} (TTL 동안 캐시된 값)"""
+        stats = self._cache.get('stats')
+        if stats is None:
+            from apps.extensions import db
+            row = db.session.execute(select(*[fn().label(name) for name, fn in self._metrics.items()])).one()
+            stats = {name: value or 0 for name, value in row._mapping.items()}
+            self._cache.set('stats', stats)
+        return stats
+    def invalidate(self):
+        self._cache.clear()
+
+admin_stats = DashboardStats()
+
+@admin_stats.register('total_users')
+def _total_users():
+    from apps.dbmodels import User
+    return select(func.count(User.id)).scalar_subquery()
+
+@admin_stats.register('total_services')
+def _total_services():
+    from apps.dbmodels import Service
+    return select(func.count(Service.id)).scalar_subquery()
+
+@admin_stats.register('active_services')
+def _active_services():
+    from apps.dbmodels import Service
+    return select(func.count(Service.id)).where(Service.is_active == True).scalar_subquery()
+
+@admin_stats.register('pending_subscriptions')
+def _pending_subscriptions():
+    from apps.dbmodels import Subscription
+    return select(func.count(Subscription.id)).where(Subscription.status == 'pending').scalar_subquery()
+
+@admin_stats.register('recent_service_usage')
+def _recent_service_usage():
+    # 최근 7일간 서비스 사용량 (로그인 제외): usage_logs 대신 일 단위 롤업 합산
+    from apps.dbmodels import UsageRollupDaily, UsageType
+    seven_days_ago = (datetime.now() - timedelta(days=6)).replace(hour=0, minute=0, second=0, microsecond=0)
+    return select(func.sum(UsageRollupDaily.usage_count))\
+        .where(UsageRollupDaily.bucket >= seven_days_ago)\
+        .where(UsageRollupDaily.usage_type != UsageType.LOGIN).scalar_subquery()
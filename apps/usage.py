@@ -0,0 +1,234 @@
+# apps/usage.py
+# UsageLog 비동기 일괄 기록: 요청 스레드는 큐에 넣기만 하고, 백그라운드 스레드가 모아서 bulk insert
+import atexit
+import logging
+import os
+import queue
+import threading
+import time
+from collections import Counter
+from datetime import datetime
+
+def dialect_insert(table):
+    """ON CONFLICT(UPSERT)를 지원하는 방언별 insert() 반환 (SQLite / PostgreSQL)"""
+    from apps.extensions import db
+    if db.engine.dialect.name == 'postgresql':
+        from sqlalchemy.dialects.postgresql import insert
+    else:
+        from sqlalchemy.dialects.sqlite import insert
+    return insert(table)
+
+def _hour(ts):
+    return ts.replace(minute=0, second=0, microsecond=0)
+def _day(ts):
+    return ts.replace(hour=0, minute=0, second=0, microsecond=0)
+
+def apply_rollups(session, rows):
+    """UsageLog 행(dict) 목록을 시간/일 롤업 테이블에 UPSERT로 누적 (호출한 쪽 트랜잭션에서 실행)"""
+    from apps.dbmodels import UsageRollupDaily, UsageRollupHourly
+    for model, truncate in ((UsageRollupHourly, _hour), (UsageRollupDaily, _day)):
+        totals = Counter()
+        for row in rows:
+            if row.get('usage_count', 1):
+                key = (truncate(row['timestamp']), row.get('user_id') or 0, row.get('api_key_id') or 0,
+                       row['service_id'], row['usage_type'])
+                totals[key] += row.get('usage_count', 1)
+        if not totals:
+            continue
+        table = model.__table__
+        stmt = dialect_insert(table)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=['bucket', 'user_id', 'api_key_id', 'service_id', 'usage_type'],
+            set_={'usage_count': table.c.usage_count + stmt.excluded.usage_count},
+        )
+        session.execute(stmt, [
+            dict(bucket=bucket, user_id=user_id, api_key_id=api_key_id, service_id=service_id,
+                 usage_type=usage_type, usage_count=count)
+            for (bucket, user_id, api_key_id, service_id, usage_type), count in totals.items()
+        ])
+
+def rebuild_rollups(since=None, chunk_size=5000):
+    """usage_logs 전체(또는 since 날짜 이후)로 롤업 테이블을 다시 계산. 반환: {테이블명: 행 수}"""
+    from sqlalchemy import delete, func, insert
+    from apps.dbmodels import UsageLog, UsageRollupDaily, UsageRollupHourly
+    from apps.extensions import db
+    if since is not None:
+        since = _day(since)
+    if db.engine.dialect.name == 'sqlite':
+        buckets = {UsageRollupHourly: func.strftime('%Y-%m-%d %H:00:00', UsageLog.timestamp),
+                   UsageRollupDaily: func.strftime('%Y-%m-%d 00:00:00', UsageLog.timestamp)}
+    else:
+        buckets = {UsageRollupHourly: func.date_trunc('hour', UsageLog.timestamp),
+                   UsageRollupDaily: func.date_trunc('day', UsageLog.timestamp)}
+    counts = {}
+    for model, bucket in buckets.items():
+        cleanup = delete(model)
+        query = db.session.query(
+            bucket, func.coalesce(UsageLog.user_id, 0), func.coalesce(UsageLog.api_key_id, 0),
+            UsageLog.service_id, UsageLog.usage_type, func.sum(UsageLog.usage_count),
+        ).filter(UsageLog.usage_count > 0)
+        if since is not None:
+            cleanup = cleanup.where(model.bucket >= since)
+            query = query.filter(UsageLog.timestamp >= since)
+        db.session.execute(cleanup)
+        query = query.group_by(bucket, func.coalesce(UsageLog.user_id, 0), func.coalesce(UsageLog.api_key_id, 0),
+                               UsageLog.service_id, UsageLog.usage_type)
+        rows = []
+        counts[model.__tablename__] = 0
+        for bucket_value, user_id, api_key_id, service_id, usage_type, total in query.yield_per(chunk_size):
+            if isinstance(bucket_value, str):
+                bucket_value = datetime.fromisoformat(bucket_value)
+            rows.append(dict(bucket=bucket_value, user_id=user_id, api_key_id=api_key_id, service_id=service_id,
+                             usage_type=usage_type, usage_count=total))
+            if len(rows) >= chunk_size:
+                db.session.execute(insert(model.__table__), rows)
+                counts[model.__tablename__] += len(rows)
+                rows = []
+        if rows:
+            db.session.execute(insert(model.__table__), rows)
+            counts[model.__tablename__] += len(rows)
+    db.session.commit()
+    return counts
+
+class UsageLogWriter:
+    """
+    사용 이벤트를 메모리 큐에 모았다가 batch_size개가 쌓이거나 flush_interval초가 지나면
+    한 번의 bulk insert + commit으로 저장한다. 큐가 가득 차면 이벤트를 버리고 dropped를 센다.
+    """
+    def __init__(self, batch_size=200, flush_interval=2.0, max_queue=10000, max_delay=10.0):
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_queue = max_queue
+        self.max_delay = max_delay   # 이보다 늦게 저장된 이벤트는 delayed로 집계
+        self.enabled = True          # False면 요청 스레드에서 바로 저장 (테스트/CLI용)
+        self.app = None
+        self._queue = queue.Queue(max_queue)
+        self._stop = threading.Event()
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._worker = None
+        self._pid = None
+        self.written = self.dropped = self.delayed = self.failed = 0
+    def init_app(self, app):
+        self.app = app
+        self.batch_size = app.config.get('USAGE_LOG_BATCH_SIZE', self.batch_size)
+        self.flush_interval = app.config.get('USAGE_LOG_FLUSH_INTERVAL', self.flush_interval)
+        self.max_queue = app.config.get('USAGE_LOG_MAX_QUEUE', self.max_queue)
+        self.max_delay = app.config.get('USAGE_LOG_MAX_DELAY', self.max_delay)
+        self.enabled = app.config.get('USAGE_LOG_ASYNC', self.enabled)
+        self._queue = queue.Queue(self.max_queue)
+        atexit.register(self.shutdown)   # 워커 종료 시 남은 이벤트 저장
+    def record(self, **fields):
+        """UsageLog 컬럼 값으로 이벤트 하나를 큐에 추가 (DB 작업 없음)"""
+        now = datetime.now()
+        fields.setdefault('timestamp', now)
+        fields.setdefault('last_used', now)
+        if not self.enabled:
+            self._write([(time.monotonic(), fields)])
+            return
+        self._ensure_worker()
+        try:
+            self._queue.put_nowait((time.monotonic(), fields))
+        except queue.Full:
+            with self._lock:
+                self.dropped += 1
+            logging.warning('UsageLog 큐가 가득 차서 이벤트를 버렸습니다.')
+    def _ensure_worker(self):
+        # gunicorn fork 이후 프로세스마다 기록 스레드를 새로 시작
+        if self._worker is not None and self._pid == os.getpid() and self._worker.is_alive():
+            return
+        with self._lock:
+            if self._worker is None or self._pid != os.getpid() or not self._worker.is_alive():
+                self._queue = queue.Queue(self.max_queue)
+                self._stop.clear()
+                self._pid = os.getpid()
+                self._worker = threading.Thread(target=self._run, name='usage-log-writer', daemon=True)
+                self._worker.start()
+    def _drain(self, limit):
+        events = []
+        while len(events) < limit:
+            try:
+                events.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return events
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                first = self._queue.get(timeout=self.flush_interval)
+            except queue.Empty:
+                continue
+            deadline = time.monotonic() + self.flush_interval
+            events = [first]
+            while len(events) < self.batch_size and not self._stop.is_set():
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    events.append(self._queue.get(timeout=remaining))
+                except queue.Empty:
+                    break
+            self._write(events)
+    def _insert(self, rows):
+        from sqlalchemy import insert
+        from apps.dbmodels import UsageLog
+        from apps.extensions import db
+        from apps.quota import apply_counters
+        # quota_reserved(예약량, 예약 시각)는 카운터 정산용이며 usage_logs 컬럼이 아님
+        db.session.execute(insert(UsageLog), [{key: value for key, value in row.items() if key != 'quota_reserved'}
+                                              for row in rows])
+        apply_rollups(db.session, rows)   # 대시보드용 롤업도 같은 트랜잭션에서 누적
+        apply_counters(db.session, rows)  # 사용량 제한 카운터와 usage_count도 함께
+        db.session.commit()
+    def _write(self, events):
+        from sqlalchemy.exc import IntegrityError
+        from apps.extensions import db
+        if not events:
+            return
+        with self._flush_lock, self.app.app_context():
+            try:
+                self._insert([fields for _, fields in events])
+            except IntegrityError:
+                # 저장 전에 사용자/API 키/서비스가 삭제된 이벤트(FK 위반)가 섞인 경우:
+                # 배치 전체를 버리지 않고 한 건씩 다시 저장하여 해당 이벤트만 제외
+                db.session.rollback()
+                saved = []
+                for event in events:
+                    try:
+                        self._insert([event[1]])
+                        saved.append(event)
+                    except IntegrityError:
+                        db.session.rollback()
+                if len(saved) < len(events):
+                    with self._lock:
+                        self.failed += len(events) - len(saved)
+                    logging.warning('삭제된 사용자/API 키/서비스의 UsageLog %d건을 버렸습니다.', len(events) - len(saved))
+                events = saved
+            except Exception:
+                db.session.rollback()
+                with self._lock:
+                    self.failed += len(events)
+                logging.exception('UsageLog 일괄 저장 실패 (%d건)', len(events))
+                return
+        now = time.monotonic()
+        with self._lock:
+            self.written += len(events)
+            self.delayed += sum(1 for queued_at, _ in events if now - queued_at > self.max_delay)
+    def flush(self):
+        """큐에 남은 이벤트를 현재 스레드에서 모두 저장"""
+        while True:
+            events = self._drain(self.batch_size)
+            if not events:
+                break
+            self._write(events)
+    def shutdown(self, timeout=5.0):
+        self._stop.set()
+        worker = self._worker
+        if worker is not None and worker.is_alive() and self._pid == os.getpid():
+            worker.join(timeout)
+        if self.app is not None and self._pid == os.getpid():
+            self.flush()
+    def stats(self):
+        with self._lock:
+            return {"queued": self._queue.qsize(), "written": self.written, "dropped": self.dropped,
+                    "delayed": self.delayed, "failed": self.failed}
@@ -0,0 +1,55 @@
+# benchmarks/common.py
+# 벤치마크 공통 함수: 임시 DB 준비, 백분위수 계산, 결과 출력
+import json
+import os
+import sys
+import tempfile
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+def temp_database(name='bench.sqlite3'):
+    """임시 디렉터리의 SQLite 파일 경로 (instance/mydb.sqlite3는 건드리지 않음)"""
+    return os.path.join(tempfile.mkdtemp(prefix='ai-service-bench-'), name)
+
+def create_bench_app(db_path, **config):
+    """db_path를 사용하는 앱 생성 + 테이블 생성. config로 Config 값을 덮어쓴다."""
+    os.environ['DATABASE_URL'] = 'sqlite:///' + db_path
+    os.environ.setdefault('SECRET_KEY', 'benchmark')
+    from apps.config import Config
+    for key, value in config.items():
+        setattr(Config, key, value)
+    Config.SQLALCHEMY_DATABASE_URI = os.environ['DATABASE_URL']
+    from apps import create_app
+    from apps.bootstrap import init_db
+    app = create_app()
+    with app.app_context():
+        init_db()
+    return app
+
+def percentile(values, p):
+    """nearest-rank 백분위수 (values가 비어 있으면 None)"""
+    if not values:
+        return None
+    ordered = sorted(values)
+    index = max(0, min(len(ordered) - 1, int(round(p / 100.0 * len(ordered))) - 1))
+    return ordered[index]
+
+def latency_summary(seconds):
+    """지연 시간 목록(초) -> {count, p50, p95, p99, max} (밀리초)"""
+    ms = [s * 1000 for s in seconds]
+    summary = {'count': len(ms)}
+    for p in (50, 95, 99):
+        value = percentile(ms, p)
+        summary[f'p{p}_ms'] = round(value, 3) if value is not None else None
+    summary['max_ms'] = round(max(ms), 3) if ms else None
+    return summary
+
+def write_results(results, output=None):
+    """결과를 JSON으로 출력하고 output 경로가 있으면 파일로도 저장"""
+    text = json.dumps(results, ensure_ascii=False, indent=2, default=str)
+    print(text)
+    if output:
+        with open(output, 'w', encoding='utf-8') as f:
+            f.write(text + '\n')
@@ -0,0 +1,153 @@
+# benchmarks/routes.py
+# 주요 라우트 처리량/지연 시간 측정 (Flask test client, seed.py 데이터 사용)
+#   python benchmarks/routes.py --scale small --requests 200 --output results.json
+#   python benchmarks/routes.py --db /tmp/bench.sqlite3 --compare results.json   # 이미 만든 DB 재사용 + 이전 결과와 비교
+# 결과는 라우트별 rps, p50/p95/p99(ms), 응답 코드별 개수를 JSON으로 남긴다.
+import argparse
+import json
+import os
+import platform
+import random
+import subprocess
+import threading
+import time
+from datetime import datetime
+from common import ROOT, create_bench_app, latency_summary, temp_database, write_results
+from seed import scale_from_args, scale_options, seed
+
+def route_table(fixtures, rng):
+    """이름 -> (클라이언트 종류, 요청 함수). 요청 함수는 (client) -> response"""
+    def services(c):
+        return c.get('/services')
+    def services_search(c):
+        return c.get('/services', query_string={'query': rng.choice(['분류', '예측', 'vision'])})
+    def service_detail(c):
+        return c.get(f"/service/{rng.randint(1, fixtures['services'])}")
+    def predict_iris(c):
+        features = {'sepal_length': round(rng.uniform(4, 8), 1), 'sepal_width': round(rng.uniform(2, 4.5), 1),
+                    'petal_length': round(rng.uniform(1, 7), 1), 'petal_width': round(rng.uniform(0.1, 2.5), 1)}
+        return c.post('/api/predict/iris', json=features, headers={'X-API-Key': fixtures['api_key']})
+    def predict_loan_batch(c):
+        records = [{'age': rng.randint(20, 70), 'balance': rng.randint(0, 50000)} for _ in range(100)]
+        return c.post('/api/predict/loan/batch', json={'records': records}, headers={'X-API-Key': fixtures['api_key']})
+    def usage_history(c):
+        return c.get('/mypagex/usage_history')
+    def manage_users(c):
+        return c.get('/adminx/manage_users', query_string={'page': rng.randint(1, 20)})
+    def admin_subscriptions(c):
+        return c.get('/adminx/subscriptions', query_string={'status': rng.choice(['pending', 'approved', 'rejected'])})
+    def admin_dashboard(c):
+        return c.get('/adminx/dashboard')
+    return {
+        'main.services': ('user', services),
+        'main.services?query': ('user', services_search),
+        'main.service_detail': ('user', service_detail),
+        'main.predict_iris': ('anonymous', predict_iris),
+        'main.predict_loan_batch': ('anonymous', predict_loan_batch),
+        'mypagex.usage_history': ('user', usage_history),
+        'adminx.manage_users': ('admin', manage_users),
+        'adminx.subscriptions': ('admin', admin_subscriptions),
+        'adminx.dashboard': ('admin', admin_dashboard),
+    }
+
+def make_client(app, user_id=None):
+    client = app.test_client()
+    if user_id is not None:   # 로그인 세션 (Flask-Login)
+        with client.session_transaction() as session:
+            session['_user_id'] = str(user_id)
+            session['_fresh'] = True
+    return client
+
+def measure(app, fixtures, kind, request_fn, requests, warmup, threads):
+    users = {'anonymous': None, 'user': fixtures['user_id'], 'admin': fixtures['admin_id']}
+    latencies, statuses, lock = [], {}, threading.Lock()
+    def run(count):
+        client = make_client(app, users[kind])
+        local = []
+        for _ in range(count):
+            started = time.perf_counter()
+            response = request_fn(client)
+            local.append(time.perf_counter() - started)
+            with lock:
+                statuses[response.status_code] = statuses.get(response.status_code, 0) + 1
+        with lock:
+            latencies.extend(local)
+    run(warmup)
+    latencies.clear()
+    statuses.clear()
+    per_thread = max(1, requests // threads)
+    workers = [threading.Thread(target=run, args=(per_thread,)) for _ in range(threads)]
+    started = time.perf_counter()
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    elapsed = time.perf_counter() - started
+    return dict(latency_summary(latencies), rps=round(len(latencies) / elapsed, 1),
+                errors=sum(n for code, n in statuses.items() if code >= 400), statuses=statuses)
+
+def git_revision():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def compare(results, baseline_path):
+    """이전 결과 대비 p95/rps 변화율 출력 (p95가 20% 이상 늘면 REGRESSION 표시)"""
+    with open(baseline_path, encoding='utf-8') as f:
+        baseline = json.load(f)['routes']
+    print(f"{'route':28} {'p95 before':>11} {'p95 after':>10} {'rps before':>11} {'rps after':>10}")
+    for name, after in results['routes'].items():
+        before = baseline.get(name)
+        if not before or not before.get('p95_ms') or not after.get('p95_ms'):
+            continue
+        flag = '  REGRESSION' if after['p95_ms'] > before['p95_ms'] * 1.2 else ''
+        print(f"{name:28} {before['p95_ms']:>11.2f} {after['p95_ms']:>10.2f} {before['rps']:>11.1f} {after['rps']:>10.1f}{flag}")
+
+def fixtures_from_db():
+    """이미 seed된 DB에서 벤치마크 고정 값 조회 (seed.py와 같은 규칙)"""
+    from apps.dbmodels import APIKey, Service, User
+    from apps.extensions import db
+    return {'admin_id': 1, 'user_id': 2, 'api_key': APIKey.query.filter_by(user_id=2).first().key_string,
+            'services': db.session.query(db.func.max(Service.id)).scalar(),
+            'users': db.session.query(db.func.max(User.id)).scalar()}
+
+def main():
+    parser = argparse.ArgumentParser(description='라우트별 처리량/지연 시간 벤치마크')
+    parser.add_argument('--db', help='seed.py로 만든 DB 경로 (없으면 임시 DB를 만들어 seed)')
+    scale_options(parser)
+    parser.add_argument('--requests', type=int, default=200, help='라우트별 측정 요청 수')
+    parser.add_argument('--warmup', type=int, default=20, help='라우트별 워밍업 요청 수 (측정 제외)')
+    parser.add_argument('--threads', type=int, default=1, help='동시 요청 스레드 수')
+    parser.add_argument('--routes', help='측정할 라우트 (쉼표 구분, 기본: 전체)')
+    parser.add_argument('--output', help='결과 JSON 저장 경로')
+    parser.add_argument('--compare', help='비교할 이전 결과 JSON')
+    args = parser.parse_args()
+    db_path = args.db or temp_database('routes.sqlite3')
+    seeded = args.db and os.path.exists(args.db)
+    # 측정 대상이 아닌 CSRF/사용량 제한/할당량은 끔 (시드 한도 1000/일로는 배치 요청이 곧 429가 됨)
+    app = create_bench_app(db_path, WTF_CSRF_ENABLED=False, RATELIMIT_ENABLED=False, QUOTA_ENABLED=False)
+    scale = scale_from_args(args)
+    with app.app_context():
+        fixtures = fixtures_from_db() if seeded else seed(seed=args.seed, **scale)
+    rng = random.Random(args.seed)
+    table = route_table(fixtures, rng)
+    selected = args.routes.split(',') if args.routes else list(table)
+    results = {
+        'meta': {'revision': git_revision(), 'timestamp': datetime.now().isoformat(timespec='seconds'),
+                 'python': platform.python_version(), 'db': db_path, 'scale': None if seeded else scale,
+                 'requests': args.requests, 'warmup': args.warmup, 'threads': args.threads},
+        'routes': {},
+    }
+    for name in selected:
+        kind, request_fn = table[name]
+        results['routes'][name] = measure(app, fixtures, kind, request_fn, args.requests, args.warmup, args.threads)
+    from apps.extensions import usage_writer
+    usage_writer.flush()   # 남은 사용 로그 기록 (측정 이후)
+    write_results(results, args.output)
+    if args.compare:
+        compare(results, args.compare)
+
+if __name__ == '__main__':
+    main()
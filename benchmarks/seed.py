@@ -0,0 +1,163 @@
+# benchmarks/seed.py
+# 벤치마크용 데이터 생성: 사용자/서비스/구독/API 키/사용 로그/예측 결과를 Core bulk insert로 채움
+#   python benchmarks/seed.py --db /tmp/bench.sqlite3 --scale medium
+#   python benchmarks/seed.py --db /tmp/bench.sqlite3 --usage-logs 3000000   # 규모 개별 지정
+# 같은 --seed면 같은 데이터가 만들어진다 (결과 비교용).
+import argparse
+import random
+import time
+import uuid
+from datetime import datetime, timedelta
+from common import create_bench_app, temp_database, write_results
+
+SCALES = {
+    'small':  {'users': 200,    'services': 10,  'usage_logs': 50000,    'predictions': 20000},
+    'medium': {'users': 2000,   'services': 30,  'usage_logs': 1000000,  'predictions': 200000},
+    'large':  {'users': 10000,  'services': 100, 'usage_logs': 5000000,  'predictions': 1000000},
+}
+KEYWORDS = ['이미지', '분류', '예측', '대출', '붓꽃', '텍스트', '감성', '추천', '이상탐지', '번역', 'vision', 'nlp']
+BENCH_PASSWORD = 'benchmark'
+DAYS = 90   # 사용 로그/예측 결과의 기간 (최근 N일)
+
+def bulk_insert(table, rows, chunk_size=20000):
+    """rows(iterable of dict)를 chunk_size개씩 executemany + commit. 삽입한 행 수"""
+    from apps.extensions import db
+    count, chunk = 0, []
+    for row in rows:
+        chunk.append(row)
+        if len(chunk) >= chunk_size:
+            db.session.execute(table.insert(), chunk)
+            db.session.commit()
+            count, chunk = count + len(chunk), []
+    if chunk:
+        db.session.execute(table.insert(), chunk)
+        db.session.commit()
+        count += len(chunk)
+    return count
+
+def seed(users, services, usage_logs, predictions, seed=42, chunk_size=20000):
+    """앱 컨텍스트 안에서 호출. 빈 DB 기준으로 id를 1부터 부여한다. 벤치마크에 쓸 고정 값(dict)을 반환"""
+    from werkzeug.security import generate_password_hash
+    from apps.dbmodels import (APIKey, IrisResult, LoanResult, PredictionResult, Service, Subscription,
+                               UsageLog, UsageType, User)
+    from apps.inference import IRIS_LABELS, LOAN_LABELS
+    from apps.usage import rebuild_rollups
+    from apps.search import create_search_index
+    rng = random.Random(seed)
+    now = datetime.now().replace(microsecond=0)
+    def past(days=DAYS):
+        return now - timedelta(seconds=rng.randint(0, days * 86400))
+    counts, started = {}, time.perf_counter()
+    # 사용자: 1번은 관리자, 나머지는 일반 사용자 (비밀번호 해시는 하나만 계산해서 재사용)
+    password_hash = generate_password_hash(BENCH_PASSWORD)
+    counts['users'] = bulk_insert(User.__table__, ({
+        'id': i, 'username': f'user{i}', 'email': f'user{i}@example.com', 'password_hash': password_hash,
+        'is_admin': i == 1, 'is_active': rng.random() > 0.05 or i <= 2, 'usage_count': 0,
+        'daily_limit': 1000, 'monthly_limit': 5000, 'created_at': past(365), 'updated_at': now,
+    } for i in range(1, users + 1)), chunk_size)
+    # 서비스: 1, 2번은 실제 예측 엔드포인트 (붓꽃, 대출)
+    endpoints = {1: ('붓꽃 품종 분류', 'main.predict_iris'), 2: ('대출 승인 예측', 'main.predict_loan')}
+    counts['services'] = bulk_insert(Service.__table__, ({
+        'id': i, 'servicename': endpoints.get(i, (f'AI 서비스 {i}',))[0],
+        'service_endpoint': endpoints.get(i, (None, None))[1],
+        'description': f'{" ".join(rng.sample(KEYWORDS, 3))} 모델을 제공하는 서비스 {i}',
+        'keywords': ','.join(rng.sample(KEYWORDS, 2)), 'is_active': i <= 2 or rng.random() > 0.2,
+        'is_auto': rng.random() > 0.5, 'price': rng.choice([0, 100, 500, 1000]),
+        'created_at': past(365), 'updated_at': now,
+    } for i in range(1, services + 1)), chunk_size)
+    # 구독: 사용자마다 1~5개 서비스 (승인 70%, 대기 20%, 거부 10%), 2번 사용자는 예측 서비스 모두 승인
+    def subscription_rows():
+        for user_id in range(1, users + 1):
+            service_ids = set(rng.sample(range(1, services + 1), min(services, rng.randint(1, 5))))
+            if user_id == 2:
+                service_ids |= {1, 2}
+            for service_id in sorted(service_ids):
+                status = 'approved' if user_id == 2 and service_id <= 2 else \
+                    rng.choices(['approved', 'pending', 'rejected'], [7, 2, 1])[0]
+                requested = past()
+                yield {'user_id': user_id, 'service_id': service_id, 'status': status, 'request_date': requested,
+                       'approval_date': requested + timedelta(hours=1) if status != 'pending' else None}
+    counts['subscriptions'] = bulk_insert(Subscription.__table__, subscription_rows(), chunk_size)
+    # API 키: 사용자마다 1~2개, id = 사용자 id * 2 - 1 (+1)
+    key_rng = random.Random(seed + 1)
+    api_keys = {}   # user_id -> [api_key_id]
+    def api_key_rows():
+        for user_id in range(1, users + 1):
+            for n in range(1 if user_id % 3 else 2):
+                key_id = user_id * 2 - 1 + n
+                api_keys.setdefault(user_id, []).append(key_id)
+                yield {'id': key_id, 'user_id': user_id, 'description': f'bench key {n}', 'is_active': True,
+                       'key_string': uuid.UUID(int=key_rng.getrandbits(128)).hex, 'created_at': past(365),
+                       'usage_count': 0, 'daily_limit': 1000000, 'monthly_limit': 100000000}
+    counts['api_keys'] = bulk_insert(APIKey.__table__, api_key_rows(), chunk_size)
+    # 사용 로그: 시간 순서 없이 최근 DAYS일에 분포, 절반은 API 키 사용
+    usage_types = [UsageType.API_KEY, UsageType.WEB_UI, UsageType.LOGIN]
+    def usage_rows():
+        for _ in range(usage_logs):
+            user_id = rng.randint(1, users)
+            usage_type = rng.choices(usage_types, [5, 4, 1])[0]
+            timestamp = past()
+            yield {'user_id': user_id, 'service_id': rng.randint(1, services),
+                   'api_key_id': rng.choice(api_keys[user_id]) if usage_type is UsageType.API_KEY else None,
+                   'endpoint': '/api/predict/iris', 'usage_type': usage_type, 'usage_count': 1,
+                   'timestamp': timestamp, 'last_used': timestamp, 'remote_addr': '127.0.0.1',
+                   'response_status_code': 200}
+    counts['usage_logs'] = bulk_insert(UsageLog.__table__, usage_rows(), chunk_size)
+    # 예측 결과: prediction_results + iris_results / loan_results (조인 상속, 같은 id)
+    base, iris, loan = PredictionResult.__table__, IrisResult.__table__, LoanResult.__table__
+    for start in range(1, predictions + 1, chunk_size):
+        base_rows, iris_rows, loan_rows = [], [], []
+        for prediction_id in range(start, min(start + chunk_size, predictions + 1)):
+            user_id = rng.randint(1, users)
+            kind = rng.choice(['iris', 'loan'])
+            confirm = rng.random() < 0.1
+            predicted = rng.choice(IRIS_LABELS if kind == 'iris' else LOAN_LABELS)
+            base_rows.append({'id': prediction_id, 'user_id': user_id, 'service_id': 1 if kind == 'iris' else 2,
+                              'api_key_id': rng.choice(api_keys[user_id]) if rng.random() < 0.7 else None,
+                              'predicted_class': predicted, 'model_version': '1.0', 'confirm': confirm,
+                              'confirmed_class': predicted if confirm else None, 'created_at': past(), 'type': kind})
+            if kind == 'iris':
+                iris_rows.append({'id': prediction_id, 'sepal_length': round(rng.uniform(4, 8), 1),
+                                  'sepal_width': round(rng.uniform(2, 4.5), 1),
+                                  'petal_length': round(rng.uniform(1, 7), 1), 'petal_width': round(rng.uniform(0.1, 2.5), 1)})
+            else:
+                loan_rows.append({'id': prediction_id, 'age': rng.randint(20, 70), 'balance': rng.randint(0, 50000)})
+        bulk_insert(base, base_rows, chunk_size)
+        bulk_insert(iris, iris_rows, chunk_size)
+        bulk_insert(loan, loan_rows, chunk_size)
+    counts['predictions'] = predictions
+    # 대시보드용 롤업과 검색 인덱스 재생성
+    counts.update({f'rollup:{k}': v for k, v in rebuild_rollups().items()})
+    create_search_index(rebuild=True)
+    counts['seconds'] = round(time.perf_counter() - started, 1)
+    from apps.extensions import db
+    user_key = db.session.execute(APIKey.__table__.select().where(APIKey.__table__.c.user_id == 2)).first()
+    return {'counts': counts, 'admin_id': 1, 'user_id': 2, 'api_key': user_key.key_string,
+            'services': services, 'users': users}
+
+def scale_options(parser):
+    parser.add_argument('--scale', choices=sorted(SCALES), default='small', help='데이터 규모 (기본: small)')
+    for name in ('users', 'services', 'usage_logs', 'predictions'):
+        parser.add_argument('--' + name.replace('_', '-'), type=int, default=None, help=f'{name} 행 수 (scale 값 대신)')
+    parser.add_argument('--seed', type=int, default=42, help='난수 시드')
+
+def scale_from_args(args):
+    scale = dict(SCALES[args.scale])
+    for name in scale:
+        if getattr(args, name) is not None:
+            scale[name] = getattr(args, name)
+    return scale
+
+def main():
+    parser = argparse.ArgumentParser(description='벤치마크용 데이터 생성')
+    parser.add_argument('--db', help='생성할 SQLite 파일 경로 (기본: 임시 파일, 비어 있어야 함)')
+    scale_options(parser)
+    args = parser.parse_args()
+    db_path = args.db or temp_database('seed.sqlite3')
+    app = create_bench_app(db_path)
+    with app.app_context():
+        fixtures = seed(seed=args.seed, **scale_from_args(args))
+    write_results(dict(fixtures, db=db_path))
+
+if __name__ == '__main__':
+    main()
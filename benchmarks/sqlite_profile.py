@@ -0,0 +1,116 @@
+# benchmarks/sqlite_profile.py
+# SQLite 설정별 읽기/쓰기 혼합 처리량 비교 (gunicorn 워커처럼 프로세스마다 엔진을 따로 생성)
+#   python benchmarks/sqlite_profile.py --workers 4 --duration 10 --write-ratio 0.2
+# 기본(롤백 저널, synchronous=FULL)과 Config.SQLITE_PRAGMAS(WAL 등) 프로필을 각각 새 임시 DB에서 측정한다.
+import argparse
+import multiprocessing
+import random
+import sqlite3
+import time
+from datetime import datetime, timedelta
+from common import create_bench_app, latency_summary, temp_database, write_results
+
+# 설정 전 SQLite 기본값 (busy_timeout은 pysqlite 기본 timeout=5초와 동일)
+DEFAULT_PRAGMAS = {'busy_timeout': 5000, 'journal_mode': 'DELETE', 'synchronous': 'FULL', 'foreign_keys': 'ON'}
+
+def seed(db_path, users, services, rows):
+    from apps.dbmodels import Service, UsageLog, UsageType, User
+    from apps.extensions import db
+    now = datetime.now()
+    db.session.execute(User.__table__.insert(), [
+        {'id': i, 'username': f'bench{i}', 'email': f'bench{i}@example.com', 'password_hash': 'x',
+         'is_admin': False, 'is_active': True} for i in range(1, users + 1)])
+    db.session.execute(Service.__table__.insert(), [
+        {'id': i, 'servicename': f'bench-service-{i}', 'description': 'benchmark', 'keywords': 'bench',
+         'is_active': True, 'is_auto': True, 'price': 0} for i in range(1, services + 1)])
+    db.session.execute(UsageLog.__table__.insert(), [
+        {'user_id': random.randint(1, users), 'service_id': random.randint(1, services), 'endpoint': 'bench',
+         'usage_type': UsageType.API_KEY, 'usage_count': 1, 'timestamp': now - timedelta(minutes=i),
+         'last_used': now} for i in range(rows)])
+    db.session.commit()
+
+def worker(db_path, pragmas, engine_options, duration, write_ratio, users, services, results):
+    from sqlalchemy import create_engine, func, select
+    from sqlalchemy.exc import OperationalError
+    from apps.dbmodels import Service, UsageLog, UsageType
+    from apps.dbprofile import SQLiteProfile
+    SQLiteProfile(pragmas)
+    engine = create_engine('sqlite:///' + db_path, **engine_options)
+    logs, services_table = UsageLog.__table__, Service.__table__
+    reads, writes, errors = [], [], 0
+    deadline = time.monotonic() + duration
+    while time.monotonic() < deadline:
+        user_id = random.randint(1, users)
+        started = time.perf_counter()
+        try:
+            if random.random() < write_ratio:
+                now = datetime.now()
+                with engine.begin() as conn:
+                    conn.execute(logs.insert().values(
+                        user_id=user_id, service_id=random.randint(1, services), endpoint='bench',
+                        usage_type=UsageType.API_KEY, usage_count=1, timestamp=now, last_used=now))
+                writes.append(time.perf_counter() - started)
+            else:
+                with engine.connect() as conn:
+                    conn.execute(select(func.count(), func.sum(logs.c.usage_count))
+                                 .where(logs.c.user_id == user_id)
+                                 .where(logs.c.timestamp >= datetime.now() - timedelta(days=7))).one()
+                    conn.execute(select(services_table).where(services_table.c.is_active == True)).all()
+                reads.append(time.perf_counter() - started)
+        except OperationalError:   # database is locked (busy_timeout 초과)
+            errors += 1
+    engine.dispose()
+    results.put({'reads': reads, 'writes': writes, 'errors': errors})
+
+def run_profile(name, pragmas, args):
+    from apps.config import Config
+    db_path = temp_database(f'{name}.sqlite3')
+    app = create_bench_app(db_path, SQLITE_PRAGMAS=pragmas)
+    with app.app_context():
+        seed(db_path, args.users, args.services, args.rows)
+        from apps.extensions import db
+        db.engine.dispose()
+    # 저널 모드는 DB 파일에 기록되므로 워커 시작 전에 한 번 전환
+    conn = sqlite3.connect(db_path)
+    conn.execute(f"PRAGMA journal_mode={pragmas.get('journal_mode') or 'DELETE'}")
+    conn.close()
+    ctx = multiprocessing.get_context('spawn')
+    results = ctx.Queue()
+    processes = [ctx.Process(target=worker, args=(db_path, pragmas, Config.SQLALCHEMY_ENGINE_OPTIONS, args.duration,
+                                                  args.write_ratio, args.users, args.services, results))
+                 for _ in range(args.workers)]
+    for p in processes:
+        p.start()
+    collected = [results.get() for _ in processes]
+    for p in processes:
+        p.join()
+    reads = [t for r in collected for t in r['reads']]
+    writes = [t for r in collected for t in r['writes']]
+    return {
+        'pragmas': pragmas,
+        'ops_per_sec': round((len(reads) + len(writes)) / args.duration, 1),
+        'reads_per_sec': round(len(reads) / args.duration, 1),
+        'writes_per_sec': round(len(writes) / args.duration, 1),
+        'errors': sum(r['errors'] for r in collected),
+        'read_latency': latency_summary(reads),
+        'write_latency': latency_summary(writes),
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description='SQLite PRAGMA 프로필별 읽기/쓰기 혼합 벤치마크')
+    parser.add_argument('--workers', type=int, default=4, help='워커 프로세스 수')
+    parser.add_argument('--duration', type=float, default=10, help='프로필별 측정 시간(초)')
+    parser.add_argument('--write-ratio', type=float, default=0.2, help='쓰기 비율 (0~1)')
+    parser.add_argument('--users', type=int, default=200)
+    parser.add_argument('--services', type=int, default=10)
+    parser.add_argument('--rows', type=int, default=50000, help='미리 넣어 둘 usage_logs 행 수')
+    parser.add_argument('--output', help='결과 JSON 저장 경로')
+    args = parser.parse_args()
+    from apps.config import Config
+    results = {'workers': args.workers, 'duration': args.duration, 'write_ratio': args.write_ratio,
+               'default': run_profile('default', DEFAULT_PRAGMAS, args),
+               'tuned': run_profile('tuned', dict(Config.SQLITE_PRAGMAS), args)}
+    write_results(results, args.output)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,55 @@
+# benchmarks/startup.py
+# 워커 콜드 스타트 시간: 새 파이썬 프로세스에서 import + create_app() (+ 첫 요청)까지 걸리는 시간
+#   python benchmarks/startup.py --runs 10
+# 무거운 의존성(pandas, sklearn, torch, cv2 등)이 시작 경로에서 import되면 heavy_modules에 표시된다.
+import argparse
+import json
+import os
+import subprocess
+import sys
+from common import ROOT, latency_summary, temp_database, write_results
+
+HEAVY_MODULES = ['pandas', 'numpy', 'sklearn', 'scipy', 'torch', 'cv2', 'joblib', 'PIL']
+
+# 자식 프로세스에서 실행: gunicorn 워커가 apps.run:app을 불러오는 것과 같은 경로
+CHILD = '''
+import json, sys, time
+started = time.perf_counter()
+from apps import create_app
+imported = time.perf_counter()
+app = create_app()
+created = time.perf_counter()
+status = app.test_client().get('/').status_code
+requested = time.perf_counter()
+print(json.dumps({"import": imported - started, "create_app": created - imported,
+                  "first_request": requested - created, "status": status,
+                  "heavy_modules": [m for m in %r if m in sys.modules]}))
+''' % (HEAVY_MODULES,)
+
+def run_once(env):
+    out = subprocess.run([sys.executable, '-c', CHILD], cwd=ROOT, env=env, capture_output=True, text=True, check=True)
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+def main():
+    parser = argparse.ArgumentParser(description='워커 콜드 스타트 시간 측정')
+    parser.add_argument('--runs', type=int, default=10, help='측정 횟수 (매번 새 프로세스)')
+    parser.add_argument('--output', help='결과 JSON 저장 경로')
+    args = parser.parse_args()
+    db_path = temp_database('startup.sqlite3')
+    env = dict(os.environ, DATABASE_URL='sqlite:///' + db_path, SECRET_KEY=os.environ.get('SECRET_KEY', 'benchmark'))
+    # 스키마는 배포 단계처럼 미리 한 번만 생성 (워커 시작 시간에는 포함하지 않음)
+    subprocess.run([sys.executable, '-m', 'flask', '--app', 'apps.run', 'init-db'], cwd=ROOT, env=env,
+                   capture_output=True, check=True)
+    samples = [run_once(env) for _ in range(args.runs)]
+    totals = [s['import'] + s['create_app'] for s in samples]
+    write_results({
+        'runs': args.runs,
+        'startup': latency_summary(totals),
+        'import': latency_summary([s['import'] for s in samples]),
+        'create_app': latency_summary([s['create_app'] for s in samples]),
+        'first_request': latency_summary([s['first_request'] for s in samples]),
+        'heavy_modules': sorted({m for s in samples for m in s['heavy_modules']}),
+    }, args.output)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,8 @@
+# gunicorn.conf.py   gunicorn 실행 디렉터리의 이 파일을 자동으로 읽음 (gunicorn apps.run:app)
+# 워커 수는 WEB_CONCURRENCY, 포트는 PORT 환경 변수를 gunicorn이 직접 사용한다
+
+def on_starting(server):
+    """워커 fork 전에 master에서 한 번만 테이블 생성 + 최초 관리자 계정 준비 (워커마다 반복하지 않음)"""
+    from apps import create_app
+    from apps.bootstrap import bootstrap
+    bootstrap(create_app())
@@ -0,0 +1,40 @@
+"""add composite indexes for metering and listing queries
+
+Revision ID: 2e821228db4e
+Revises: c9aa41d5feee
+Create Date: 2026-10-18 16:40:00
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '2e821228db4e'
+down_revision = 'c9aa41d5feee'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # 조건 컬럼 + 정렬 컬럼 복합 인덱스 (flask check-query-plans로 확인)
+    op.create_index('ix_usage_logs_user_timestamp', 'usage_logs', ['user_id', 'timestamp'], if_not_exists=True)
+    op.create_index('ix_usage_logs_key_endpoint_timestamp', 'usage_logs', ['api_key_id', 'endpoint', 'timestamp'],
+                    if_not_exists=True)
+    op.create_index('ix_subscriptions_status_request_date', 'subscriptions', ['status', 'request_date'],
+                    if_not_exists=True)
+    op.create_index('ix_services_active_created', 'services', ['is_active', 'created_at'], if_not_exists=True)
+    op.create_index('ix_api_keys_user_created', 'api_keys', ['user_id', 'created_at'], if_not_exists=True)
+    # 복합 인덱스의 앞부분과 같은 단일 컬럼 인덱스는 쓰기 비용만 늘리므로 삭제
+    op.drop_index('ix_usage_logs_user_id', table_name='usage_logs', if_exists=True)
+    op.drop_index('ix_usage_logs_api_key_id', table_name='usage_logs', if_exists=True)
+
+
+def downgrade():
+    op.create_index('ix_usage_logs_api_key_id', 'usage_logs', ['api_key_id'], if_not_exists=True)
+    op.create_index('ix_usage_logs_user_id', 'usage_logs', ['user_id'], if_not_exists=True)
+    op.drop_index('ix_api_keys_user_created', table_name='api_keys', if_exists=True)
+    op.drop_index('ix_services_active_created', table_name='services', if_exists=True)
+    op.drop_index('ix_subscriptions_status_request_date', table_name='subscriptions', if_exists=True)
+    op.drop_index('ix_usage_logs_key_endpoint_timestamp', table_name='usage_logs', if_exists=True)
+    op.drop_index('ix_usage_logs_user_timestamp', table_name='usage_logs', if_exists=True)
@@ -0,0 +1,28 @@
+"""add (user_id, created_at) index for prediction history
+
+Revision ID: 5d8e1a6b2c73
+Revises: 7b3f0c2d9a41
+Create Date: 2026-10-18 18:05:00
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '5d8e1a6b2c73'
+down_revision = '7b3f0c2d9a41'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # /api/predictions 키셋 페이지: user_id 조건 + (created_at, id) 정렬
+    op.create_index('ix_prediction_results_user_created', 'prediction_results', ['user_id', 'created_at'],
+                    if_not_exists=True)
+    op.drop_index('ix_prediction_results_user_id', table_name='prediction_results', if_exists=True)
+
+
+def downgrade():
+    op.create_index('ix_prediction_results_user_id', 'prediction_results', ['user_id'], if_not_exists=True)
+    op.drop_index('ix_prediction_results_user_created', table_name='prediction_results', if_exists=True)
@@ -0,0 +1,33 @@
+"""add usage_counters for daily/monthly quota enforcement
+
+Revision ID: 7b3f0c2d9a41
+Revises: 2e821228db4e
+Create Date: 2026-10-18 17:20:00
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '7b3f0c2d9a41'
+down_revision = '2e821228db4e'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # (주체, 기간)별 사용량 카운터, 기존 사용량은 flask usage rebuild-counters로 백필
+    op.create_table(
+        'usage_counters',
+        sa.Column('principal_type', sa.String(length=10), nullable=False),
+        sa.Column('principal_id', sa.Integer(), nullable=False),
+        sa.Column('period', sa.String(length=10), nullable=False),
+        sa.Column('count', sa.Integer(), nullable=False),
+        sa.PrimaryKeyConstraint('principal_type', 'principal_id', 'period'),
+        if_not_exists=True,
+    )
+
+
+def downgrade():
+    op.drop_table('usage_counters', if_exists=True)
@@ -0,0 +1,75 @@
+"""add usage_rollup_hourly / usage_rollup_daily
+
+Revision ID: a1c4e9f27b10
+Revises: 5d8e1a6b2c73
+Create Date: 2026-10-19 10:00:00
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a1c4e9f27b10'
+down_revision = '5d8e1a6b2c73'
+branch_labels = None
+depends_on = None
+
+
+USAGE_TYPE = sa.Enum('LOGIN', 'API_KEY', 'WEB_UI', name='usagetype')
+
+
+# 롤업 구간 시작 시각: SQLite는 SQLAlchemy DateTime 저장 형식과 같은 문자열이어야
+# 이후 apply_rollups의 UPSERT가 같은 구간 행과 충돌(UNIQUE)해서 누적된다
+BUCKETS = {'usage_rollup_hourly': ('%Y-%m-%d %H:00:00.000000', 'hour'),
+           'usage_rollup_daily': ('%Y-%m-%d 00:00:00.000000', 'day')}
+
+
+def _backfill(name):
+    """기존 usage_logs로 롤업 채우기 (flask usage rebuild-rollups와 같은 집계, 테이블이 비어 있을 때만)"""
+    logs = sa.table('usage_logs', sa.column('timestamp', sa.DateTime()), sa.column('user_id', sa.Integer()),
+                    sa.column('api_key_id', sa.Integer()), sa.column('service_id', sa.Integer()),
+                    sa.column('usage_type', USAGE_TYPE), sa.column('usage_count', sa.Integer()))
+    rollup = sa.table(name, sa.column('bucket'), sa.column('user_id'), sa.column('api_key_id'),
+                      sa.column('service_id'), sa.column('usage_type'), sa.column('usage_count'))
+    sqlite_format, unit = BUCKETS[name]
+    if op.get_bind().dialect.name == 'sqlite':
+        bucket = sa.func.strftime(sqlite_format, logs.c.timestamp)
+    else:
+        bucket = sa.func.date_trunc(unit, logs.c.timestamp)
+    keys = [bucket, sa.func.coalesce(logs.c.user_id, 0), sa.func.coalesce(logs.c.api_key_id, 0),
+            logs.c.service_id, logs.c.usage_type]
+    query = sa.select(*keys, sa.func.sum(logs.c.usage_count))\
+        .where(logs.c.usage_count > 0, ~sa.exists().select_from(rollup))\
+        .group_by(*keys)
+    op.execute(rollup.insert().from_select(
+        ['bucket', 'user_id', 'api_key_id', 'service_id', 'usage_type', 'usage_count'], query))
+
+
+# 대시보드용 시간/일 단위 사용량 롤업 (기존 usage_logs로 바로 백필)
+def upgrade():
+    for name, unique_name, index_name in (
+            ('usage_rollup_hourly', '_usage_hourly_uc', 'ix_usage_hourly_user_bucket'),
+            ('usage_rollup_daily', '_usage_daily_uc', 'ix_usage_daily_user_bucket')):
+        op.create_table(
+            name,
+            sa.Column('id', sa.Integer(), nullable=False),
+            sa.Column('bucket', sa.DateTime(), nullable=False),
+            sa.Column('user_id', sa.Integer(), nullable=False),
+            sa.Column('api_key_id', sa.Integer(), nullable=False),
+            sa.Column('service_id', sa.Integer(), nullable=False),
+            sa.Column('usage_type', USAGE_TYPE, nullable=False),
+            sa.Column('usage_count', sa.Integer(), nullable=False),
+            sa.PrimaryKeyConstraint('id'),
+            sa.UniqueConstraint('bucket', 'user_id', 'api_key_id', 'service_id', 'usage_type', name=unique_name),
+            if_not_exists=True,
+        )
+        op.create_index(index_name, name, ['user_id', 'bucket'], if_not_exists=True)
+        _backfill(name)
+
+
+def downgrade():
+    for name, index_name in (('usage_rollup_daily', 'ix_usage_daily_user_bucket'),
+                             ('usage_rollup_hourly', 'ix_usage_hourly_user_bucket')):
+        op.drop_index(index_name, table_name=name, if_exists=True)
+        op.drop_table(name, if_exists=True)
@@ -0,0 +1,61 @@
+"""recreate foreign keys with ON DELETE CASCADE
+
+Revision ID: b8d2f5e61c34
+Revises: a1c4e9f27b10
+Create Date: 2026-10-19 10:30:00
+
+"""
+import logging
+from collections import Counter
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b8d2f5e61c34'
+down_revision = 'a1c4e9f27b10'
+branch_labels = None
+depends_on = None
+
+
+# 기존 DB의 FK는 이름이 없으므로 naming_convention으로 이름을 붙여 지운 뒤 ondelete='CASCADE'로 다시 만든다.
+# SQLite는 FK를 변경할 수 없어 batch 모드로 테이블을 재생성(복사)한다: usage_logs가 크면 시간이 걸린다.
+# 재생성 중 부모 테이블 DROP이 자식 행에 영향을 주지 않도록 env.py에서 PRAGMA foreign_keys=OFF로 실행한다.
+NAMING_CONVENTION = {'fk': 'fk_%(table_name)s_%(column_0_name)s_%(referred_table_name)s'}
+FOREIGN_KEYS = {
+    'subscriptions': [('user_id', 'users'), ('service_id', 'services')],
+    'api_keys': [('user_id', 'users')],
+    'usage_logs': [('user_id', 'users'), ('service_id', 'services'), ('api_key_id', 'api_keys')],
+    'prediction_results': [('user_id', 'users'), ('service_id', 'services'), ('api_key_id', 'api_keys')],
+    'iris_results': [('id', 'prediction_results')],
+    'loan_results': [('id', 'prediction_results')],
+}
+
+
+def _recreate(ondelete):
+    for table, keys in FOREIGN_KEYS.items():
+        with op.batch_alter_table(table, naming_convention=NAMING_CONVENTION, recreate='always') as batch_op:
+            for column, referred in keys:
+                name = f'fk_{table}_{column}_{referred}'
+                batch_op.drop_constraint(name, type_='foreignkey')
+                batch_op.create_foreign_key(name, referred, [column], ['id'], ondelete=ondelete)
+
+
+def _report_orphans():
+    # FK 검사를 끈 상태로 복사했으므로 부모가 이미 없는 자식 행(예전 삭제에서 남은 행)이 있으면 알린다.
+    # 이런 행은 CASCADE로 지워지지 않으므로 확인 후 직접 정리해야 한다
+    if op.get_bind().dialect.name != 'sqlite':
+        return
+    orphans = Counter((row[0], row[2]) for row in op.get_bind().exec_driver_sql('PRAGMA foreign_key_check'))
+    for (table, parent), count in sorted(orphans.items()):
+        logging.getLogger('alembic.env').warning(f'{table}: {parent}에 없는 행을 참조하는 행 {count}개')
+
+
+def upgrade():
+    _recreate('CASCADE')
+    _report_orphans()
+
+
+def downgrade():
+    _recreate(None)
@@ -0,0 +1,27 @@
+"""baseline: schema before migrations were tracked in this repository
+
+Revision ID: c9aa41d5feee
+Revises: 
+Create Date: 2025-07-01 00:00:00
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c9aa41d5feee'
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+# 이미 배포된 DB(instance/mydb.sqlite3)에 stamp되어 있는 리비전.
+# 이 시점의 테이블은 flask init-db (db.create_all)로 만들어지므로 여기서는 아무것도 하지 않는다.
+# 새 DB: flask init-db 후 flask db stamp head / 기존 DB: flask db upgrade
+def upgrade():
+    pass
+
+
+def downgrade():
+    pass
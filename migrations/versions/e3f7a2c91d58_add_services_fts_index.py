@@ -0,0 +1,60 @@
+"""add services_fts full-text search index (SQLite FTS5)
+
+Revision ID: e3f7a2c91d58
+Revises: b8d2f5e61c34
+Create Date: 2026-10-19 11:00:00
+
+"""
+import logging
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e3f7a2c91d58'
+down_revision = 'b8d2f5e61c34'
+branch_labels = None
+depends_on = None
+
+
+# apps/search.py의 _FTS_DDL과 같은 정의 (external content + trigram, 트리거로 services와 동기화)
+FTS_DDL = [
+    "CREATE VIRTUAL TABLE IF NOT EXISTS services_fts USING fts5("
+    "servicename, description, keywords, content='services', content_rowid='id', tokenize='trigram')",
+    "CREATE TRIGGER IF NOT EXISTS services_fts_ai AFTER INSERT ON services BEGIN "
+    "INSERT INTO services_fts(rowid, servicename, description, keywords) "
+    "VALUES (new.id, new.servicename, new.description, new.keywords); END",
+    "CREATE TRIGGER IF NOT EXISTS services_fts_ad AFTER DELETE ON services BEGIN "
+    "INSERT INTO services_fts(services_fts, rowid, servicename, description, keywords) "
+    "VALUES ('delete', old.id, old.servicename, old.description, old.keywords); END",
+    "CREATE TRIGGER IF NOT EXISTS services_fts_au AFTER UPDATE OF servicename, description, keywords ON services BEGIN "
+    "INSERT INTO services_fts(services_fts, rowid, servicename, description, keywords) "
+    "VALUES ('delete', old.id, old.servicename, old.description, old.keywords); "
+    "INSERT INTO services_fts(rowid, servicename, description, keywords) "
+    "VALUES (new.id, new.servicename, new.description, new.keywords); END",
+]
+
+
+def upgrade():
+    # SQLite에서만 생성, FTS5/trigram을 지원하지 않으면 건너뛴다 (검색은 ilike로 동작)
+    bind = op.get_bind()
+    if bind.dialect.name != 'sqlite':
+        return
+    exists = bind.execute(sa.text("SELECT 1 FROM sqlite_master WHERE name = 'services_fts'")).first()
+    try:
+        for ddl in FTS_DDL:
+            op.execute(ddl)
+    except sa.exc.OperationalError as e:
+        logging.getLogger('alembic.env').warning(f'FTS5 검색 인덱스를 만들지 않았습니다: {e.orig}')
+        return
+    if not exists:   # init-db / search rebuild-index로 이미 만든 인덱스는 그대로 둔다
+        op.execute("INSERT INTO services_fts(services_fts) VALUES ('rebuild')")
+
+
+def downgrade():
+    if op.get_bind().dialect.name != 'sqlite':
+        return
+    for trigger in ('services_fts_au', 'services_fts_ad', 'services_fts_ai'):
+        op.execute(f'DROP TRIGGER IF EXISTS {trigger}')
+    op.execute('DROP TABLE IF EXISTS services_fts')